@@ -0,0 +1,45 @@
+"""documents search_vector
+
+Revision ID: a1f3c9e2b7d4
+Revises: bd5ea5a256d8
+Create Date: 2026-10-18 09:00:00.000000
+
+Generated tsvector column (title weight A, description weight B) with a GIN
+index backing full-text search. Postgres only; SQLite uses the in-process
+inverted index from app.services.search.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c9e2b7d4'
+down_revision: Union[str, None] = 'bd5ea5a256d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_search_vector ON documents USING GIN (search_vector)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS idx_documents_search_vector")
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS search_vector")
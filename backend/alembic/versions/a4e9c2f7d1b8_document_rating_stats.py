@@ -0,0 +1,50 @@
+"""document_rating_stats
+
+Revision ID: a4e9c2f7d1b8
+Revises: f2d7b1c5e8a6
+Create Date: 2026-10-18 19:00:00.000000
+
+Per-document rating aggregates (see app/services/ratings.py), backfilled
+from ratings.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e9c2f7d1b8'
+down_revision: Union[str, None] = 'f2d7b1c5e8a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HISTOGRAM = [f'score_{score}' for score in range(6)]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_table(
+        'document_rating_stats',
+        sa.Column('document_id', sa.Integer(), sa.ForeignKey('documents.document_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rating_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        *(sa.Column(column, sa.Integer(), nullable=False, server_default='0') for column in HISTOGRAM),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.execute(f"""
+        INSERT INTO document_rating_stats (document_id, rating_sum, rating_count, {', '.join(HISTOGRAM)})
+        SELECT document_id,
+               COALESCE(SUM(score) FILTER (WHERE score > 0), 0),
+               COUNT(*) FILTER (WHERE score > 0),
+               {', '.join(f'COUNT(*) FILTER (WHERE score = {score})' for score in range(6))}
+        FROM ratings
+        GROUP BY document_id
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_table('document_rating_stats')
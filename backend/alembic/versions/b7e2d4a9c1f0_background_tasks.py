@@ -0,0 +1,54 @@
+"""background_tasks
+
+Revision ID: b7e2d4a9c1f0
+Revises: a1f3c9e2b7d4
+Create Date: 2026-10-18 13:00:00.000000
+
+Table backing the durable task queue (app.background.queue). The partial
+unique index makes ``dedup_key`` unique among queued/running tasks only.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4a9c1f0'
+down_revision: Union[str, None] = 'a1f3c9e2b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_table(
+        'background_tasks',
+        sa.Column('task_id', sa.BigInteger(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('dedup_key', sa.String(length=255)),
+        sa.Column('run_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('locked_until', sa.DateTime()),
+        sa.Column('last_error', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("status IN ('queued', 'running', 'failed')"),
+    )
+    op.create_index('idx_background_tasks_status_run_at', 'background_tasks', ['status', 'run_at'])
+    op.create_index(
+        'uix_background_tasks_dedup_key', 'background_tasks', ['dedup_key'], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('uix_background_tasks_dedup_key', table_name='background_tasks')
+    op.drop_index('idx_background_tasks_status_run_at', table_name='background_tasks')
+    op.drop_table('background_tasks')
@@ -0,0 +1,34 @@
+"""notifications type/reference index
+
+Revision ID: c3a8f1d6e2b5
+Revises: b7e2d4a9c1f0
+Create Date: 2026-10-18 14:00:00.000000
+
+Lets the notification fan-out skip users who already received a
+notification of the same type for the same object.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8f1d6e2b5'
+down_revision: Union[str, None] = 'b7e2d4a9c1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_type_reference ON notifications (type, reference_id)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS idx_notifications_type_reference")
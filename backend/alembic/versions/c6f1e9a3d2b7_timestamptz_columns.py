@@ -0,0 +1,179 @@
+"""timestamptz columns
+
+Revision ID: c6f1e9a3d2b7
+Revises: a4e9c2f7d1b8
+Create Date: 2026-10-18 20:00:00.000000
+
+Turn every created_at / updated_at (plus users.last_login,
+shared_links.expiration_date and the run_at / locked_until of
+background_tasks) into ``timestamptz`` with ``now()`` defaults, and index
+the columns lists are sorted and windowed by.
+
+Runs online, one column at a time, outside a long transaction:
+
+* ``timestamp`` columns (databases built from createdb.sql) change type
+  with the session time zone at UTC, which Postgres does without rewriting
+  the table. Only a brief ACCESS EXCLUSIVE lock is taken (``lock_timeout``
+  bounds the wait),
+* text columns (databases built from the old String models) get a shadow
+  ``timestamptz`` column kept in sync by a trigger, are backfilled in
+  primary key batches that commit one by one, and are swapped in with one
+  short statement. Values that do not parse as ISO 8601 become NULL. Naive
+  values are read as UTC, matching what the application wrote,
+* indexes are built with CREATE INDEX CONCURRENTLY.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1e9a3d2b7'
+down_revision: Union[str, None] = 'a4e9c2f7d1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMPS = ['created_at', 'updated_at']
+COLUMNS = {
+    'academic_years': TIMESTAMPS,
+    'majors': TIMESTAMPS,
+    'departments': TIMESTAMPS,
+    'subject_departments': ['created_at'],
+    'users': [*TIMESTAMPS, 'last_login'],
+    'subjects': TIMESTAMPS,
+    'documents': TIMESTAMPS,
+    'tags': ['created_at'],
+    'document_tags': ['created_at'],
+    'comments': TIMESTAMPS,
+    'ratings': TIMESTAMPS,
+    'document_history': ['created_at'],
+    'shared_links': ['expiration_date', 'created_at'],
+    'forums': ['created_at'],
+    'forum_posts': TIMESTAMPS,
+    'forum_replies': TIMESTAMPS,
+    'notifications': ['created_at'],
+    'system_config': ['updated_at'],
+    'background_tasks': ['run_at', 'locked_until', 'created_at'],
+    'bulk_jobs': TIMESTAMPS,
+    'file_blobs': ['created_at'],
+    'stat_counters': ['updated_at'],
+    'document_rating_stats': ['updated_at'],
+}
+# Cột có DEFAULT now() (các cột còn lại: DEFAULT NULL)
+NOW_DEFAULTS = [*TIMESTAMPS, 'run_at']
+INDEXES = [
+    ('idx_documents_created_at', 'documents', ['created_at', 'document_id']),
+    ('idx_documents_status_created_at', 'documents', ['status', 'created_at', 'document_id']),
+    ('idx_document_history_created_at', 'document_history', ['created_at']),
+    ('idx_comments_document_created_at', 'comments', ['document_id', 'created_at']),
+    ('idx_forum_posts_forum_created_at', 'forum_posts', ['forum_id', 'created_at', 'post_id']),
+    ('idx_forum_replies_post_created_at', 'forum_replies', ['post_id', 'created_at', 'reply_id']),
+    ('idx_notifications_user_created_at', 'notifications', ['user_id', 'created_at']),
+]
+BATCH_SIZE = 10000
+LOCK_TIMEOUT = '5s'
+
+# ISO 8601 trong cột text -> timestamptz; giá trị không có múi giờ được hiểu là UTC
+TEXT_TO_TIMESTAMPTZ = r"""CASE
+    WHEN {value} !~ '^\d{{4}}-\d{{2}}-\d{{2}}' THEN NULL
+    WHEN {value} ~ ':\d{{2}}(\.\d+)?(Z|[+-]\d{{2}}(:?\d{{2}})?)$' THEN ({value})::timestamptz
+    ELSE ({value})::timestamp AT TIME ZONE 'UTC'
+END"""
+
+
+def _data_type(table: str, column: str):
+    return op.get_bind().execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).scalar()
+
+
+def _default(column: str) -> str:
+    return "now()" if column in NOW_DEFAULTS else "NULL"
+
+
+def _retype_in_place(table: str, column: str, type_: str) -> None:
+    # timestamp <-> timestamptz không ghi lại bảng khi TimeZone của phiên là UTC
+    op.execute(f"""
+        DO $$ BEGIN
+            PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+            PERFORM set_config('TimeZone', 'UTC', true);
+            ALTER TABLE {table} ALTER COLUMN {column} TYPE {type_};
+            ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT {_default(column)};
+        END $$
+    """)
+
+
+def _convert_text_column(table: str, column: str) -> None:
+    shadow = f"{column}__tstz"
+    sync = f"{table}_{column}_tstz_sync"
+    key = sa.inspect(op.get_bind()).get_pk_constraint(table)['constrained_columns'][0]
+
+    op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {shadow} timestamptz")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {sync}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.{shadow} := {TEXT_TO_TIMESTAMPTZ.format(value=f'NEW.{column}')};
+            RETURN NEW;
+        END $$
+    """)
+    op.execute(f"DROP TRIGGER IF EXISTS {sync} ON {table}")
+    op.execute(
+        f"CREATE TRIGGER {sync} BEFORE INSERT OR UPDATE OF {column} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {sync}()"
+    )
+
+    # Backfill theo khoảng khóa chính, mỗi lô commit riêng
+    low, high = op.get_bind().execute(sa.text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+    if low is not None:
+        for start in range(low, high + 1, BATCH_SIZE):
+            op.execute(f"""
+                UPDATE {table} SET {shadow} = {TEXT_TO_TIMESTAMPTZ.format(value=column)}
+                WHERE {key} >= {start} AND {key} < {start + BATCH_SIZE}
+                  AND {shadow} IS NULL AND {column} IS NOT NULL
+            """)
+
+    op.execute(f"""
+        DO $$ BEGIN
+            PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+            LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;
+            UPDATE {table} SET {shadow} = {TEXT_TO_TIMESTAMPTZ.format(value=column)}
+            WHERE {shadow} IS NULL AND {column} IS NOT NULL;
+            DROP TRIGGER {sync} ON {table};
+            ALTER TABLE {table} DROP COLUMN {column};
+            ALTER TABLE {table} RENAME COLUMN {shadow} TO {column};
+            ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT {_default(column)};
+        END $$
+    """)
+    op.execute(f"DROP FUNCTION IF EXISTS {sync}()")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for table, columns in COLUMNS.items():
+            for column in columns:
+                data_type = _data_type(table, column)
+                if data_type is None:
+                    op.execute(f"ALTER TABLE {table} ADD COLUMN {column} timestamptz DEFAULT {_default(column)}")
+                elif data_type == 'timestamp without time zone':
+                    _retype_in_place(table, column, 'timestamptz')
+                elif data_type in ('character varying', 'text'):
+                    _convert_text_column(table, column)
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        # Về kiểu TIMESTAMP của createdb.sql (giờ UTC, không ghi lại bảng)
+        for table, columns in COLUMNS.items():
+            for column in columns:
+                if _data_type(table, column) == 'timestamp with time zone':
+                    _retype_in_place(table, column, 'timestamp')
@@ -0,0 +1,50 @@
+"""bulk moderation
+
+Revision ID: d5b9e3c7a4f1
+Revises: c3a8f1d6e2b5
+Create Date: 2026-10-18 15:00:00.000000
+
+Adds the 'approve' and 'reject' history actions written by bulk moderation
+and the bulk_jobs table tracking background bulk deletes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b9e3c7a4f1'
+down_revision: Union[str, None] = 'c3a8f1d6e2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # ALTER TYPE ... ADD VALUE không chạy được trong transaction trên Postgres cũ
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE history_action ADD VALUE IF NOT EXISTS 'approve'")
+        op.execute("ALTER TYPE history_action ADD VALUE IF NOT EXISTS 'reject'")
+    op.create_table(
+        'bulk_jobs',
+        sa.Column('job_id', sa.BigInteger(), primary_key=True),
+        sa.Column('operation', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('succeeded', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text()),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.user_id')),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("status IN ('queued', 'running', 'completed', 'failed')"),
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # Postgres không xóa được giá trị khỏi enum: chỉ bỏ bảng
+    op.drop_table('bulk_jobs')
@@ -0,0 +1,61 @@
+"""foreign key index pack
+
+Revision ID: e4d8b2f6a9c1
+Revises: c6f1e9a3d2b7
+Create Date: 2026-10-18 21:00:00.000000
+
+Indexes for the hot lookups that still scanned whole tables on databases
+created from the ORM models: documents by subject / uploader, unread
+notifications, the history of a document and login by username.
+comments.document_id, ratings.document_id, forum_posts.forum_id and
+forum_replies.post_id are already the leading column of an existing index.
+
+Every index is built with CREATE INDEX CONCURRENTLY, so writes continue
+during the build. A build that failed earlier leaves an INVALID index
+behind; it is dropped and rebuilt instead of being skipped by IF NOT EXISTS.
+Check the plans afterwards with ``python -m benchmarks.bench_query_plans``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4d8b2f6a9c1'
+down_revision: Union[str, None] = 'c6f1e9a3d2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('idx_documents_subject_status', 'documents', ['subject_id', 'status']),
+    ('idx_documents_user_created', 'documents', ['user_id', 'created_at']),
+    ('idx_notifications_user_is_read', 'notifications', ['user_id', 'is_read']),
+    ('idx_document_history_document_created_at', 'document_history', ['document_id', 'created_at']),
+    ('ix_users_username', 'users', ['username']),
+]
+
+
+def _is_invalid(name: str) -> bool:
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": name}).scalar())
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if _is_invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""file_blobs
+
+Revision ID: e8c2a6f4b9d3
+Revises: d5b9e3c7a4f1
+Create Date: 2026-10-18 16:00:00.000000
+
+Reference-counted content-addressed storage for uploaded files. Existing
+documents keep their file_path and are not counted.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2a6f4b9d3'
+down_revision: Union[str, None] = 'd5b9e3c7a4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_table(
+        'file_blobs',
+        sa.Column('sha256', sa.CHAR(length=64), primary_key=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint('ref_count >= 0'),
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_table('file_blobs')
@@ -0,0 +1,66 @@
+"""stat_counters
+
+Revision ID: f2d7b1c5e8a6
+Revises: e8c2a6f4b9d3
+Create Date: 2026-10-18 18:00:00.000000
+
+Counters behind /statistics (see app/services/statistics.py), backfilled
+with the same queries as the periodic rollup.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d7b1c5e8a6'
+down_revision: Union[str, None] = 'e8c2a6f4b9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_table(
+        'stat_counters',
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('scope', 'scope_id', 'metric', name='pk_stat_counters'),
+    )
+    op.execute("""
+        INSERT INTO stat_counters (scope, scope_id, metric, value)
+        SELECT 'global', 0, 'users', COUNT(*) FROM users
+        UNION ALL
+        SELECT 'global', 0, 'documents', COUNT(*) FILTER (WHERE status = 'approved') FROM documents
+        UNION ALL
+        SELECT 'global', 0, 'views', COALESCE(SUM(view_count), 0) FROM documents
+        UNION ALL
+        SELECT 'global', 0, 'downloads', COALESCE(SUM(download_count), 0) FROM documents
+    """)
+    op.execute("""
+        INSERT INTO stat_counters (scope, scope_id, metric, value)
+        SELECT 'subject', by_subject.subject_id, metrics.metric, metrics.value
+        FROM (
+            SELECT subject_id,
+                   COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+                   COALESCE(SUM(view_count), 0) AS views,
+                   COALESCE(SUM(download_count), 0) AS downloads
+            FROM documents
+            GROUP BY subject_id
+        ) AS by_subject
+        CROSS JOIN LATERAL (VALUES
+            ('documents', by_subject.approved),
+            ('views', by_subject.views),
+            ('downloads', by_subject.downloads)
+        ) AS metrics(metric, value)
+    """)
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_table('stat_counters')
@@ -0,0 +1,185 @@
+"""partition document_history by month
+
+Revision ID: f7a3c9d1e5b2
+Revises: e4d8b2f6a9c1
+Create Date: 2026-10-18 22:00:00.000000
+
+Turns ``document_history`` into a table range-partitioned by month on
+``created_at`` (primary key ``(history_id, created_at)``) and adds
+``document_history_daily``, the per-document daily aggregates that
+``app/services/history.py`` rolls old days into before dropping partitions.
+
+The existing rows are not copied. The old table becomes the partition
+``document_history_legacy`` for ``MINVALUE .. BOUNDARY`` and is dropped
+whole by the retention job once its last day has expired. To attach it
+without a long lock:
+
+* a CHECK constraint equal to the partition bound is added NOT VALID and
+  validated online, so neither SET NOT NULL nor ATTACH PARTITION scans the table,
+* the indexes of the partitioned table are built on the old table first
+  (CONCURRENTLY), so ATTACH adopts them instead of building them; the
+  unique index on ``(history_id, created_at)`` replaces the old primary key
+  (``ADD PRIMARY KEY USING INDEX``, no scan), since ATTACH only adopts an
+  index for the parent's primary key if it backs a primary key too,
+* the partitioned table declares the same foreign keys (NO ACTION) as the
+  old one, which ATTACH adopts without validating them again.
+
+The primary key swap, rename, CREATE TABLE and ATTACH run in one short
+transaction under ``lock_timeout``. BOUNDARY is the start of the month
+after next, so that a migration running near the end of a month still
+leaves room for the rows written meanwhile.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c9d1e5b2'
+down_revision: Union[str, None] = 'e4d8b2f6a9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY = 'document_history_legacy'
+BOUND_CHECK = 'document_history_legacy_bound'
+INDEXES = [
+    ('ix_document_history_history_id', ['history_id']),
+    ('idx_document_history_created_at', ['created_at']),
+    ('idx_document_history_document_created_at', ['document_id', 'created_at']),
+    ('idx_document_history_document_user', ['document_id', 'user_id']),
+]
+PRIMARY_KEY_INDEX = 'document_history_history_id_created_at_key'
+LOCK_TIMEOUT = '5s'
+
+
+def _month_start(months: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _relkind(table: str):
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_table(
+        'document_history_daily',
+        sa.Column('document_id', sa.Integer(), sa.ForeignKey('documents.document_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('action', postgresql.ENUM(name='history_action', create_type=False), nullable=False),
+        sa.Column('events', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('users', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('document_id', 'day', 'action', name='pk_document_history_daily'),
+    )
+    if _relkind('document_history') == 'p':
+        return
+
+    boundary, next_boundary = _month_start(2), _month_start(3)
+    with op.get_context().autocommit_block():
+        # Dòng không có thời gian: xếp vào đầu, bị bỏ trước tiên theo retention
+        op.execute("UPDATE document_history SET created_at = 'epoch' WHERE created_at IS NULL")
+        op.execute(
+            f"ALTER TABLE document_history ADD CONSTRAINT {BOUND_CHECK} "
+            f"CHECK (created_at IS NOT NULL AND created_at < '{boundary.isoformat()}') NOT VALID"
+        )
+        op.execute(f"ALTER TABLE document_history VALIDATE CONSTRAINT {BOUND_CHECK}")
+        op.execute("ALTER TABLE document_history ALTER COLUMN created_at SET NOT NULL")
+        op.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {PRIMARY_KEY_INDEX} "
+            "ON document_history (history_id, created_at)"
+        )
+        for name, columns in INDEXES:
+            op.create_index(name, 'document_history', columns, postgresql_concurrently=True, if_not_exists=True)
+
+        parent_indexes = ";\n".join(
+            f"CREATE INDEX {name} ON document_history ({', '.join(columns)})" for name, columns in INDEXES
+        )
+        op.execute(f"""
+            DO $$
+            DECLARE
+                index_name text;
+                primary_key text;
+            BEGIN
+                PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+                LOCK TABLE document_history IN ACCESS EXCLUSIVE MODE;
+                -- Khóa chính (history_id) -> (history_id, created_at) trên index đã dựng sẵn
+                SELECT conname INTO primary_key FROM pg_constraint
+                    WHERE conrelid = 'document_history'::regclass AND contype = 'p';
+                EXECUTE format('ALTER TABLE document_history DROP CONSTRAINT %I', primary_key);
+                EXECUTE format('ALTER TABLE document_history ADD CONSTRAINT %I PRIMARY KEY USING INDEX {PRIMARY_KEY_INDEX}',
+                               primary_key);
+                ALTER TABLE document_history RENAME TO {LEGACY};
+                -- Tên index là duy nhất trong schema: nhường tên cho bảng mới
+                FOR index_name IN SELECT indexname FROM pg_indexes
+                        WHERE tablename = '{LEGACY}' AND schemaname = current_schema() LOOP
+                    EXECUTE format('ALTER INDEX %I RENAME TO %I', index_name, left(index_name, 56) || '_legacy');
+                END LOOP;
+
+                CREATE TABLE document_history (LIKE {LEGACY} INCLUDING DEFAULTS)
+                    PARTITION BY RANGE (created_at);
+                ALTER TABLE document_history ADD PRIMARY KEY (history_id, created_at);
+                ALTER TABLE document_history
+                    ADD FOREIGN KEY (document_id) REFERENCES documents (document_id),
+                    ADD FOREIGN KEY (user_id) REFERENCES users (user_id);
+                {parent_indexes};
+
+                ALTER TABLE document_history ATTACH PARTITION {LEGACY}
+                    FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}');
+                -- Sequence phải thuộc về bảng mới, không bị xóa cùng partition cũ
+                EXECUTE format('ALTER SEQUENCE %s OWNED BY document_history.history_id',
+                               pg_get_serial_sequence('{LEGACY}', 'history_id'));
+                CREATE TABLE document_history_p{boundary:%Y%m} PARTITION OF document_history
+                    FOR VALUES FROM ('{boundary.isoformat()}') TO ('{next_boundary.isoformat()}');
+            END $$
+        """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_table('document_history_daily')
+    if _relkind('document_history') != 'p':
+        return
+    with op.get_context().autocommit_block():
+        op.execute(f"""
+            DO $$
+            DECLARE
+                index_name text;
+                primary_key text;
+                sequence_name text := pg_get_serial_sequence('document_history', 'history_id');
+            BEGIN
+                PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+                LOCK TABLE document_history IN ACCESS EXCLUSIVE MODE;
+                IF to_regclass('{LEGACY}') IS NULL THEN
+                    -- Partition cũ đã bị xóa theo retention
+                    CREATE TABLE {LEGACY} (LIKE document_history INCLUDING DEFAULTS INCLUDING INDEXES);
+                ELSE
+                    ALTER TABLE document_history DETACH PARTITION {LEGACY};
+                    ALTER TABLE {LEGACY} DROP CONSTRAINT IF EXISTS {BOUND_CHECK};
+                END IF;
+                INSERT INTO {LEGACY} SELECT * FROM document_history;
+                EXECUTE format('ALTER SEQUENCE %s OWNED BY {LEGACY}.history_id', sequence_name);
+                DROP TABLE document_history;
+                ALTER TABLE {LEGACY} RENAME TO document_history;
+                FOR index_name IN SELECT indexname FROM pg_indexes
+                        WHERE tablename = 'document_history' AND schemaname = current_schema()
+                          AND indexname LIKE '%\\_legacy' LOOP
+                    EXECUTE format('ALTER INDEX %I RENAME TO %I', index_name, left(index_name, -7));
+                END LOOP;
+                -- Trả lại khóa chính (history_id) của bảng ban đầu
+                SELECT conname INTO primary_key FROM pg_constraint
+                    WHERE conrelid = 'document_history'::regclass AND contype = 'p';
+                EXECUTE format('ALTER TABLE document_history DROP CONSTRAINT %I', primary_key);
+                ALTER TABLE document_history ADD CONSTRAINT document_history_pkey PRIMARY KEY (history_id);
+                ALTER TABLE document_history ALTER COLUMN created_at DROP NOT NULL;
+            END $$
+        """)
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, departments
+from app.api.v1.endpoints import auth, users, departments, documents, forums, statistics
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(departments.router, prefix="/departments", tags=["departments"])
+api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
+api_router.include_router(forums.router, prefix="/forums", tags=["forums"])
+api_router.include_router(statistics.router, prefix="/statistics", tags=["statistics"])
@@ -1,49 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.base import get_db
 from app.services.crud.user_crud import user_crud
 from app.core.config import settings
+from app.core.security import PasswordHasherBusy, create_access_token
 from app.schemas.common import LoginResponse
 from app.schemas.auth import RegisterRequest 
 
-def create_access_token(data: dict, expires_delta: timedelta = None):
-    """Create JWT access token"""
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.SECRET_KEY,  # Using SECRET_KEY from .env
-        algorithm=settings.ALGORITHM  # Using ALGORITHM from .env
-    )
-    return encoded_jwt
-
 router = APIRouter()
 
-@router.post("/login")
-def login(username: str, password: str, db: Session = Depends(get_db)):
+@router.post("/login", response_model=LoginResponse)
+async def login(username: str, password: str, db: AsyncSession = Depends(get_db)):
     """Login with username/email or password"""
-    # No await needed since methods are now synchronous
-    user = user_crud.get_by_username(db=db, username=username)
-    
+    try:
+        user, new_hash = await user_crud.authenticate(db=db, login=username, password=password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not user:
-        user = user_crud.get_by_email(db=db, email=username)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    
-    if not user_crud.verify_password(password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -56,14 +34,24 @@ def login(username: str, password: str, db: Session = Depends(get_db)):
             detail="User account is not active"
         )
     
-    user_crud.update_last_login(db=db, user_id=user.user_id)
-    
+    await user_crud.update_last_login(db=db, user_id=user.user_id, password_hash=new_hash)
     
-    return {"login successfull"}
+    # Token ký bằng JWT_SECRET_KEY, cùng khóa mà get_current_user dùng để giải mã
+    return LoginResponse(
+        access_token=create_access_token({"sub": str(user.user_id)}),
+        user={
+            "user_id": user.user_id,
+            "username": user.username,
+            "email": user.email,
+            "full_name": user.full_name,
+            "role": user.role,
+        },
+    )
+
 @router.post("/register")
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_db)):
     # Kiểm tra email đã tồn tại
-    existing_user = user_crud.get_by_email(db=db, email=request.email)
+    existing_user = await user_crud.get_by_email(db=db, email=request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -71,7 +59,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         )
     
     # Kiểm tra username đã tồn tại
-    existing_username = user_crud.get_by_username(db=db, username=request.username)
+    existing_username = await user_crud.get_by_username(db=db, username=request.username)
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -91,7 +79,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         )
         
         # Tạo user
-        user = user_crud.create(
+        user = await user_crud.create(
             db=db,
             obj_in=user_create
         )
@@ -104,6 +92,12 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
             "full_name": user.full_name,
             "role": user.role
         }
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many registrations in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1,30 +1,53 @@
-from typing import List
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.responses import ResponseSerializer
+from app.dependencies.http_cache import table_etag
 from app.models.base import get_db
 from app.schemas.department import Department, DepartmentCreate, DepartmentUpdate, DepartmentResponse
 from app.services.crud.department_crud import department_crud
+from app.utils.pagination import InvalidCursorError
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# response_model vẫn mô tả OpenAPI; dữ liệu trả về đi qua serializer biên dịch sẵn
+department_list_serializer = ResponseSerializer(List[DepartmentResponse])
+department_serializer = ResponseSerializer(Department)
+department_validators = table_etag(department_crud.cache_namespace)
+
 @router.get("/", response_model=List[DepartmentResponse])
 async def get_departments(
+    validators: Dict[str, str] = Depends(department_validators),
     db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
     """
-    Lấy danh sách các khoa
+    Lấy danh sách các khoa.
+
+    Trang tiếp theo được trả về qua header `X-Next-Cursor`; truyền lại giá trị đó
+    vào `cursor` để phân trang theo keyset thay vì `skip`.
+    Gửi lại `ETag` qua `If-None-Match` để nhận `304` khi danh sách chưa đổi.
     """
-    departments = await department_crud.get_all(db=db, skip=skip, limit=limit)
-    return departments
+    if skip and not cursor:
+        return department_list_serializer.response(
+            await department_crud.get_all(db=db, skip=skip, limit=limit), headers=validators
+        )
+    try:
+        page = await department_crud.get_page(db=db, cursor=cursor, limit=limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {**validators, "X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else validators
+    return department_list_serializer.response(page["items"], headers=headers)
 
 @router.get("/{id}", response_model=Department)
 async def get_department(
     id: int,
+    validators: Dict[str, str] = Depends(department_validators),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -33,11 +56,12 @@ async def get_department(
     department = await department_crud.get(db, id=id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
-    return department
+    return department_serializer.response(department, headers=validators)
 
 @router.get("/slug/{slug}", response_model=Department)
 async def get_department_by_slug(
     slug: str,
+    validators: Dict[str, str] = Depends(department_validators),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -46,7 +70,7 @@ async def get_department_by_slug(
     department = await department_crud.get_by_slug(db, slug=slug)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
-    return department
+    return department_serializer.response(department, headers=validators)
 
 @router.post("/", response_model=Department)
 async def create_department(
@@ -64,7 +88,7 @@ async def create_department(
             detail="Department with this slug already exists"
         )
     department = await department_crud.create(db, obj_in=department_in.model_dump())
-    return department
+    return department_serializer.response(department)
 
 @router.put("/{id}", response_model=Department)
 async def update_department(
@@ -80,7 +104,7 @@ async def update_department(
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     department = await department_crud.update(db, id=id, obj_in=department_in.model_dump(exclude_unset=True))
-    return department
+    return department_serializer.response(department)
 
 @router.delete("/{id}", response_model=Department)
 async def delete_department(
@@ -93,7 +117,7 @@ async def delete_department(
         department = await department_crud.delete(db, id=id)
         if not department:
             raise HTTPException(status_code=404, detail="Department not found")
-        return department
+        return department_serializer.response(department)
     except Exception as e:
         logger.error(f"Error deleting department: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,349 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.background.tasks import record_document_download, record_document_view
+from app.core.config import settings
+from app.core.responses import (
+    FileRangeResponse, ResponseSerializer, accel_redirect_response, is_regular_file,
+)
+from app.dependencies.auth import get_current_user, get_current_user_optional, require_role
+from app.dependencies.loaders import get_loaders
+from app.models.base import get_db
+from app.models.subject import Subject
+from app.models.user import User
+from app.schemas.common import BulkOperationType, DocumentStatus
+from app.schemas.document import Document, DocumentCreate, DocumentFilterRequest, DocumentListResponse
+from app.schemas.rating import Rating, RatingSummary, RatingUpdate
+from app.schemas.util import (
+    BulkJob, BulkOperationItem, BulkOperationRequest, BulkOperationResponse, SearchRequest, SearchResult,
+)
+from app.services.crud.document_crud import document_crud
+from app.services import moderation, ratings, storage
+from app.services.loaders import Loaders
+from app.services.search import search_documents
+from app.utils.multipart import StreamingMultiPartParser
+
+router = APIRouter()
+
+document_list_serializer = ResponseSerializer(DocumentListResponse)
+
+@router.get("/", response_model=DocumentListResponse)
+async def list_documents(
+    db: AsyncSession = Depends(get_db),
+    subject_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status: Optional[DocumentStatus] = None,
+    tags: List[str] = Query([]),
+    search: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    page: int = Query(1, ge=1, deprecated=True),
+    per_page: int = Query(20, ge=1, le=100),
+    order_by: str = "created_at",
+    order_desc: bool = True,
+    cursor: Optional[str] = None,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Lấy danh sách tài liệu theo bộ lọc.
+
+    Dùng `next_cursor` của trang trước làm `cursor` để lấy trang tiếp theo
+    (`page` > 1 không còn được hỗ trợ, trả 400).
+    Chỉ tài liệu đã duyệt được liệt kê, trừ với admin và với người tải lên
+    khi lọc theo `user_id` của chính mình.
+    `created_after` / `created_before` (ISO 8601) giới hạn theo thời gian tạo.
+    """
+    filters = DocumentFilterRequest(
+        subject_id=subject_id,
+        user_id=user_id,
+        status=status,
+        tags=tags,
+        search=search,
+        created_after=created_after,
+        created_before=created_before,
+        page=page,
+        per_page=per_page,
+        order_by=order_by,
+        order_desc=order_desc,
+        cursor=cursor,
+    )
+    try:
+        result = await document_crud.list_documents(
+            db, filters=filters, viewer=current_user, loaders=loaders
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return document_list_serializer.response(result)
+
+@router.post("/", response_model=Document, status_code=201)
+async def upload_document(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Tải lên tài liệu mới (multipart/form-data: title, description, subject_id, tags, file).
+
+    File được ghi thẳng xuống đĩa theo từng khối và băm SHA-256 trong lúc nhận;
+    nội dung trùng với file đã có chỉ được lưu một lần.
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+    parser = StreamingMultiPartParser(
+        request.headers, request.stream(), max_file_size=settings.MAX_UPLOAD_SIZE
+    )
+    try:
+        try:
+            form = await parser.parse()
+        except storage.UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=e.message)
+
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=400, detail="A file is required")
+        sink = upload.file
+        if sink.size == 0:
+            raise HTTPException(status_code=400, detail="The file is empty")
+        try:
+            obj_in = DocumentCreate(
+                title=form.get("title"),
+                description=form.get("description"),
+                subject_id=form.get("subject_id"),
+                tags=form.getlist("tags"),
+                file_path=storage.blob_path(sink.sha256),
+                file_size=sink.size,
+                file_type=storage.file_type_for(upload.filename),
+            )
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        if await db.get(Subject, obj_in.subject_id) is None:
+            raise HTTPException(status_code=400, detail="Subject not found")
+        return await document_crud.create_uploaded(
+            db, obj_in=obj_in, user_id=current_user.user_id, upload=sink
+        )
+    finally:
+        # Xóa file tạm còn sót lại (upload lỗi); file đã lưu thành blob không bị ảnh hưởng
+        parser.close()
+
+@router.post("/search", response_model=List[SearchResult])
+async def search(
+    search_request: SearchRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Tìm kiếm toàn văn trong các tài liệu đã duyệt, sắp xếp theo độ liên quan.
+
+    Hỗ trợ cú pháp kiểu web: mọi từ đều bắt buộc, `-từ` để loại trừ.
+    """
+    try:
+        return await search_documents(
+            db,
+            query=search_request.query,
+            search_in=search_request.search_in,
+            limit=search_request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_operation(
+    bulk_request: BulkOperationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role(["admin"])),
+):
+    """
+    Duyệt, từ chối hoặc xóa hàng loạt tài liệu.
+
+    Duyệt/từ chối được áp dụng ngay và trả về kết quả từng id (`updated`,
+    `unchanged`, `not_found`). Xóa chạy nền: các id tồn tại có kết quả
+    `queued`, tiến độ xem tại `/documents/bulk/{job_id}`.
+    """
+    job = None
+    if bulk_request.operation == BulkOperationType.delete:
+        outcome, job = await moderation.start_bulk_delete(
+            db,
+            document_ids=bulk_request.document_ids,
+            moderator_id=current_user.user_id,
+            reason=bulk_request.reason,
+        )
+    else:
+        outcome = await moderation.set_status(
+            db,
+            document_ids=bulk_request.document_ids,
+            operation=bulk_request.operation,
+            moderator_id=current_user.user_id,
+            reason=bulk_request.reason,
+        )
+    return BulkOperationResponse(
+        operation=bulk_request.operation,
+        requested=len(outcome.results),
+        succeeded=outcome.succeeded,
+        results=[
+            BulkOperationItem(document_id=document_id, outcome=result)
+            for document_id, result in outcome.results.items()
+        ],
+        job=BulkJob.model_validate(job) if job is not None else None,
+    )
+
+@router.get("/bulk/{job_id}", response_model=BulkJob)
+async def get_bulk_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role(["admin"])),
+):
+    """
+    Tiến độ của một thao tác xóa hàng loạt.
+    """
+    job = await moderation.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job
+
+@router.get("/{document_id}", response_model=Document)
+async def get_document(
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Lấy chi tiết một tài liệu.
+
+    Lượt xem được ghi vào buffer và cộng dồn vào `view_count` ở lần flush kế tiếp.
+    """
+    document = await document_crud.get_with_details(db, document_id, loaders=loaders)
+    # Tài liệu chưa duyệt: 404 như download/rating, và không đếm lượt xem
+    if document is None or not _can_access(document, current_user):
+        raise HTTPException(status_code=404, detail="Document not found")
+    await record_document_view(
+        document.document_id, current_user.user_id if current_user else None
+    )
+    return document
+
+
+@router.api_route("/{document_id}/download", methods=["GET", "HEAD"], response_class=Response)
+async def download_document(
+    document_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    """
+    Tải file của tài liệu.
+
+    Hỗ trợ `Range` (trả 206) để tải tiếp, và `If-None-Match`/`If-Modified-Since`
+    (trả 304). File được gửi theo từng khối, không nạp toàn bộ vào bộ nhớ.
+    Lượt tải chỉ được đếm cho request lấy từ đầu file.
+    """
+    document = await document_crud.get(db, document_id)
+    if document is None or not _can_access(document, current_user):
+        raise HTTPException(status_code=404, detail="Document not found")
+    path = storage.resolve_path(document.file_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = storage.media_type_for(document.file_type, document.file_path)
+    filename = storage.download_filename(document.title, document.file_type)
+    user_id = current_user.user_id if current_user else None
+
+    if settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+        if request.method == "GET":
+            await record_document_download(document.document_id, user_id)
+        return accel_redirect_response(
+            settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + document.file_path.lstrip("/"),
+            media_type=media_type,
+            filename=filename,
+        )
+
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not is_regular_file(stat_result):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    response = FileRangeResponse(
+        path,
+        stat_result,
+        request.headers,
+        media_type=media_type,
+        filename=filename,
+        method=request.method,
+        chunk_size=settings.DOWNLOAD_CHUNK_SIZE,
+    )
+    # Trình quản lý tải chia file thành nhiều range: chỉ đếm range bắt đầu từ byte 0
+    if request.method == "GET" and response.status_code in (200, 206) and response.range and response.range[0] == 0:
+        await record_document_download(document.document_id, user_id)
+    return response
+
+
+@router.put("/{document_id}/rating", response_model=Rating)
+async def rate_document(
+    document_id: int,
+    rating_in: RatingUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Chấm điểm (1-5) hoặc thích (0) một tài liệu; chấm lại sẽ thay điểm cũ
+    """
+    document = await document_crud.get(db, document_id)
+    if document is None or not _can_access(document, current_user):
+        raise HTTPException(status_code=404, detail="Document not found")
+    rating = await ratings.rate_document(
+        db, document_id=document_id, user_id=current_user.user_id, score=rating_in.score
+    )
+    await loaders.users.attach([rating], "user_id", "user")
+    return rating
+
+
+@router.delete("/{document_id}/rating", status_code=204, response_class=Response)
+async def remove_rating(
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bỏ điểm/lượt thích của người dùng hiện tại
+    """
+    document = await document_crud.get(db, document_id)
+    if document is None or not _can_access(document, current_user):
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not await ratings.remove_rating(db, document_id=document_id, user_id=current_user.user_id):
+        raise HTTPException(status_code=404, detail="Rating not found")
+    return Response(status_code=204)
+
+
+@router.get("/{document_id}/ratings/summary", response_model=RatingSummary)
+async def get_rating_summary(
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    """
+    Điểm trung bình, số lượt chấm và phân bố điểm 0-5 của tài liệu
+    """
+    document = await document_crud.get(db, document_id)
+    if document is None or not _can_access(document, current_user):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return await ratings.get_summary(db, document_id)
+
+
+def _can_access(document, current_user: Optional[User]) -> bool:
+    """Chưa duyệt: chỉ người tải lên và admin xem được"""
+    if document.status == "approved":
+        return True
+    return current_user is not None and (
+        current_user.user_id == document.user_id or current_user.role == "admin"
+    )
@@ -0,0 +1,70 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.responses import ResponseSerializer
+from app.dependencies.loaders import get_loaders
+from app.models.base import get_db
+from app.schemas.forum import Forum, ForumPostListResponse, ForumThread
+from app.services import forums
+from app.services.loaders import Loaders
+from app.utils.pagination import InvalidCursorError
+
+router = APIRouter()
+
+forum_list_serializer = ResponseSerializer(List[Forum])
+post_list_serializer = ResponseSerializer(ForumPostListResponse)
+thread_serializer = ResponseSerializer(ForumThread)
+
+@router.get("/", response_model=List[Forum])
+async def list_forums(
+    db: AsyncSession = Depends(get_db),
+    subject_id: Optional[int] = None,
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Lấy danh sách diễn đàn (mỗi môn học một diễn đàn) kèm số bài viết đã duyệt.
+    """
+    return forum_list_serializer.response(await forums.list_forums(db, subject_id=subject_id, loaders=loaders))
+
+@router.get("/{forum_id}/posts", response_model=ForumPostListResponse)
+async def list_posts(
+    forum_id: int,
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    per_page: int = Query(20, ge=1, le=100),
+    replies: int = Query(3, ge=0, le=20),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Lấy các bài viết mới nhất của diễn đàn, mỗi bài kèm số trả lời và `replies` trả lời đầu tiên.
+
+    Dùng `next_cursor` của trang trước làm `cursor` để lấy trang tiếp theo.
+    """
+    try:
+        result = await forums.list_posts(
+            db, forum_id, cursor=cursor, per_page=per_page, replies_per_post=replies, loaders=loaders
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Forum not found")
+    return post_list_serializer.response(result)
+
+@router.get("/posts/{post_id}", response_model=ForumThread)
+async def get_thread(
+    post_id: int,
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    per_page: int = Query(20, ge=1, le=100),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """
+    Lấy một bài viết và các trả lời của nó (cũ nhất trước), phân trang theo keyset.
+    """
+    try:
+        thread = await forums.get_thread(db, post_id, cursor=cursor, per_page=per_page, loaders=loaders)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if thread is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return thread_serializer.response(thread)
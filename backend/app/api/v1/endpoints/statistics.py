@@ -0,0 +1,35 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.base import get_db
+from app.schemas.util import DepartmentStatistics, StatisticsResponse, SubjectStatistics
+from app.services import statistics
+
+router = APIRouter()
+
+@router.get("/", response_model=StatisticsResponse)
+async def get_statistics(db: AsyncSession = Depends(get_db)):
+    """
+    Tổng số tài liệu (đã duyệt), người dùng, lượt tải và lượt xem.
+
+    Lượt xem/tải cập nhật sau mỗi lần flush buffer; số tài liệu và người dùng
+    cập nhật mỗi `STATS_ROLLUP_INTERVAL` giây (thời điểm trong `updated_at`).
+    """
+    return await statistics.get_overview(db)
+
+@router.get("/subjects", response_model=List[SubjectStatistics])
+async def get_subject_statistics(
+    db: AsyncSession = Depends(get_db),
+    department_id: Optional[int] = None,
+):
+    """
+    Thống kê theo môn học, có thể lọc theo khoa
+    """
+    return await statistics.get_subject_statistics(db, department_id=department_id)
+
+@router.get("/departments", response_model=List[DepartmentStatistics])
+async def get_department_statistics(db: AsyncSession = Depends(get_db)):
+    """
+    Thống kê theo khoa (tổng của các môn học thuộc khoa)
+    """
+    return await statistics.get_department_statistics(db)
@@ -0,0 +1,441 @@
+# app/background/queue.py
+"""
+Durable task queue for side effects that must not run inside a request.
+
+Endpoints call ``await enqueue("name", key=value, ...)``: one INSERT, then
+the response goes out. ``TaskConsumer`` (started with the app in every
+worker process) claims due tasks and runs their registered handlers with
+at most ``TASK_CONCURRENCY`` in flight.
+
+Brokers:
+
+* ``DatabaseBroker`` stores tasks in ``background_tasks``. On Postgres,
+  claims use ``FOR UPDATE SKIP LOCKED`` so consumers in several processes
+  never take the same task and never wait for each other.
+  A claimed task is leased for ``TASK_LEASE_SECONDS`` and the consumer
+  extends the lease every third of that while the handler runs, so only a
+  task whose worker died becomes claimable again. Such a task counts as an
+  attempt: once it has used ``max_attempts`` it is marked failed instead of
+  being leased again.
+* ``InMemoryBroker`` keeps the same semantics in process memory, for tests
+  and single-process development.
+
+Failed tasks are retried with exponential backoff and jitter until
+``max_attempts``, then kept with ``status = 'failed'``. A ``dedup_key``
+is unique among queued/running tasks: enqueueing a duplicate is a no-op.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.models.background_task import BackgroundTask
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FAILED = "failed"
+
+TaskHandler = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class TaskDefinition:
+    name: str
+    handler: TaskHandler
+    max_attempts: int
+
+
+@dataclass
+class QueuedTask:
+    task_id: Any
+    name: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    dedup_key: Optional[str] = None
+    run_at: datetime = field(default_factory=utcnow)
+
+
+_registry: Dict[str, TaskDefinition] = {}
+
+
+def task(name: Optional[str] = None, *, max_attempts: Optional[int] = None):
+    """
+    Register an async function as a task handler.
+
+        @task("notifications.fan_out")
+        async def fan_out(document_id: int): ...
+
+    The handler receives the enqueued payload as keyword arguments and must
+    be idempotent: a task can run again after a retry or an expired lease.
+    """
+    def decorator(func: TaskHandler) -> TaskHandler:
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = TaskDefinition(
+            task_name, func, max_attempts or settings.TASK_MAX_ATTEMPTS
+        )
+        func.task_name = task_name
+        return func
+    return decorator
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped, scaled by 0.5-1.0"""
+    delay = min(settings.TASK_RETRY_BACKOFF_MAX, settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1))
+    return delay * (0.5 + random.random() / 2)
+
+
+class InMemoryBroker:
+    """
+    Process-local broker with the ``DatabaseBroker`` surface. Tasks are lost on restart.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Any] = []
+        self._counter = itertools.count(1)
+        self._active_keys: Set[str] = set()
+        self._leased: Dict[Any, QueuedTask] = {}
+        self.failed: List[QueuedTask] = []
+
+    async def enqueue(self, task: QueuedTask) -> bool:
+        if task.dedup_key is not None:
+            if task.dedup_key in self._active_keys:
+                return False
+            self._active_keys.add(task.dedup_key)
+        task.task_id = next(self._counter)
+        heapq.heappush(self._heap, (task.run_at, task.task_id, task))
+        return True
+
+    async def claim(self, limit: int, lease_seconds: float) -> List[QueuedTask]:
+        now = utcnow()
+        claimed = []
+        while self._heap and len(claimed) < limit and self._heap[0][0] <= now:
+            _, _, task = heapq.heappop(self._heap)
+            task.attempts += 1
+            self._leased[task.task_id] = task
+            claimed.append(task)
+        return claimed
+
+    async def complete(self, task: QueuedTask) -> None:
+        self._leased.pop(task.task_id, None)
+        self._active_keys.discard(task.dedup_key)
+
+    async def retry(self, task: QueuedTask, run_at: datetime, error: str) -> None:
+        self._leased.pop(task.task_id, None)
+        task.run_at = run_at
+        heapq.heappush(self._heap, (task.run_at, task.task_id, task))
+
+    async def fail(self, task: QueuedTask, error: str) -> None:
+        await self.complete(task)
+        self.failed.append(task)
+
+    async def extend(self, tasks: List[QueuedTask], lease_seconds: float) -> None:
+        # Trong một process lease không bao giờ hết hạn
+        pass
+
+    def pending(self) -> int:
+        return len(self._heap) + len(self._leased)
+
+
+class DatabaseBroker:
+    """
+    Broker on the ``background_tasks`` table (``SKIP LOCKED`` claims on Postgres).
+    """
+
+    def __init__(self, session_factory: async_sessionmaker) -> None:
+        self.session_factory = session_factory
+
+    async def enqueue(self, task: QueuedTask) -> bool:
+        values = {
+            "name": task.name,
+            "payload": task.payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": task.max_attempts,
+            "dedup_key": task.dedup_key,
+            "run_at": task.run_at,
+            "created_at": utcnow(),
+        }
+        async with self.session_factory() as db:
+            dialect = db.get_bind().dialect.name
+            if task.dedup_key is not None and dialect in ("postgresql", "sqlite"):
+                if dialect == "postgresql":
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                stmt = dialect_insert(BackgroundTask).values(**values).on_conflict_do_nothing(
+                    index_elements=[BackgroundTask.dedup_key],
+                    index_where=BackgroundTask.status.in_([QUEUED, RUNNING]),
+                )
+            else:
+                stmt = insert(BackgroundTask).values(**values)
+            result = await db.execute(stmt.returning(BackgroundTask.task_id))
+            task_id = result.scalar_one_or_none()
+            await db.commit()
+        task.task_id = task_id
+        return task_id is not None
+
+    async def claim(self, limit: int, lease_seconds: float) -> List[QueuedTask]:
+        now = utcnow()
+        expired = (BackgroundTask.status == RUNNING) & (BackgroundTask.locked_until < now)
+        async with self.session_factory() as db:
+            # Lease hết hạn ở lần thử cuối: worker chết mỗi lần, không nhận lại mãi
+            exhausted = await db.execute(
+                update(BackgroundTask)
+                .where(expired, BackgroundTask.attempts >= BackgroundTask.max_attempts)
+                .values(status=FAILED, locked_until=None, last_error="Lease expired on the last attempt")
+                .returning(BackgroundTask.task_id, BackgroundTask.name),
+                execution_options={"synchronize_session": False},
+            )
+            for task_id, name in exhausted.all():
+                logger.error(f"Task {name}#{task_id} failed permanently: lease expired on the last attempt")
+            due = (
+                select(BackgroundTask.task_id)
+                .where(
+                    or_(
+                        (BackgroundTask.status == QUEUED) & (BackgroundTask.run_at <= now),
+                        # Lease hết hạn: worker giữ task đã chết
+                        expired & (BackgroundTask.attempts < BackgroundTask.max_attempts),
+                    )
+                )
+                .order_by(BackgroundTask.run_at)
+                .limit(limit)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                due = due.with_for_update(skip_locked=True)
+            result = await db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.task_id.in_(due.scalar_subquery()))
+                .values(
+                    status=RUNNING,
+                    attempts=BackgroundTask.attempts + 1,
+                    locked_until=now + timedelta(seconds=lease_seconds),
+                )
+                .returning(
+                    BackgroundTask.task_id,
+                    BackgroundTask.name,
+                    BackgroundTask.payload,
+                    BackgroundTask.attempts,
+                    BackgroundTask.max_attempts,
+                    BackgroundTask.dedup_key,
+                    BackgroundTask.run_at,
+                ),
+                execution_options={"synchronize_session": False},
+            )
+            rows = result.all()
+            await db.commit()
+        return [QueuedTask(**row._mapping) for row in rows]
+
+    async def complete(self, task: QueuedTask) -> None:
+        async with self.session_factory() as db:
+            await db.execute(delete(BackgroundTask).where(BackgroundTask.task_id == task.task_id))
+            await db.commit()
+
+    async def retry(self, task: QueuedTask, run_at: datetime, error: str) -> None:
+        await self._set_status(task, status=QUEUED, run_at=run_at, locked_until=None, last_error=error)
+
+    async def fail(self, task: QueuedTask, error: str) -> None:
+        # Giữ lại để kiểm tra; dedup_key được giải phóng vì status không còn queued/running
+        await self._set_status(task, status=FAILED, locked_until=None, last_error=error)
+
+    async def extend(self, tasks: List[QueuedTask], lease_seconds: float) -> None:
+        """Push back the lease of tasks still running here (skipped if another consumer took one over)"""
+        table = BackgroundTask.__table__
+        async with self.session_factory() as db:
+            await db.execute(
+                update(table)
+                .where(
+                    table.c.task_id == bindparam("b_task_id"),
+                    table.c.attempts == bindparam("b_attempts"),
+                    table.c.status == RUNNING,
+                )
+                .values(locked_until=utcnow() + timedelta(seconds=lease_seconds)),
+                [{"b_task_id": task.task_id, "b_attempts": task.attempts} for task in tasks],
+            )
+            await db.commit()
+
+    async def _set_status(self, task: QueuedTask, **values: Any) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(BackgroundTask).where(BackgroundTask.task_id == task.task_id).values(**values),
+                execution_options={"synchronize_session": False},
+            )
+            await db.commit()
+
+
+class TaskConsumer:
+    """
+    Claims due tasks and runs them with at most ``concurrency`` handlers in
+    flight, extending the leases of running handlers every ``lease_seconds / 3``.
+    """
+
+    def __init__(
+        self,
+        broker: Any,
+        *,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 300.0,
+    ) -> None:
+        self.broker = broker
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._running: Dict[asyncio.Task, QueuedTask] = {}
+        self._wakeup = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the consumer now instead of at the next poll (task enqueued in this process)"""
+        self._wakeup.set()
+
+    async def _execute(self, queued: QueuedTask) -> None:
+        definition = _registry.get(queued.name)
+        try:
+            if definition is None:
+                raise LookupError(f"No handler registered for task {queued.name}")
+            await definition.handler(**queued.payload)
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            if queued.attempts >= queued.max_attempts:
+                logger.error(f"Task {queued.name}#{queued.task_id} failed permanently: {error}")
+                await self.broker.fail(queued, error)
+            else:
+                delay = retry_delay(queued.attempts)
+                logger.warning(
+                    f"Task {queued.name}#{queued.task_id} failed (attempt {queued.attempts}), "
+                    f"retrying in {delay:.1f}s: {error}"
+                )
+                await self.broker.retry(queued, utcnow() + timedelta(seconds=delay), error)
+        else:
+            await self.broker.complete(queued)
+
+    async def run_once(self) -> int:
+        """Claim and start as many due tasks as there are free slots; returns how many"""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        claimed = await self.broker.claim(free, self.lease_seconds)
+        for queued in claimed:
+            running = asyncio.create_task(self._execute(queued), name=f"task:{queued.name}")
+            self._running[running] = queued
+            running.add_done_callback(self._on_done)
+        return len(claimed)
+
+    def _on_done(self, running: asyncio.Task) -> None:
+        self._running.pop(running, None)
+        # Có slot trống: thử lấy task tiếp theo ngay
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Claiming background tasks failed")
+                claimed = 0
+            if claimed and len(self._running) < self.concurrency:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self._running:
+                continue
+            try:
+                await self.broker.extend(list(self._running.values()), self.lease_seconds)
+            except Exception:
+                logger.exception("Extending background task leases failed")
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop(), name="task-consumer")
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="task-consumer-heartbeat")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming and give running handlers ``timeout`` seconds to finish"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self._running:
+            # Task chưa xong sẽ được worker khác nhận lại khi lease hết hạn
+            await asyncio.wait(set(self._running), timeout=timeout)
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+    async def drain(self) -> None:
+        """Run until no due task is left (tests)"""
+        while await self.run_once() or self._running:
+            if self._running:
+                await asyncio.wait(set(self._running), return_when=asyncio.FIRST_COMPLETED)
+
+
+def create_broker(backend: str = None) -> Any:
+    backend = backend or settings.TASK_BROKER
+    if backend == "memory":
+        return InMemoryBroker()
+    from app.db.session import AsyncSessionLocal
+
+    return DatabaseBroker(AsyncSessionLocal)
+
+
+broker = create_broker()
+consumer = TaskConsumer(
+    broker,
+    concurrency=settings.TASK_CONCURRENCY,
+    poll_interval=settings.TASK_POLL_INTERVAL,
+    lease_seconds=settings.TASK_LEASE_SECONDS,
+)
+
+
+async def enqueue(
+    name: Any,
+    *,
+    dedup_key: Optional[str] = None,
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+    **payload: Any,
+) -> bool:
+    """
+    Queue a task for the consumer; returns False when ``dedup_key`` is already pending.
+
+    ``name`` is a registered task name or a function decorated with ``@task``.
+    The payload must be JSON-serializable.
+    """
+    task_name = getattr(name, "task_name", name)
+    definition = _registry.get(task_name)
+    queued = QueuedTask(
+        task_id=None,
+        name=task_name,
+        payload=payload,
+        attempts=0,
+        max_attempts=max_attempts or (definition.max_attempts if definition else settings.TASK_MAX_ATTEMPTS),
+        dedup_key=dedup_key,
+        run_at=utcnow() + timedelta(seconds=delay),
+    )
+    accepted = await broker.enqueue(queued)
+    if accepted and delay <= 0:
+        consumer.notify()
+    return accepted
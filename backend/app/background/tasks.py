@@ -0,0 +1,337 @@
+# app/background/tasks.py
+"""
+Write-behind aggregation of document view/download events.
+
+Requests only record an event in ``document_events`` (process memory, or a
+Redis hash/list shared by every worker); nothing touches the ``documents``
+row on the request path. ``flush_document_events`` then applies everything
+buffered since the last flush in one transaction:
+
+* one ``UPDATE documents ... FROM (VALUES ...)`` adding the summed view and
+  download counts of every touched document,
+* one multi-row ``INSERT`` into ``document_history``, skipping events of
+  documents or users deleted since they were buffered,
+* one upsert adding the totals to ``stat_counters`` (``app/services/statistics.py``).
+
+A batch whose flush fails is kept apart and retried on its own, so fresh
+events never share the fate of a batch that keeps failing.
+
+The worker calls it every ``EVENT_FLUSH_INTERVAL`` seconds, earlier once
+``EVENT_BUFFER_MAX_EVENTS`` events are pending, and once more on shutdown,
+so a crash loses at most one interval of counts.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, bindparam, column, insert, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.document import Document
+from app.models.document_history import DocumentHistory
+from app.models.user import User
+from app.services import statistics
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+VIEW = "view"
+DOWNLOAD = "download"
+ACTIONS = (VIEW, DOWNLOAD)
+
+# Giới hạn số tham số bind mỗi câu lệnh (Postgres tối đa 32767)
+HISTORY_CHUNK_SIZE = 1000
+COUNTER_CHUNK_SIZE = 5000
+MAX_FLUSH_ATTEMPTS = 3
+
+
+@dataclass
+class EventBatch:
+    """Events drained from a buffer: summed counters plus the history rows"""
+
+    counts: Dict[Tuple[int, str], int] = field(default_factory=Counter)
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    attempts: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.counts or self.history)
+
+    @property
+    def size(self) -> int:
+        return sum(self.counts.values())
+
+    def counter_rows(self) -> List[Dict[str, int]]:
+        documents: Dict[int, Dict[str, int]] = {}
+        for (document_id, action), count in self.counts.items():
+            row = documents.setdefault(document_id, {"document_id": document_id, "views": 0, "downloads": 0})
+            row["views" if action == VIEW else "downloads"] += count
+        return sorted(documents.values(), key=lambda row: row["document_id"])
+
+
+class InMemoryEventBuffer:
+    """
+    Per-process buffer. Recording is a dict increment on the event loop, so no lock is needed.
+    """
+
+    def __init__(self) -> None:
+        self._batch = EventBatch()
+        # Batch flush lỗi: thử lại riêng từng batch, không gộp với sự kiện mới
+        self._failed: List[EventBatch] = []
+
+    @property
+    def pending(self) -> int:
+        return self._batch.size
+
+    async def record(self, document_id: int, action: str, user_id: Optional[int] = None) -> None:
+        self._batch.counts[(document_id, action)] += 1
+        if user_id is not None:
+            # document_history.user_id NOT NULL: lượt xem ẩn danh chỉ được đếm
+            self._batch.history.append({
+                "document_id": document_id,
+                "user_id": user_id,
+                "action": action,
+                "created_at": utcnow(),
+            })
+
+    async def drain(self) -> EventBatch:
+        batch, self._batch = self._batch, EventBatch()
+        return batch
+
+    def take_failed(self) -> List[EventBatch]:
+        """Batches put back by ``restore``, to be retried one by one"""
+        failed, self._failed = self._failed, []
+        return failed
+
+    async def restore(self, batch: EventBatch) -> None:
+        """Keep a batch whose flush failed so the next flush retries it on its own"""
+        batch.attempts += 1
+        if batch.attempts >= MAX_FLUSH_ATTEMPTS:
+            logger.error(
+                f"Dropping {batch.size} document events after {batch.attempts} failed flushes"
+            )
+            return
+        self._failed.append(batch)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisEventBuffer(InMemoryEventBuffer):
+    """
+    Buffer shared by all workers: counters in a Redis hash, history in a Redis list.
+
+    Whichever worker flushes first takes everything in one MULTI/EXEC. A
+    shared event count (INCR on every record) makes ``pending``, and so
+    ``EVENT_BUFFER_MAX_EVENTS``, cover the events of all workers. If Redis
+    is unreachable, events are kept in the local buffer instead.
+    """
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str] = None, prefix: str = "events"):
+        from redis import asyncio as aioredis
+
+        super().__init__()
+        self._client = aioredis.Redis(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            decode_responses=True,
+        )
+        self._counts_key = f"{prefix}:document_events:counts"
+        self._history_key = f"{prefix}:document_events:history"
+        # Tổng số sự kiện đang chờ trong Redis (mọi worker), đọc từ INCR khi ghi
+        self._size_key = f"{prefix}:document_events:size"
+        self._shared_pending = 0
+        self._warned_at = 0.0
+
+    @property
+    def pending(self) -> int:
+        return super().pending + self._shared_pending
+
+    def _warn(self, message: str) -> None:
+        now = time.monotonic()
+        if now - self._warned_at > 30:
+            self._warned_at = now
+            logger.warning(message)
+
+    async def record(self, document_id: int, action: str, user_id: Optional[int] = None) -> None:
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.incr(self._size_key)
+                pipe.hincrby(self._counts_key, f"{document_id}:{action}", 1)
+                if user_id is not None:
+                    pipe.rpush(self._history_key, json.dumps({
+                        "document_id": document_id,
+                        "user_id": user_id,
+                        "action": action,
+                        "created_at": utcnow().isoformat(),
+                    }))
+                self._shared_pending, *_ = await pipe.execute()
+        except Exception as e:
+            self._warn(f"Redis event buffer unavailable, buffering locally: {e}")
+            await super().record(document_id, action, user_id)
+
+    async def drain(self) -> EventBatch:
+        batch = await super().drain()
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.hgetall(self._counts_key)
+                pipe.lrange(self._history_key, 0, -1)
+                pipe.delete(self._counts_key, self._history_key, self._size_key)
+                counts, history, _ = await pipe.execute()
+        except Exception as e:
+            self._warn(f"Could not drain Redis event buffer: {e}")
+            return batch
+        self._shared_pending = 0
+        for key, count in counts.items():
+            document_id, action = key.split(":", 1)
+            batch.counts[(int(document_id), action)] += int(count)
+        for raw in history:
+            event = json.loads(raw)
+            event["created_at"] = datetime.fromisoformat(event["created_at"])
+            batch.history.append(event)
+        return batch
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def create_event_buffer(backend: str = None) -> InMemoryEventBuffer:
+    backend = backend or settings.EVENT_BUFFER_BACKEND
+    if backend == "redis":
+        try:
+            return RedisEventBuffer(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=settings.REDIS_PASSWORD,
+                prefix=settings.CACHE_KEY_PREFIX,
+            )
+        except ImportError:
+            logger.warning("redis package is not installed, using in-memory event buffer")
+    return InMemoryEventBuffer()
+
+
+document_events = create_event_buffer()
+# Worker chờ trên event này để flush sớm khi buffer đầy
+flush_requested = asyncio.Event()
+
+
+async def _record(document_id: int, action: str, user_id: Optional[int]) -> None:
+    await document_events.record(document_id, action, user_id)
+    if document_events.pending >= settings.EVENT_BUFFER_MAX_EVENTS:
+        flush_requested.set()
+
+
+async def record_document_view(document_id: int, user_id: Optional[int] = None) -> None:
+    await _record(document_id, VIEW, user_id)
+
+
+async def record_document_download(document_id: int, user_id: Optional[int] = None) -> None:
+    await _record(document_id, DOWNLOAD, user_id)
+
+
+async def apply_event_batch(db: AsyncSession, batch: EventBatch) -> None:
+    """Apply a drained batch: counter UPDATE and history INSERT (per chunk), then the site counters"""
+    rows = batch.counter_rows()
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for start in range(0, len(rows), COUNTER_CHUNK_SIZE):
+        chunk = rows[start:start + COUNTER_CHUNK_SIZE]
+        if postgres:
+            deltas = values(
+                column("document_id", Integer),
+                column("views", Integer),
+                column("downloads", Integer),
+                name="deltas",
+            ).data([(row["document_id"], row["views"], row["downloads"]) for row in chunk])
+            await db.execute(
+                update(Document)
+                .where(Document.document_id == deltas.c.document_id)
+                .values(
+                    view_count=Document.view_count + deltas.c.views,
+                    download_count=Document.download_count + deltas.c.downloads,
+                    # Lượt xem/tải không phải là sửa tài liệu: giữ nguyên updated_at (bỏ qua onupdate)
+                    updated_at=Document.updated_at,
+                ),
+                execution_options={"synchronize_session": False},
+            )
+        else:
+            # SQLite không hỗ trợ "(VALUES ...) AS t(cols)": một câu executemany
+            await db.execute(
+                update(Document.__table__)
+                .where(Document.__table__.c.document_id == bindparam("b_document_id"))
+                .values(
+                    view_count=Document.__table__.c.view_count + bindparam("b_views"),
+                    download_count=Document.__table__.c.download_count + bindparam("b_downloads"),
+                    updated_at=Document.__table__.c.updated_at,
+                ),
+                [
+                    {"b_document_id": row["document_id"], "b_views": row["views"], "b_downloads": row["downloads"]}
+                    for row in chunk
+                ],
+            )
+    await statistics.add_events(db, rows)
+    history = await _live_history(db, batch.history)
+    for start in range(0, len(history), HISTORY_CHUNK_SIZE):
+        await db.execute(
+            insert(DocumentHistory).values(history[start:start + HISTORY_CHUNK_SIZE])
+        )
+
+
+async def _existing_ids(db: AsyncSession, id_column, ids: List[int]) -> set:
+    found = set()
+    for start in range(0, len(ids), HISTORY_CHUNK_SIZE):
+        # FOR KEY SHARE (Postgres): dòng không thể bị xóa trước khi transaction commit
+        result = await db.execute(
+            select(id_column).where(id_column.in_(ids[start:start + HISTORY_CHUNK_SIZE]))
+            .with_for_update(key_share=True, read=True)
+        )
+        found.update(result.scalars())
+    return found
+
+
+async def _live_history(db: AsyncSession, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    History rows whose document and user still exist: an event buffered
+    before its document was deleted must not fail the whole batch on the FK.
+    """
+    if not history:
+        return history
+    documents = await _existing_ids(db, Document.document_id, sorted({row["document_id"] for row in history}))
+    users = await _existing_ids(db, User.user_id, sorted({row["user_id"] for row in history}))
+    live = [row for row in history if row["document_id"] in documents and row["user_id"] in users]
+    if len(live) < len(history):
+        logger.info(f"Skipped {len(history) - len(live)} history events of deleted documents or users")
+    return live
+
+
+async def flush_document_events(session_factory: async_sessionmaker) -> int:
+    """
+    Drain the buffer and persist it; returns the number of events applied.
+
+    Each batch is applied in its own transaction. A failed one (e.g. a
+    deadlock with another worker's flush) is kept and retried on the next
+    runs, at most ``MAX_FLUSH_ATTEMPTS`` times counted for that batch alone.
+    """
+    applied = 0
+    for batch in [*document_events.take_failed(), await document_events.drain()]:
+        if not batch:
+            continue
+        try:
+            async with session_factory() as db:
+                await apply_event_batch(db, batch)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Flushing document events failed (attempt {batch.attempts + 1}): {e}")
+            await document_events.restore(batch)
+            continue
+        applied += batch.size
+    return applied
@@ -0,0 +1,114 @@
+# app/background/worker.py
+"""
+In-process background worker started with the application.
+
+Each job is an async callable run every ``interval`` seconds. ``stop()``
+cancels the loops and runs the jobs marked ``run_on_shutdown`` one last
+time, so buffered writes are flushed on a graceful shutdown. Maintenance
+jobs (rollups, repairs, partitions) are not: they only catch up on the next
+start, and must not eat into the shutdown grace period.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from app.background.tasks import flush_document_events, flush_requested
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.history import maintain_history
+from app.services.ratings import repair_rating_stats_job
+from app.services.statistics import rollup_statistics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    func: Callable[[], Awaitable[object]]
+    interval: float
+    # Đánh thức job sớm hơn chu kỳ (ví dụ khi buffer đầy)
+    wakeup: Optional[asyncio.Event] = None
+    # Chạy thêm một lần khi tắt (chỉ cho việc ngắn, như flush buffer)
+    run_on_shutdown: bool = False
+
+
+class BackgroundWorker:
+    def __init__(self) -> None:
+        self.jobs: List[PeriodicJob] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        wakeup: Optional[asyncio.Event] = None,
+        run_on_shutdown: bool = False,
+    ) -> None:
+        self.jobs.append(PeriodicJob(name, func, interval, wakeup, run_on_shutdown))
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def _run_once(self, job: PeriodicJob) -> None:
+        try:
+            await job.func()
+        except Exception:
+            logger.exception(f"Background job {job.name} failed")
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        while True:
+            if job.wakeup is not None:
+                try:
+                    await asyncio.wait_for(job.wakeup.wait(), timeout=job.interval)
+                except asyncio.TimeoutError:
+                    pass
+                job.wakeup.clear()
+            else:
+                await asyncio.sleep(job.interval)
+            await self._run_once(job)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        for job in self.jobs:
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"worker:{job.name}"))
+        logger.info(f"Background worker started: {', '.join(job.name for job in self.jobs)}")
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Lần chạy cuối: không để lại dữ liệu trong buffer khi tắt
+        for job in self.jobs:
+            if job.run_on_shutdown:
+                await self._run_once(job)
+
+
+worker = BackgroundWorker()
+worker.add_job(
+    "flush_document_events",
+    lambda: flush_document_events(AsyncSessionLocal),
+    interval=settings.EVENT_FLUSH_INTERVAL,
+    wakeup=flush_requested,
+    run_on_shutdown=True,
+)
+worker.add_job(
+    "rollup_statistics",
+    lambda: rollup_statistics(AsyncSessionLocal),
+    interval=settings.STATS_ROLLUP_INTERVAL,
+)
+worker.add_job(
+    "repair_rating_stats",
+    lambda: repair_rating_stats_job(AsyncSessionLocal),
+    interval=settings.RATING_REPAIR_INTERVAL,
+)
+worker.add_job(
+    "maintain_history",
+    lambda: maintain_history(AsyncSessionLocal),
+    interval=settings.HISTORY_MAINTENANCE_INTERVAL,
+)
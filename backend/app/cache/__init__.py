@@ -0,0 +1 @@
+from app.cache.redis import Cache, InMemoryBackend, LocalLRU, RedisBackend, cache
@@ -0,0 +1,310 @@
+# app/cache/redis.py
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def dumps(value: Any) -> str:
+    # orjson ghi datetime/date theo ISO 8601 như isoformat()
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def loads(raw: Any) -> Any:
+    return orjson.loads(raw)
+
+
+class LocalLRU:
+    """
+    In-process LRU with per-entry expiry, used as the first cache tier.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class InMemoryBackend:
+    """
+    Stand-in for Redis with the same async surface, used when Redis is absent and in tests.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+
+    def _alive(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._alive(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+
+    async def add(self, key: str, value: str) -> bool:
+        """Set ``key`` only if it does not exist yet"""
+        if self._alive(key) is not None:
+            return False
+        self._data[key] = (None, value)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._alive(key) or 0) + 1
+        self._data[key] = (None, str(value))
+        return value
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisBackend:
+    """
+    Redis tier built on the ``REDIS_*`` settings.
+
+    Connection errors are logged and treated as cache misses so an unavailable
+    Redis degrades to the local tier instead of failing requests.
+    """
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str] = None):
+        from redis import asyncio as aioredis
+
+        self._client = aioredis.Redis(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            decode_responses=True,
+        )
+        self._warned_at = 0.0
+
+    def _warn(self, exc: Exception) -> None:
+        # Tránh spam log khi Redis down: tối đa một cảnh báo mỗi 30 giây
+        now = time.monotonic()
+        if now - self._warned_at > 30:
+            self._warned_at = now
+            logger.warning(f"Redis cache unavailable, falling back to local tier: {exc}")
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self._client.get(key)
+        except Exception as e:
+            self._warn(e)
+            return None
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        try:
+            await self._client.set(key, value, ex=ttl or None)
+        except Exception as e:
+            self._warn(e)
+
+    async def add(self, key: str, value: str) -> bool:
+        try:
+            return bool(await self._client.set(key, value, nx=True))
+        except Exception as e:
+            self._warn(e)
+            return False
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self._client.delete(*keys)
+        except Exception as e:
+            self._warn(e)
+
+    async def incr(self, key: str) -> Optional[int]:
+        try:
+            return await self._client.incr(key)
+        except Exception as e:
+            self._warn(e)
+            return None
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+class Cache:
+    """
+    Two-tier read-through cache: in-process LRU in front of Redis (or its stand-in).
+
+    Keys are namespaced per entity (``departments``, ``users``...) and carry a
+    namespace version, so ``invalidate(namespace)`` drops every key of an
+    entity with a single INCR. Other worker processes only keep serving their
+    local copies for ``CACHE_LOCAL_TTL`` seconds after an invalidation.
+
+    The namespace version doubles as the entity's table version for HTTP
+    validators (``app/dependencies/http_cache.py``). A missing version key is
+    seeded from the clock, so a flushed Redis never hands out a version that
+    was already used.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        prefix: str = "cache",
+        default_ttl: int = 300,
+        ttls: Optional[Dict[str, int]] = None,
+        local_maxsize: int = 1024,
+        local_ttl: float = 5.0,
+    ):
+        self.backend = backend
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.local = LocalLRU(local_maxsize)
+        self.local_ttl = local_ttl
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}:version"
+
+    async def _version(self, namespace: str) -> str:
+        local_key = f"{namespace}:@version"
+        version = self.local.get(local_key)
+        if version is _MISSING:
+            version = await self.backend.get(self._version_key(namespace))
+            if version is None:
+                seed = str(time.time_ns() // 1_000_000)
+                await self.backend.add(self._version_key(namespace), seed)
+                version = await self.backend.get(self._version_key(namespace)) or seed
+            self.local.set(local_key, version, self.local_ttl)
+        return version
+
+    async def version(self, namespace: str) -> str:
+        """Current version of a namespace, changed by every ``invalidate``"""
+        return await self._version(namespace)
+
+    async def _get(self, namespace: str, key: str, version: str) -> Any:
+        local_key = f"{namespace}:v{version}:{key}"
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            return value
+        raw = await self.backend.get(f"{self.prefix}:{local_key}")
+        if raw is None:
+            return None
+        value = loads(raw)
+        self.local.set(local_key, value, min(self.local_ttl, self.ttl_for(namespace)))
+        return value
+
+    async def _set(self, namespace: str, key: str, value: Any, ttl: Optional[int], version: str) -> None:
+        ttl = ttl or self.ttl_for(namespace)
+        local_key = f"{namespace}:v{version}:{key}"
+        await self.backend.set(f"{self.prefix}:{local_key}", dumps(value), ttl)
+        self.local.set(local_key, value, min(self.local_ttl, ttl))
+
+    async def get(self, namespace: str, key: str) -> Any:
+        """Return the cached value or ``None`` on a miss"""
+        return await self._get(namespace, key, await self._version(namespace))
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        await self._set(namespace, key, value, ttl, await self._version(namespace))
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Read-through: return the cached value or load, store and return it (``None`` is not cached)"""
+        # Giữ version đọc được trước khi load: nếu có invalidate xen giữa,
+        # giá trị cũ được ghi vào version cũ và không bao giờ được đọc lại
+        version = await self._version(namespace)
+        value = await self._get(namespace, key, version)
+        if value is not None:
+            return value
+        value = await loader()
+        if value is not None:
+            await self._set(namespace, key, value, ttl, version)
+        return value
+
+    async def delete(self, namespace: str, key: str) -> None:
+        version = await self._version(namespace)
+        local_key = f"{namespace}:v{version}:{key}"
+        self.local.delete(local_key)
+        await self.backend.delete(f"{self.prefix}:{local_key}")
+
+    async def invalidate(self, namespace: str) -> None:
+        """Drop every cached key of a namespace"""
+        self.local.delete_prefix(f"{namespace}:")
+        await self.backend.incr(self._version_key(namespace))
+
+    async def close(self) -> None:
+        self.local.clear()
+        await self.backend.close()
+
+
+def create_cache_backend(backend: str = None) -> Any:
+    backend = backend or settings.CACHE_BACKEND
+    if backend == "redis":
+        try:
+            return RedisBackend(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                password=settings.REDIS_PASSWORD,
+            )
+        except ImportError:
+            logger.warning("redis package is not installed, using in-memory cache backend")
+    return InMemoryBackend()
+
+
+cache = Cache(
+    create_cache_backend(),
+    prefix=settings.CACHE_KEY_PREFIX,
+    default_ttl=settings.CACHE_DEFAULT_TTL,
+    ttls=settings.CACHE_TTLS,
+    local_maxsize=settings.CACHE_LOCAL_MAXSIZE,
+    local_ttl=settings.CACHE_LOCAL_TTL,
+)
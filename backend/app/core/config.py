@@ -0,0 +1,186 @@
+# app/core/config.py
+import secrets
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import AnyHttpUrl, PostgresDsn, field_validator, model_validator
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    Application settings.
+    """
+    # Base
+    API_V1_STR: str = "/api/v1"
+    SECRET_KEY: str = secrets.token_urlsafe(32)
+    # 60 minutes * 24 hours * 8 days = 8 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    
+    # Project name and metadata
+    PROJECT_NAME: str = "FastAPI Base Project"
+    
+    # Server
+    SERVER_NAME: str = "fastapi"
+    SERVER_HOST: AnyHttpUrl = "http://localhost:8000"
+    
+    # CORS
+    BACKEND_CORS_ORIGINS: List[str] = ["http://localhost", "http://localhost:4200", "http://localhost:3000"]
+
+    @field_validator("BACKEND_CORS_ORIGINS")
+    def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",")]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+
+    # Database - PostgreSQL
+    POSTGRES_SERVER: str = "localhost"
+    POSTGRES_PORT: int = 5432
+    POSTGRES_USER: str = "postgres"
+    POSTGRES_PASSWORD: str = "postgres"
+    POSTGRES_DB: str = "app"
+    SQL_DATABASE_URL: Optional[str] = None
+    
+    # SQLite options
+    USE_SQLITE: bool = False
+    SQLITE_DB_FILE: str = "./app.db"
+    
+    # Computed DB URI
+    SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    
+    @model_validator(mode='after')
+    def assemble_db_connection(self) -> 'Settings':
+        if self.SQL_DATABASE_URL:
+            # Đảm bảo rằng nếu SQL_DATABASE_URL được cung cấp và chứa psycopg2, thay thế nó
+            if "psycopg2" in self.SQL_DATABASE_URL:
+                # Thay thế postgresql+psycopg2 bằng postgresql+asyncpg
+                self.SQLALCHEMY_DATABASE_URI = self.SQL_DATABASE_URL.replace("postgresql+psycopg2", "postgresql+asyncpg")
+            else:
+                self.SQLALCHEMY_DATABASE_URI = self.SQL_DATABASE_URL
+        elif self.USE_SQLITE:
+            self.SQLALCHEMY_DATABASE_URI = f"sqlite+aiosqlite:///{self.SQLITE_DB_FILE}"
+        else:
+            self.SQLALCHEMY_DATABASE_URI = f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        return self
+    
+    # Database connection settings
+    # Mỗi uvicorn worker giữ một pool: tổng connection = workers * (POOL_SIZE + MAX_OVERFLOW)
+    DB_ECHO_LOG: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Số connection mở sẵn khi worker khởi động (None = DB_POOL_SIZE, 0 = không mở trước)
+    DB_POOL_WARMUP: Optional[int] = None
+    
+    # Security
+    JWT_SECRET_KEY: str = secrets.token_urlsafe(32)
+    ALGORITHM: str = "HS256"
+
+    # Password hashing: hash cũ có cost khác BCRYPT_ROUNDS được hash lại khi đăng nhập
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 100
+    
+    # Admin user creation
+    FIRST_SUPERUSER_EMAIL: str = "admin@example.com"
+    FIRST_SUPERUSER_USERNAME: str = "admin"
+    FIRST_SUPERUSER_PASSWORD: str = "admin"
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    
+    # Email
+    SMTP_TLS: bool = True
+    SMTP_PORT: Optional[int] = 587
+    SMTP_HOST: Optional[str] = "smtp.gmail.com"
+    SMTP_USER: Optional[str] = ""
+    SMTP_PASSWORD: Optional[str] = ""
+    EMAILS_FROM_EMAIL: Optional[str] = ""
+    EMAILS_FROM_NAME: Optional[str] = ""
+
+    # Redis
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: Optional[str] = None
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+
+    # Cache: LRU trong process phía trước Redis ("redis") hoặc bản thay thế in-memory ("memory")
+    CACHE_BACKEND: str = "redis"
+    CACHE_KEY_PREFIX: str = "udulib"
+    CACHE_DEFAULT_TTL: int = 300
+    CACHE_TTLS: Dict[str, int] = {
+        "departments": 3600,
+        "majors": 3600,
+        "academic_years": 3600,
+        "subjects": 900,
+        "tags": 900,
+        # User đã xác thực: ngắn để thay đổi từ nguồn khác (SQL trực tiếp) cũng sớm có hiệu lực
+        "principals": 60,
+    }
+    CACHE_LOCAL_MAXSIZE: int = 2048
+    CACHE_LOCAL_TTL: float = 5.0
+
+    # Cache-Control của các response có ETag theo version bảng (danh mục).
+    # "no-cache" vẫn cho trình duyệt lưu nhưng luôn hỏi lại bằng If-None-Match
+    HTTP_CACHE_CONTROL_DEFAULT: str = "no-cache"
+    HTTP_CACHE_CONTROLS: Dict[str, str] = {
+        "departments": "public, max-age=60, stale-while-revalidate=300",
+        "majors": "public, max-age=60, stale-while-revalidate=300",
+        "academic_years": "public, max-age=60, stale-while-revalidate=300",
+        "subjects": "public, max-age=30, stale-while-revalidate=120",
+        "tags": "public, max-age=30, stale-while-revalidate=120",
+    }
+
+    # Lượt xem/tải được gom trong buffer ("memory" hoặc "redis") rồi ghi theo lô.
+    # EVENT_FLUSH_INTERVAL là khoảng dữ liệu tối đa có thể mất khi process chết đột ngột
+    EVENT_BUFFER_BACKEND: str = "memory"
+    EVENT_FLUSH_INTERVAL: float = 5.0
+    EVENT_BUFFER_MAX_EVENTS: int = 10000
+
+    # Hàng đợi task bền vững ("database": bảng background_tasks, "memory": chỉ cho test/dev).
+    # Lease được gia hạn mỗi TASK_LEASE_SECONDS/3 khi handler còn chạy; hết lease nghĩa là mất worker
+    TASK_BROKER: str = "database"
+    TASK_CONCURRENCY: int = 4
+    TASK_POLL_INTERVAL: float = 1.0
+    TASK_LEASE_SECONDS: float = 300.0
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_RETRY_BACKOFF: float = 2.0
+    TASK_RETRY_BACKOFF_MAX: float = 600.0
+
+    # Bảng stat_counters: lượt xem/tải được cộng khi flush buffer, số tài liệu/người dùng
+    # được tính lại mỗi STATS_ROLLUP_INTERVAL giây
+    STATS_ROLLUP_INTERVAL: float = 600.0
+    # Kiểm tra và sửa bảng document_rating_stats theo bảng ratings
+    RATING_REPAIR_INTERVAL: float = 3600.0
+
+    # document_history (Postgres: phân vùng theo tháng). Job bảo trì tạo trước
+    # HISTORY_PARTITIONS_AHEAD tháng, gộp các ngày đã qua vào document_history_daily
+    # và bỏ dữ liệu thô cũ hơn HISTORY_RETENTION_DAYS ngày (None = giữ mãi)
+    HISTORY_MAINTENANCE_INTERVAL: float = 3600.0
+    HISTORY_PARTITIONS_AHEAD: int = 3
+    HISTORY_RETENTION_DAYS: Optional[int] = 365
+
+    # Số tài liệu mỗi câu UPDATE/DELETE khi kiểm duyệt hàng loạt
+    MODERATION_CHUNK_SIZE: int = 1000
+
+    # File tài liệu: documents.file_path là đường dẫn tương đối trong UPLOAD_DIR.
+    # Đặt DOWNLOAD_ACCEL_REDIRECT_PREFIX (location "internal" của nginx trỏ tới
+    # UPLOAD_DIR) để nginx gửi file bằng sendfile thay cho worker
+    UPLOAD_DIR: str = "./uploads"
+    DOWNLOAD_CHUNK_SIZE: int = 256 * 1024
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+
+    model_config = {
+        "case_sensitive": True,
+        "env_file": ".env",
+        "extra": "ignore"  # Bỏ qua các biến môi trường không được định nghĩa
+    }
+
+
+settings = Settings()
\ No newline at end of file
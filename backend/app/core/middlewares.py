@@ -0,0 +1,279 @@
+# app/core/middlewares.py
+"""
+Request metrics in Prometheus text format.
+
+``MetricsMiddleware`` is a plain ASGI middleware (no ``BaseHTTPMiddleware``
+task/stream overhead). For every HTTP request it records, labelled by
+method, route template and status:
+
+* ``http_request_duration_seconds`` latency histogram,
+* ``http_response_size_bytes`` body size histogram,
+* ``http_request_db_queries`` / ``http_request_db_seconds`` histograms of
+  the SQL statements the request issued and the time spent in them,
+* ``http_requests_in_progress`` gauge.
+
+DB cost comes from ``before/after_cursor_execute`` events on the engine,
+attributed to the current request through a ``ContextVar``. Values are per
+worker process; Prometheus should scrape every worker.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Request không khớp route nào gom chung một nhãn để số time series không bùng nổ
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count mỗi bucket..., count +Inf], tổng
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+        lines = self.header()
+        inf = 'le="+Inf"'
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, inf)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+ROUTE_LABELS = ("method", "route", "status")
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ROUTE_LABELS, LATENCY_BUCKETS,
+))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size", ROUTE_LABELS, SIZE_BUCKETS,
+))
+REQUEST_DB_QUERIES = REGISTRY.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ROUTE_LABELS, QUERY_COUNT_BUCKETS,
+))
+REQUEST_DB_SECONDS = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request", ROUTE_LABELS, LATENCY_BUCKETS,
+))
+REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ("method",),
+))
+DB_QUERIES = REGISTRY.register(Counter(
+    "db_queries_total", "SQL statements executed by this process, including background jobs",
+))
+DB_SECONDS = REGISTRY.register(Counter(
+    "db_query_seconds_total", "Time spent executing SQL statements by this process",
+))
+DB_POOL = REGISTRY.register(Gauge(
+    "db_pool_connections", "Connection pool state at scrape time", ("state",),
+))
+DB_POOL_WAIT = REGISTRY.register(Gauge(
+    "db_pool_checkout_wait", "Connection checkout wait statistics of the pool", ("stat",),
+))
+DB_POOL_CONNECT = REGISTRY.register(Gauge(
+    "db_pool_connect", "New connection establishment statistics of the pool", ("stat",),
+))
+
+
+class RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def install_db_metrics(engine: AsyncEngine) -> None:
+    """Attach the cursor events that attribute SQL cost to the current request"""
+    sync_engine = engine.sync_engine
+    if getattr(sync_engine, "_metrics_installed", False):
+        return
+    sync_engine._metrics_installed = True
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERIES.inc()
+        DB_SECONDS.inc(amount=elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context):
+        # Câu lệnh lỗi không có after_cursor_execute: bỏ mốc thời gian của nó
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, response size and DB cost.
+    """
+
+    def __init__(self, app: Any, exclude_paths: Iterable[str] = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+        REQUESTS_IN_PROGRESS.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec((method,))
+            _request_db_stats.reset(token)
+            # FastAPI đặt route đã khớp vào scope: dùng path template thay vì path thật
+            route = scope.get("route")
+            labels = (method, getattr(route, "path", None) or UNMATCHED_ROUTE, str(status_code))
+            REQUEST_DURATION.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, body_size)
+            REQUEST_DB_QUERIES.observe(labels, stats.queries)
+            REQUEST_DB_SECONDS.observe(labels, stats.seconds)
+
+
+def render_metrics(pool_status: Optional[Dict[str, Any]] = None) -> str:
+    """Prometheus exposition of every metric, refreshing the pool gauges first"""
+    if pool_status:
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in pool_status:
+                DB_POOL.set((state,), pool_status[state])
+        for stat in ("checkouts", "wait_seconds_total", "wait_seconds_max"):
+            if stat in pool_status:
+                DB_POOL_WAIT.set((stat,), pool_status[stat])
+        for stat in ("connects", "connect_seconds_total", "connect_seconds_max"):
+            if stat in pool_status:
+                DB_POOL_CONNECT.set((stat,), pool_status[stat])
+    return REGISTRY.render()
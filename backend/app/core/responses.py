@@ -0,0 +1,256 @@
+# app/core/responses.py
+"""
+Response classes: fast JSON encoding and file responses with HTTP range and
+conditional request support.
+
+``ORJSONResponse`` is the application's default response class.
+``ResponseSerializer`` wraps a precompiled pydantic v2 ``TypeAdapter``: it
+validates ORM rows or row mappings once (``from_attributes``) and dumps them
+to JSON bytes in pydantic-core, so an endpoint returning its ``response()``
+skips FastAPI's validate -> ``jsonable_encoder`` -> ``json.dumps`` round trip.
+
+``FileRangeResponse`` serves a file from disk:
+
+* ``ETag`` / ``Last-Modified`` validators, answering ``If-None-Match`` and
+  ``If-Modified-Since`` with ``304 Not Modified``,
+* single byte ranges (``Range: bytes=...``) with ``206 Partial Content``,
+  honouring ``If-Range``, and ``416`` for unsatisfiable ranges,
+* a body that never sits in Python memory as a whole. If the ASGI server offers
+  the ``http.response.zerocopysend`` extension, the file descriptor is
+  handed to it (``os.sendfile``). Otherwise it is read with ``os.pread`` in
+  chunks of ``chunk_size`` on the thread pool.
+
+``accel_redirect_response`` hands the transfer to nginx instead
+(``X-Accel-Redirect``). nginx then does range, validators and ``sendfile``
+itself, and the worker only authorizes the download.
+"""
+import hashlib
+import os
+import stat
+import unicodedata
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Generic, Mapping, Optional, Tuple, Type, TypeVar
+from urllib.parse import quote
+
+import anyio
+import orjson
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse, Response
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+T = TypeVar("T")
+
+
+class ORJSONResponse(JSONResponse):
+    """``JSONResponse`` encoded with orjson (datetimes, enums and UUIDs natively)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ResponseSerializer(Generic[T]):
+    """
+    Serialize values of ``type_`` (a schema, ``List[schema]``...) straight to JSON.
+
+    Build one per response type at import time: the core schema is compiled
+    once and reused for every request.
+    """
+
+    def __init__(self, type_: Type[T]):
+        self.adapter = TypeAdapter(type_)
+
+    def to_json(self, value: Any) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(value, from_attributes=True))
+
+    def response(
+        self, value: Any, *, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        return Response(
+            self.to_json(value), status_code=status_code, headers=headers, media_type="application/json"
+        )
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Strong validator from inode, size and mtime: changes whenever the file is replaced"""
+    token = f"{stat_result.st_ino}-{stat_result.st_size}-{stat_result.st_mtime_ns}"
+    return '"' + hashlib.md5(token.encode(), usedforsecurity=False).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a ``Range`` header into an inclusive ``(start, end)``.
+
+    Returns None when the header should be ignored (not bytes, malformed,
+    several ranges), raises ``RangeNotSatisfiable`` when no byte is in range.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        # Nhiều khoảng (multipart/byteranges) ít được dùng: trả toàn bộ file
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def content_disposition(filename: str) -> str:
+    # Tên ASCII cho client cũ (bỏ dấu tiếng Việt), tên UTF-8 đầy đủ trong filename*
+    ascii_name = unicodedata.normalize("NFKD", filename.replace("đ", "d").replace("Đ", "D"))
+    ascii_name = ascii_name.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+class FileRangeResponse(Response):
+    """
+    Stream ``path`` honouring the request's Range and conditional headers.
+
+    ``stat_result`` must come from the file being served (``os.stat``).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        request_headers: Mapping[str, str],
+        *,
+        media_type: str = "application/octet-stream",
+        filename: Optional[str] = None,
+        method: str = "GET",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        self.send_body = method != "HEAD"
+        self.background = None
+        self.body = b""
+        size = stat_result.st_size
+        etag = make_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+        response_headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            **(headers or {}),
+        }
+        self.range: Optional[Tuple[int, int]] = None
+
+        if self._not_modified(request_headers, etag, stat_result.st_mtime):
+            self.status_code = 304
+            self.length = 0
+        else:
+            self.status_code = 200
+            self.range = (0, size - 1) if size else None
+            range_header = request_headers.get("range")
+            if range_header and self._if_range_matches(request_headers, etag, last_modified):
+                try:
+                    requested = parse_range(range_header, size)
+                except RangeNotSatisfiable:
+                    self.status_code = 416
+                    self.range = None
+                    response_headers["content-range"] = f"bytes */{size}"
+                else:
+                    if requested is not None:
+                        self.status_code = 206
+                        self.range = requested
+                        response_headers["content-range"] = f"bytes {requested[0]}-{requested[1]}/{size}"
+            self.length = self.range[1] - self.range[0] + 1 if self.range else 0
+            response_headers["content-length"] = str(self.length)
+            if self.status_code != 416:
+                response_headers["content-type"] = media_type
+                if filename:
+                    response_headers["content-disposition"] = content_disposition(filename)
+        self.init_headers(response_headers)
+
+    @property
+    def is_partial(self) -> bool:
+        return self.status_code == 206
+
+    @staticmethod
+    def _not_modified(request_headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match có ưu tiên hơn If-Modified-Since (RFC 9110 13.2.2)
+            return etag_matches(if_none_match, etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _if_range_matches(request_headers: Mapping[str, str], etag: str, last_modified: str) -> bool:
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range.strip() in (etag, last_modified)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or not self.length:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        start, _ = self.range
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send({"type": ZEROCOPY_EXTENSION, "file": fd, "offset": start, "count": self.length, "more_body": False})
+                return
+            await self._send_chunks(fd, start, send)
+        finally:
+            os.close(fd)
+
+    async def _send_chunks(self, fd: int, offset: int, send: Any) -> None:
+        remaining = self.length
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+            if not chunk:
+                # File bị cắt ngắn trong lúc gửi: dừng thay vì treo kết nối
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def accel_redirect_response(
+    internal_uri: str, *, media_type: str, filename: Optional[str] = None
+) -> Response:
+    """Let nginx serve ``internal_uri`` (an ``internal`` location) with sendfile"""
+    headers = {"x-accel-redirect": quote(internal_uri)}
+    if filename:
+        headers["content-disposition"] = content_disposition(filename)
+    return Response(status_code=200, headers=headers, media_type=media_type)
+
+
+def is_regular_file(stat_result: os.stat_result) -> bool:
+    return stat.S_ISREG(stat_result.st_mode)
@@ -1,10 +1,55 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds = max_rounds = BCRYPT_ROUNDS: mọi hash có cost khác đều bị coi là
+# cần cập nhật và được hash lại khi đăng nhập thành công
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt nhả GIL khi tính hash nên một thread pool nhỏ là đủ để không chặn event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+_hash_waiting = 0
+
+_dummy_hash: Optional[str] = None
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hash operations are already queued"""
+
+
+async def _run_hash_job(func, *args):
+    """
+    Run a bcrypt call on the hash pool.
+
+    At most ``PASSWORD_HASH_WORKERS`` calls run at once; up to
+    ``PASSWORD_HASH_MAX_QUEUE`` more wait on the event loop, beyond that the
+    call fails fast with ``PasswordHasherBusy`` instead of piling up.
+    """
+    global _hash_waiting
+    if _hash_slots.locked() and _hash_waiting >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherBusy()
+    _hash_waiting += 1
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_waiting -= 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -29,4 +74,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def hash_password(password: str) -> str:
+    """Generate password hash on the hash pool"""
+    return await _run_hash_job(pwd_context.hash, password)
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hash pool.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    uses a cost other than ``BCRYPT_ROUNDS`` and should replace it.
+    """
+    if not hashed_password:
+        # Vẫn tốn một lần verify để thời gian phản hồi không lộ user có tồn tại hay không
+        global _dummy_hash
+        if _dummy_hash is None:
+            _dummy_hash = await hash_password("dummy-password")
+        await _run_hash_job(pwd_context.verify, plain_password, _dummy_hash)
+        return False, None
+    return await _run_hash_job(pwd_context.verify_and_update, plain_password, hashed_password)
\ No newline at end of file
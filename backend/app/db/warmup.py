@@ -0,0 +1,109 @@
+# app/db/warmup.py
+"""
+Work done once per worker before it reports ready, instead of on the first requests.
+
+* ``configure_mappers``: relationships are attached in ``app/models/__init__.py``
+  after the classes are created, so SQLAlchemy would otherwise configure every
+  mapper lazily inside the first query that touches the ORM,
+* ``warm_pool``: opens ``DB_POOL_WARMUP`` connections at once (TCP, TLS and
+  auth handshakes) so the first burst of traffic does not pay for them,
+* ``precompile_statements``: runs the hot read paths once, which fills the
+  engine's compiled cache and asyncpg's prepared statements for every pooled
+  connection that ran them. Lookups use keys that match nothing, so only the
+  list pages return rows.
+
+A failing step is logged and skipped: the worker still starts and the
+request path degrades to the lazy behaviour.
+"""
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import anyio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import configure_mappers
+
+import app.models  # noqa: F401  (registers every model and relationship)
+from app.core.config import settings
+from app.schemas.document import DocumentFilterRequest
+from app.services.crud.department_crud import department_crud
+from app.services.crud.document_crud import document_crud
+from app.services.crud.user_crud import user_crud
+
+logger = logging.getLogger(__name__)
+
+HOT_QUERIES: List[Tuple[str, Callable[[AsyncSession], Awaitable[Any]]]] = [
+    ("user_by_id", lambda db: user_crud.get(db, 0)),
+    ("user_by_username", lambda db: user_crud.get_by_username(db, username="")),
+    ("user_by_email", lambda db: user_crud.get_by_email(db, email="")),
+    # Loader không qua cache: một worker mới vẫn phải tự biên dịch câu lệnh
+    ("department_by_id", lambda db: department_crud._get(db, 0)),
+    ("department_by_slug", lambda db: department_crud._get_by_slug(db, "")),
+    ("department_page", lambda db: department_crud._get_page(db, None, 100)),
+    ("document_list", lambda db: document_crud.list_documents(db, filters=DocumentFilterRequest())),
+]
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> int:
+    """Check out ``connections`` connections together, ping them and return them to the pool"""
+    if connections <= 0:
+        return 0
+    async with AsyncExitStack() as stack:
+        opened = []
+
+        async def open_one() -> None:
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+            opened.append(conn)
+
+        # Connection đầu tiên chạy event first_connect của dialect dưới một lock đồng bộ:
+        # mở song song ngay từ đầu thì các connection khác chờ lock đó mãi trên cùng thread
+        await open_one()
+        async with anyio.create_task_group() as tg:
+            for _ in range(connections - 1):
+                tg.start_soon(open_one)
+        return len(opened)
+
+
+async def precompile_statements(session_factory: async_sessionmaker) -> int:
+    """Run every ``HOT_QUERIES`` entry once, rolled back; returns how many succeeded"""
+    done = 0
+    async with session_factory() as db:
+        for name, query in HOT_QUERIES:
+            try:
+                await query(db)
+                done += 1
+            except Exception as e:
+                logger.warning(f"Warm-up query {name} failed: {e}")
+            await db.rollback()
+    return done
+
+
+async def warm_up(engine: AsyncEngine, session_factory: async_sessionmaker) -> Dict[str, float]:
+    """Run every warm-up step and return how long each took, in seconds"""
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    configure_mappers()
+    timings["configure_mappers"] = time.perf_counter() - started
+
+    connections = settings.DB_POOL_WARMUP if settings.DB_POOL_WARMUP is not None else settings.DB_POOL_SIZE
+    started = time.perf_counter()
+    try:
+        opened = await warm_pool(engine, connections)
+        logger.info(f"Connection pool warmed: {opened} connections")
+    except Exception as e:
+        logger.warning(f"Connection pool warm-up failed: {e}")
+    timings["warm_pool"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compiled = await precompile_statements(session_factory)
+    timings["precompile_statements"] = time.perf_counter() - started
+
+    logger.info(
+        f"Warm-up done ({compiled}/{len(HOT_QUERIES)} hot queries): "
+        + ", ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in timings.items())
+    )
+    return timings
@@ -1,21 +1,39 @@
+from typing import Optional
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from app.core.config import settings
 from app.models.base import get_db
-from app.models.user import User
+from app.schemas.user import User
+from app.services.crud.user_crud import user_crud
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
-    """Get current user from JWT token"""
-    token = credentials.credentials
-    
+    """
+    Get current user from JWT token.
+
+    The principal comes from the short-TTL cache, so the common path only
+    decodes the token; the session is never used unless the cache misses.
+    """
+    return await _get_user_from_token(credentials.credentials, db)
+
+async def get_current_user_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[User]:
+    """Get current user when a bearer token is sent, None for anonymous requests"""
+    if credentials is None:
+        return None
+    return await _get_user_from_token(credentials.credentials, db)
+
+async def _get_user_from_token(token: str, db: AsyncSession) -> User:
     try:
         payload = jwt.decode(
             token, 
@@ -45,12 +63,13 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.user_id == int(user_id)).first()
-    if user is None:
+    principal = await user_crud.get_principal(db, int(user_id))
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    user = User.model_validate(principal)
     if user.status != "active":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
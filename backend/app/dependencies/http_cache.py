@@ -0,0 +1,29 @@
+from typing import Dict
+
+from fastapi import HTTPException, Request, status
+
+from app.cache import cache
+from app.core.config import settings
+from app.core.responses import etag_matches
+
+
+def table_etag(*namespaces: str):
+    """
+    Conditional GET for responses built only from the given tables.
+
+    The ETag is made of the tables' cache namespace versions, which every
+    write through the CRUD layer bumps. A matching ``If-None-Match`` ends the
+    request with ``304 Not Modified`` before the endpoint runs, so neither the
+    database nor the JSON encoder is touched. Otherwise the dependency returns
+    the ``ETag`` / ``Cache-Control`` headers for the endpoint to send.
+    """
+    cache_control = settings.HTTP_CACHE_CONTROLS.get(namespaces[0], settings.HTTP_CACHE_CONTROL_DEFAULT)
+
+    async def validators(request: Request) -> Dict[str, str]:
+        versions = [f"{namespace}.{await cache.version(namespace)}" for namespace in namespaces]
+        headers = {"ETag": '"' + "-".join(versions) + '"', "Cache-Control": cache_control}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return headers
+    return validators
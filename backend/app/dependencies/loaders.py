@@ -0,0 +1,16 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.base import get_db
+from app.services.loaders import Loaders
+
+
+def get_loaders(db: AsyncSession = Depends(get_db)) -> Loaders:
+    """
+    Batch loaders for the nested objects of the response.
+
+    FastAPI resolves a dependency once per request, so every use of
+    ``get_loaders`` in one request shares the same loaders (and session) and
+    each user, subject or document is read at most once.
+    """
+    return Loaders(db)
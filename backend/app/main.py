@@ -1,11 +1,18 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 
 from app.api.v1.api import api_router
+from app.background.queue import consumer
+from app.background.worker import worker
 from app.core.config import settings
+from app.core.middlewares import MetricsMiddleware, install_db_metrics, render_metrics
+from app.core.responses import ORJSONResponse
+from app.db.session import AsyncSessionLocal, engine, get_pool_status
+from app.db.warmup import warm_up
 
 
 # Setup logging
@@ -13,12 +20,28 @@ logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the worker up before uvicorn reports it ready, then run the background loops.
+    """
+    app.state.startup_timings = await warm_up(engine, AsyncSessionLocal)
+    worker.start()
+    consumer.start()
+    yield
+    await consumer.stop()
+    # Flush lần cuối các lượt xem/tải còn trong buffer
+    await worker.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 
@@ -33,6 +56,11 @@ if settings.BACKEND_CORS_ORIGINS:
     )
 
 
+# Metrics: latency, response size và chi phí DB theo từng route, xem tại /metrics
+app.add_middleware(MetricsMiddleware)
+install_db_metrics(engine)
+
+
 # Custom exception handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -50,7 +78,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "type": error["type"],
         })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": formatted_errors},
     )
@@ -75,4 +103,29 @@ def health():
     """
     Health check endpoint.
     """
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/health/db")
+def health_db():
+    """
+    Connection pool metrics and warm-up timings of this worker process.
+    """
+    return {
+        "status": "ok",
+        "pool": get_pool_status(),
+        "startup_ms": {
+            step: round(seconds * 1000, 2)
+            for step, seconds in getattr(app.state, "startup_timings", {}).items()
+        },
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics of this worker process.
+    """
+    return PlainTextResponse(
+        render_metrics(get_pool_status()), media_type="text/plain; version=0.0.4"
+    )
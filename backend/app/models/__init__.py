@@ -10,6 +10,7 @@ from app.models.document_tag import DocumentTag
 from app.models.comment import Comment
 from app.models.rating import Rating
 from app.models.document_history import DocumentHistory
+from app.models.document_history_daily import DocumentHistoryDaily
 from app.models.shared_link import SharedLink
 from app.models.forum import Forum
 from app.models.forum_post import ForumPost
@@ -17,6 +18,11 @@ from app.models.forum_reply import ForumReply
 from app.models.system_config import SystemConfig
 from app.models.notification import Notification
 from app.models.subject_department import SubjectDepartment
+from app.models.background_task import BackgroundTask
+from app.models.bulk_job import BulkJob
+from app.models.file_blob import FileBlob
+from app.models.stat_counter import StatCounter
+from app.models.document_rating_stats import DocumentRatingStats
 from sqlalchemy.orm import relationship
 
 # Define relationships to avoid circular imports
@@ -48,6 +54,7 @@ Document.ratings = relationship("Rating", back_populates="document")
 Document.document_tags = relationship("DocumentTag", back_populates="document")
 Document.document_histories = relationship("DocumentHistory", back_populates="document")
 Document.shared_links = relationship("SharedLink", back_populates="document")
+Document.tags = relationship("Tag", secondary="document_tags", viewonly=True)
 
 Tag.document_tags = relationship("DocumentTag", back_populates="tag")
 
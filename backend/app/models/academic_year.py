@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -9,5 +10,5 @@ class AcademicYear(Base):
     year_id = Column(Integer, primary_key=True, index=True)
     year_name = Column(String(50), nullable=False)
     year_order = Column(Integer, nullable=False)
-    created_at = Column(String)  
-    updated_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class BackgroundTask(Base):
+    __tablename__ = "background_tasks"
+
+    task_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    dedup_key = Column(String(255))
+    run_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    locked_until = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        # Hàng đợi: lấy task đến hạn theo run_at
+        Index('idx_background_tasks_status_run_at', 'status', 'run_at'),
+        # Chống trùng: một dedup_key chỉ có một task đang chờ/chạy
+        Index(
+            'uix_background_tasks_dedup_key', 'dedup_key', unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
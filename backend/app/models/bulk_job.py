@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+
+    job_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    operation = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_by = Column(Integer, ForeignKey("users.user_id"))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum
+from sqlalchemy import Column, DateTime, Integer, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -10,7 +11,10 @@ class Comment(Base):
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     content = Column(Text, nullable=False)
-    status = Column(Enum("approved", "pending", "rejected"), default="approved")
-    created_at = Column(String)
-    updated_at = Column(String)
+    status = Column(Enum("approved", "pending", "rejected", name="forum_status"), default="approved")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('idx_comments_document_created_at', 'document_id', 'created_at'),
+    )
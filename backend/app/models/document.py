@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Enum, Index
+from sqlalchemy.orm import query_expression, relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -14,8 +15,21 @@ class Document(Base):
     file_type = Column(String(50), nullable=False, index=True)
     subject_id = Column(Integer, ForeignKey("subjects.subject_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    status = Column(Enum("approved", "pending", "rejected"), default="pending")
+    status = Column(Enum("approved", "pending", "rejected", name="document_status"), default="pending")
     view_count = Column(Integer, default=0)
     download_count = Column(Integer, default=0)
-    created_at = Column(String)  
-    updated_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Tính trong câu truy vấn danh sách (with_expression), không phải cột thật
+    average_rating = query_expression()
+    rating_count = query_expression()
+
+    __table_args__ = (
+        # Danh sách sắp theo thời gian (keyset created_at, document_id), có hoặc không lọc status
+        Index('idx_documents_created_at', 'created_at', 'document_id'),
+        Index('idx_documents_status_created_at', 'status', 'created_at', 'document_id'),
+        # Khóa ngoại: tài liệu theo môn học / theo người đăng (khớp với createdb.sql)
+        Index('idx_documents_subject_status', 'subject_id', 'status'),
+        Index('idx_documents_user_created', 'user_id', 'created_at'),
+    )
@@ -1,15 +1,26 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
+# Append-only, một dòng cho mỗi lượt xem/tải/duyệt. Trên Postgres bảng được phân vùng
+# theo tháng trên created_at (khóa chính (history_id, created_at), xem app/services/history.py)
 class DocumentHistory(Base):
     __tablename__ = "document_history"
 
     history_id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    action = Column(Enum("view", "download"), nullable=False)
-    created_at = Column(String)  
+    action = Column(Enum("view", "download", "approve", "reject", name="history_action"), nullable=False)
+    # Khóa phân vùng: không được NULL
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
-    
\ No newline at end of file
+    __table_args__ = (
+        # Truy vấn theo khoảng thời gian ("7 ngày gần đây")
+        Index('idx_document_history_created_at', 'created_at'),
+        # Lịch sử của một tài liệu, mới nhất trước
+        Index('idx_document_history_document_created_at', 'document_id', 'created_at'),
+        # Người dùng đã tương tác với tài liệu (người nhận thông báo, khớp với createdb.sql)
+        Index('idx_document_history_document_user', 'document_id', 'user_id'),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, DateTime, Enum, ForeignKey, Integer, PrimaryKeyConstraint
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class DocumentHistoryDaily(Base):
+    __tablename__ = "document_history_daily"
+
+    document_id = Column(Integer, ForeignKey("documents.document_id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)  # Ngày theo giờ UTC
+    action = Column(Enum("view", "download", "approve", "reject", name="history_action"), nullable=False)
+    events = Column(Integer, nullable=False, default=0)
+    # Số người dùng khác nhau trong ngày
+    users = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("document_id", "day", "action", name="pk_document_history_daily"),
+    )
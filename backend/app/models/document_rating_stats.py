@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class DocumentRatingStats(Base):
+    __tablename__ = "document_rating_stats"
+
+    document_id = Column(Integer, ForeignKey("documents.document_id", ondelete="CASCADE"), primary_key=True)
+    # Chỉ tính các điểm 1-5; điểm 0 (thích, không chấm điểm) chỉ có trong histogram
+    rating_sum = Column(BigInteger, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    score_0 = Column(Integer, nullable=False, default=0)
+    score_1 = Column(Integer, nullable=False, default=0)
+    score_2 = Column(Integer, nullable=False, default=0)
+    score_3 = Column(Integer, nullable=False, default=0)
+    score_4 = Column(Integer, nullable=False, default=0)
+    score_5 = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
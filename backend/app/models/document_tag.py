@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -9,7 +10,7 @@ class DocumentTag(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
     tag_id = Column(Integer, ForeignKey("tags.tag_id"), nullable=False)
-    created_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Unique constraint
     __table_args__ = (
@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class FileBlob(Base):
+    __tablename__ = "file_blobs"
+
+    # SHA-256 (hex) của nội dung: file nằm ở blobs/<2 ký tự>/<2 ký tự>/<sha256>
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    # Số dòng documents trỏ tới blob; về 0 thì blob bị xóa
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, DateTime, Integer, ForeignKey
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -8,6 +9,6 @@ class Forum(Base):
 
     forum_id = Column(Integer, primary_key=True, index=True)
     subject_id = Column(Integer, ForeignKey("subjects.subject_id"), nullable=False, unique=True)
-    created_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -11,8 +12,10 @@ class ForumPost(Base):
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
-    status = Column(Enum("approved", "pending", "rejected"), default="approved")
-    created_at = Column(String)  
-    updated_at = Column(String)  
+    status = Column(Enum("approved", "pending", "rejected", name="forum_status"), default="approved")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    
\ No newline at end of file
+    __table_args__ = (
+        Index('idx_forum_posts_forum_created_at', 'forum_id', 'created_at', 'post_id'),
+    )
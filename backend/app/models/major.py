@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, DateTime, Integer, String, Text
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -10,5 +11,5 @@ class Major(Base):
     major_name = Column(String(100), nullable=False)
     major_code = Column(String(20), nullable=False, unique=True, index=True)
     description = Column(Text)
-    created_at = Column(String)  
-    updated_at = Column(String)  
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -13,6 +14,13 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     type = Column(String(50), nullable=False)
     reference_id = Column(Integer)
-    created_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    
\ No newline at end of file
+    __table_args__ = (
+        # Fan-out bỏ qua người đã nhận thông báo cùng loại cho cùng đối tượng
+        Index('idx_notifications_type_reference', 'type', 'reference_id'),
+        # Hộp thư của một người dùng, mới nhất trước
+        Index('idx_notifications_user_created_at', 'user_id', 'created_at'),
+        # Đếm / lọc thông báo chưa đọc của một người dùng
+        Index('idx_notifications_user_is_read', 'user_id', 'is_read'),
+    )
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -10,12 +11,14 @@ class Rating(Base):
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     score = Column(Integer, nullable=False)  # Between 0 and 5, 0 means like without rating
-    created_at = Column(String)  
-    updated_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Unique constraint
     __table_args__ = (
         UniqueConstraint('user_id', 'document_id', name='uix_user_document_rating'),
+        # Khớp với createdb.sql: phục vụ AVG(score) theo tài liệu
+        Index('idx_ratings_document_score', 'document_id', 'score'),
     )
 
     
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -10,7 +11,7 @@ class SharedLink(Base):
     document_id = Column(Integer, ForeignKey("documents.document_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     share_token = Column(String(100), nullable=False, unique=True)
-    expiration_date = Column(String, nullable=True)  
-    created_at = Column(String)  
+    expiration_date = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, PrimaryKeyConstraint, String
+
+from app.models.base import Base
+from app.utils.helpers import utcnow
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    scope = Column(String(20), nullable=False)  # global, subject
+    # 0 cho scope "global", subject_id cho scope "subject"
+    scope_id = Column(Integer, nullable=False, default=0)
+    metric = Column(String(20), nullable=False)  # documents, users, views, downloads
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("scope", "scope_id", "metric", name="pk_stat_counters"),
+    )
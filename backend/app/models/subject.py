@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -12,8 +13,8 @@ class Subject(Base):
     description = Column(Text)
     major_id = Column(Integer, ForeignKey("majors.major_id"), nullable=False)
     year_id = Column(Integer, ForeignKey("academic_years.year_id"), nullable=False)
-    created_at = Column(String)  
-    updated_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     major = relationship("Major", back_populates="subjects")
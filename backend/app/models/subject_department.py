@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -9,7 +10,7 @@ class SubjectDepartment(Base):
     id = Column(Integer, primary_key=True, index=True)
     subject_id = Column(Integer, ForeignKey("subjects.subject_id"), nullable=False)
     department_id = Column(Integer, ForeignKey("departments.department_id"), nullable=False)
-    created_at = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Unique constraint
     __table_args__ = (
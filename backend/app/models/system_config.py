@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, DateTime, Integer, String, Text
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -10,4 +11,4 @@ class SystemConfig(Base):
     config_key = Column(String(50), nullable=False, unique=True)
     config_value = Column(Text, nullable=False)
     description = Column(String(255))
-    updated_at = Column(String)  
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -8,6 +9,6 @@ class Tag(Base):
 
     tag_id = Column(Integer, primary_key=True, index=True)
     tag_name = Column(String(50), nullable=False, unique=True, index=True)
-    created_at = Column(String)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     
\ No newline at end of file
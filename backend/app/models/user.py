@@ -1,5 +1,6 @@
-from sqlalchemy import Boolean, Column, Integer, String, Enum, Text, ForeignKey
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Enum, Text, ForeignKey
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.models.base import Base
 
@@ -7,14 +8,15 @@ class User(Base):
     __tablename__ = "users"
 
     user_id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(50), nullable=False)
+    # Không unique (dữ liệu cũ có thể trùng) nhưng đăng nhập tra theo username
+    username = Column(String(50), nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     password_hash = Column(String(255))
     full_name = Column(String(100))
-    role = Column(Enum("student", "lecturer", "admin"), default="student", nullable=False)
-    status = Column(Enum("active", "banned", "pending"), default="active", nullable=False)
+    role = Column(Enum("student", "lecturer", "admin", name="user_role"), default="student", nullable=False)
+    status = Column(Enum("active", "banned", "pending", name="user_status"), default="active", nullable=False)
     google_id = Column(String(100))
     university_id = Column(String(50))
-    created_at = Column(String)  
-    updated_at = Column(String)  
-    last_login = Column(String, nullable=True)  
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    last_login = Column(DateTime(timezone=True), nullable=True)
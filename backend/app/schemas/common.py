@@ -27,6 +27,13 @@ class ForumStatus(str, Enum):
 class HistoryAction(str, Enum):
     view = "view"
     download = "download"
+    approve = "approve"
+    reject = "reject"
+
+class BulkOperationType(str, Enum):
+    approve = "approve"
+    reject = "reject"
+    delete = "delete"
 
 # Base schemas
 class TimeStampBase(BaseModel):
@@ -44,6 +51,8 @@ class ErrorResponse(BaseModel):
 class PaginationParams(BaseModel):
     page: int = 1
     per_page: int = 20
+    # Cursor mode: khi có cursor thì bỏ qua page và phân trang theo keyset
+    cursor: Optional[str] = None
     
     @validator('page')
     def page_must_be_positive(cls, v):
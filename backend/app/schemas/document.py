@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, constr, conint
 from typing import Optional, List
 from app.schemas.common import DocumentStatus, TimeStampBase
@@ -14,7 +15,7 @@ class DocumentBase(BaseModel):
     subject_id: int
 
 class DocumentCreate(DocumentBase):
-    tags: Optional[List[str]] = []
+    tags: Optional[List[constr(max_length=50)]] = []
 
 class DocumentUpdate(BaseModel):
     title: Optional[constr(max_length=255)] = None
@@ -32,6 +33,7 @@ class Document(DocumentBase, TimeStampBase):
     user: Optional[User] = None
     tags: Optional[List[Tag]] = []
     average_rating: Optional[float] = 0
+    rating_count: Optional[int] = 0
     
     class Config:
         from_attributes = True
@@ -41,6 +43,7 @@ class DocumentListResponse(BaseModel):
     total: int
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
 
 class DocumentFilterRequest(BaseModel):
     subject_id: Optional[int] = None
@@ -48,7 +51,11 @@ class DocumentFilterRequest(BaseModel):
     status: Optional[DocumentStatus] = None
     tags: Optional[List[str]] = []
     search: Optional[str] = None
+    # Khoảng thời gian tạo [created_after, created_before)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
     page: int = 1
     per_page: int = 20
     order_by: Optional[str] = "created_at"
-    order_desc: bool = True
\ No newline at end of file
+    order_desc: bool = True
+    cursor: Optional[str] = None
\ No newline at end of file
@@ -24,4 +24,6 @@ class ForumStatus(str, Enum):
 
 class HistoryAction(str, Enum):
     view = "view"
-    download = "download"
\ No newline at end of file
+    download = "download"
+    approve = "approve"
+    reject = "reject"
\ No newline at end of file
@@ -61,4 +61,18 @@ class ForumReply(ForumReplyBase, TimeStampBase):
     user: Optional[User] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ForumPostWithReplies(ForumPost):
+    # Các trả lời đầu tiên của bài (cũ nhất trước); đủ danh sách ở trang chi tiết
+    replies: List[ForumReply] = []
+
+class ForumPostListResponse(BaseModel):
+    posts: List[ForumPostWithReplies]
+    total: int
+    next_cursor: Optional[str] = None
+
+class ForumThread(BaseModel):
+    post: ForumPost
+    replies: List[ForumReply]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, conint
-from typing import Optional
+from typing import Dict, Optional
 from app.schemas.common import TimeStampBase
 from app.schemas.user import User
 
@@ -19,5 +19,14 @@ class Rating(RatingBase, TimeStampBase):
     user: Optional[User] = None
     
     class Config:
-        from_attributes = True 
-        
\ No newline at end of file
+        from_attributes = True
+
+class RatingSummary(BaseModel):
+    document_id: int
+    average_rating: float
+    rating_count: int
+    # Số lượt theo từng điểm 0-5 (0: thích, không chấm điểm)
+    histogram: Dict[int, int]
+
+    class Config:
+        from_attributes = True
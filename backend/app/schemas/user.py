@@ -4,7 +4,7 @@ from datetime import datetime
 from app.schemas.common import UserRole, UserStatus, TimeStampBase
 
 class UserBase(BaseModel):
-    username: constr
+    username: constr(max_length=50)
     email: EmailStr
     full_name: Optional[constr(max_length=100)] = None
     role: UserRole = UserRole.student
@@ -1,3 +1,8 @@
+from pydantic import BaseModel, conint, conlist, constr
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.common import BulkOperationType
+
 class FileUploadResponse(BaseModel):
     file_path: str
     file_size: int
@@ -9,11 +14,29 @@ class StatisticsResponse(BaseModel):
     total_users: int
     total_downloads: int
     total_views: int
-    
+    # Thời điểm rollup gần nhất của số tài liệu/người dùng
+    updated_at: Optional[datetime] = None
+
+class SubjectStatistics(BaseModel):
+    subject_id: int
+    subject_name: str
+    total_documents: int
+    total_downloads: int
+    total_views: int
+
+class DepartmentStatistics(BaseModel):
+    department_id: int
+    name: str
+    slug: str
+    total_subjects: int
+    total_documents: int
+    total_downloads: int
+    total_views: int
+
 class SearchRequest(BaseModel):
-    query: str
+    query: constr(min_length=1, max_length=200)
     search_in: List[str] = ["title", "description", "content"]
-    limit: int = 10
+    limit: conint(ge=1, le=100) = 10
 
 class SearchResult(BaseModel):
     document_id: int
@@ -23,6 +46,33 @@ class SearchResult(BaseModel):
     snippet: str
     
 class BulkOperationRequest(BaseModel):
-    document_ids: List[int]
-    operation: str 
-    reason: Optional[str] = None
\ No newline at end of file
+    document_ids: conlist(int, min_length=1, max_length=10000)
+    operation: BulkOperationType
+    reason: Optional[constr(max_length=1000)] = None
+
+class BulkOperationItem(BaseModel):
+    document_id: int
+    # updated, unchanged, not_found, queued
+    outcome: str
+
+class BulkJob(BaseModel):
+    job_id: int
+    operation: BulkOperationType
+    status: str
+    total: int
+    processed: int
+    succeeded: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class BulkOperationResponse(BaseModel):
+    operation: BulkOperationType
+    requested: int
+    succeeded: int
+    results: List[BulkOperationItem]
+    # Chỉ có với operation "delete": theo dõi tiến độ tại /documents/bulk/{job_id}
+    job: Optional[BulkJob] = None
\ No newline at end of file
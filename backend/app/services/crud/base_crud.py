@@ -1,10 +1,12 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import delete, exists, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-Base = declarative_base()
+from app.cache import cache
+from app.models.base import Base
+from app.utils.pagination import keyset_page, paginate_keyset
 
 # Định nghĩa các kiểu generic
 ModelType = TypeVar("ModelType", bound=Base)
@@ -13,67 +15,161 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
-    Base class for CRUD operations on a specific model.
+    Base class for async CRUD operations on a specific model.
+
+    Every method issues ``select()``/``update()``/``delete()`` statements through
+    ``await db.execute(...)`` so nothing blocks the event loop. Statements are
+    built against the model's real primary key (``user_id``, ``document_id``...),
+    and SQLAlchemy's compiled cache reuses their SQL across calls.
+
+    Writes invalidate the model's cache namespace (its table name), so any
+    cached read of that entity is dropped as soon as the write commits.
     """
-    
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        mapper = inspect(model)
+        self.pk = mapper.primary_key[0]
+        self.pk_name = mapper.get_property_by_column(self.pk).key
+        self.column_names = set(mapper.column_attrs.keys())
+        self.cache_namespace = model.__tablename__
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Get a single record by ID (served from the identity map when loaded)"""
+        return await db.get(self.model, id)
+
+    async def get_many(self, db: AsyncSession, ids: Iterable[Any]) -> List[ModelType]:
+        """Get several records by ID with one IN query, keeping the order of ``ids``"""
+        unique_ids = list(dict.fromkeys(ids))
+        if not unique_ids:
+            return []
+        result = await db.execute(select(self.model).where(self.pk.in_(unique_ids)))
+        by_id = {getattr(obj, self.pk_name): obj for obj in result.scalars()}
+        return [by_id[id] for id in unique_ids if id in by_id]
+
+    async def exists(
+        self, db: AsyncSession, *, id: Any = None, filter_condition: Any = None
+    ) -> bool:
+        """Check whether a record matching an ID and/or filter condition exists"""
+        condition = exists(self.model)
+        if id is not None:
+            condition = condition.where(self.pk == id)
+        if filter_condition is not None:
+            condition = condition.where(filter_condition)
+        result = await db.execute(select(condition))
+        return bool(result.scalar())
 
-    async def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        """Get a single record by ID"""
-        return db.query(self.model).filter(self.model.id == id).first()
-    
     async def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
         """Get multiple records with pagination"""
-        return db.query(self.model).offset(skip).limit(limit).all()
-    
-    async def get_count(self, db: Session) -> int:
+        query = select(self.model).order_by(self.pk).offset(skip).limit(limit)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: Optional[str] = None,
+        desc: bool = False,
+        filter_condition: Any = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Get one page of records with keyset pagination, plus the cursor of the next page"""
+        sort_key = order_by or self.pk_name
+        if sort_key not in self.column_names:
+            raise ValueError(f"Cannot order {self.model.__name__} by {sort_key}")
+        query = select(self.model)
+        if filter_condition is not None:
+            query = query.where(filter_condition)
+        query = paginate_keyset(
+            query,
+            sort_column=getattr(self.model, sort_key),
+            pk_column=self.pk,
+            sort_key=sort_key,
+            limit=limit,
+            cursor=cursor,
+            desc=desc,
+        )
+        result = await db.execute(query)
+        return keyset_page(
+            result.scalars().all(), sort_key=sort_key, pk_key=self.pk_name, limit=limit, desc=desc
+        )
+
+    async def get_count(self, db: AsyncSession) -> int:
         """Get total count of records"""
-        return db.query(self.model).count()
-    
-    async def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+        result = await db.execute(select(func.count()).select_from(self.model))
+        return result.scalar_one()
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
         """Create a new record"""
-        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data = obj_in if isinstance(obj_in, dict) else jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        await cache.invalidate(self.cache_namespace)
         return db_obj
-    
+
     async def update(
-        self, db: Session, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
-    ) -> ModelType:
-        """Update a record"""
-        obj_data = jsonable_encoder(db_obj)
+        self, db: AsyncSession, *, id: Any, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """Update a record with a single UPDATE ... RETURNING statement"""
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
-        
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+            update_data = obj_in.model_dump(exclude_unset=True)
+        values = {
+            field: value for field, value in update_data.items() if field in self.column_names
+        }
+        if not values:
+            return await self.get(db, id)
+
+        query = (
+            update(self.model)
+            .where(self.pk == id)
+            .values(**values)
+            .returning(self.model)
+        )
+        result = await db.execute(query, execution_options={"synchronize_session": "fetch"})
+        db_obj = result.scalar_one_or_none()
+        await db.commit()
+        await cache.invalidate(self.cache_namespace)
         return db_obj
-    
-    async def delete(self, db: Session, *, id: Any) -> ModelType:
-        """Delete a record by ID"""
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+
+    async def delete(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        """Delete a record by ID with a single DELETE ... RETURNING statement"""
+        query = (
+            delete(self.model)
+            .where(self.pk == id)
+            .returning(self.model)
+        )
+        result = await db.execute(query, execution_options={"synchronize_session": "fetch"})
+        obj = result.scalar_one_or_none()
+        await db.commit()
+        await cache.invalidate(self.cache_namespace)
         return obj
-    
+
     async def get_by_filter(
-        self, db: Session, *, filter_condition: Any, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, filter_condition: Any, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
         """Get records by a filter condition"""
-        return db.query(self.model).filter(filter_condition).offset(skip).limit(limit).all()
+        query = (
+            select(self.model)
+            .where(filter_condition)
+            .order_by(self.pk)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return list(result.scalars().all())
 
-    async def count_by_filter(self, db: Session, *, filter_condition: Any) -> int:
+    async def count_by_filter(self, db: AsyncSession, *, filter_condition: Any) -> int:
         """Count records by a filter condition"""
-        return db.query(self.model).filter(filter_condition).count()
\ No newline at end of file
+        query = select(func.count()).select_from(self.model).where(filter_condition)
+        result = await db.execute(query)
+        return result.scalar_one()
@@ -1,44 +1,57 @@
 from typing import List, Optional, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
+from app.cache import cache
 from app.models.department import Department
+from app.utils.pagination import keyset_page, paginate_keyset
 import logging
 
 logger = logging.getLogger(__name__)
 
 class DepartmentCRUD:
+    cache_namespace = Department.__tablename__
+
+    # Đọc thẳng các cột thành row mapping: không dựng ORM object, không tự format
+    # datetime; ResponseSerializer ở endpoint serialize một lần duy nhất
+    columns = tuple(Department.__table__.c)
+
+    @classmethod
+    def _to_dict(cls, department: Department) -> Dict:
+        return {column.key: getattr(department, column.key) for column in cls.columns}
+
     async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Dict]:
+        return await cache.get_or_load(
+            self.cache_namespace, f"all:{skip}:{limit}", lambda: self._get_all(db, skip, limit)
+        )
+
+    async def get_page(
+        self, db: AsyncSession, cursor: Optional[str] = None, limit: int = 100
+    ) -> Dict:
+        """Keyset page ordered by department_id: {"items": [...], "next_cursor": ...}"""
+        return await cache.get_or_load(
+            self.cache_namespace, f"page:{cursor}:{limit}", lambda: self._get_page(db, cursor, limit)
+        )
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[Dict]:
+        return await cache.get_or_load(self.cache_namespace, f"id:{id}", lambda: self._get(db, id))
+
+    async def get_by_slug(self, db: AsyncSession, slug: str) -> Optional[Dict]:
+        return await cache.get_or_load(
+            self.cache_namespace, f"slug:{slug}", lambda: self._get_by_slug(db, slug)
+        )
+
+    async def _get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Dict]:
         try:
             logger.info(f"Starting get_all with skip={skip}, limit={limit}")
             
-            query = select(Department).offset(skip).limit(limit)
+            query = select(*self.columns).offset(skip).limit(limit)
             logger.debug(f"Generated SQL query: {query}")
             
             result = await db.execute(query)
             logger.debug("Query executed successfully")
             
-            departments = result.scalars().all()
-            logger.info(f"Found {len(departments)} departments")
-            
-            # Debug first department if exists
-            if departments:
-                first_dept = departments[0]
-                logger.debug(f"First department data: id={first_dept.department_id}, name={first_dept.name}")
-            
-            result_list = [
-                {
-                    "department_id": dept.department_id,
-                    "name": dept.name,
-                    "slug": dept.slug,
-                    "description": dept.description,
-                    "created_at": dept.created_at.isoformat() if dept.created_at else None,
-                    "updated_at": dept.updated_at.isoformat() if dept.updated_at else None
-                }
-                for dept in departments
-            ]
-            
-            logger.debug(f"Converted {len(result_list)} departments to dict format")
-            logger.info("Successfully completed get_all operation")
+            result_list = [dict(row) for row in result.mappings()]
+            logger.info(f"Found {len(result_list)} departments")
             
             return result_list
         except Exception as e:
@@ -46,42 +59,37 @@ class DepartmentCRUD:
             logger.exception("Full traceback:")
             raise
 
-    async def get(self, db: AsyncSession, id: int) -> Optional[Dict]:
+    async def _get_page(self, db: AsyncSession, cursor: Optional[str], limit: int) -> Dict:
+        query = paginate_keyset(
+            select(*self.columns),
+            sort_column=Department.department_id,
+            pk_column=Department.department_id,
+            sort_key="department_id",
+            limit=limit,
+            cursor=cursor,
+        )
+        result = await db.execute(query)
+        departments, next_cursor = keyset_page(
+            result.mappings().all(), sort_key="department_id", pk_key="department_id", limit=limit
+        )
+        return {"items": [dict(row) for row in departments], "next_cursor": next_cursor}
+
+    async def _get(self, db: AsyncSession, id: int) -> Optional[Dict]:
         try:
-            query = select(Department).where(Department.department_id == id)
+            query = select(*self.columns).where(Department.department_id == id)
             result = await db.execute(query)
-            department = result.scalar_one_or_none()
-            
-            if department:
-                return {
-                    "department_id": department.department_id,
-                    "name": department.name,
-                    "slug": department.slug,
-                    "description": department.description,
-                    "created_at": department.created_at.isoformat() if department.created_at else None,
-                    "updated_at": department.updated_at.isoformat() if department.updated_at else None
-                }
-            return None
+            department = result.mappings().one_or_none()
+            return dict(department) if department else None
         except Exception as e:
             logger.error(f"Error in get department: {str(e)}")
             raise
 
-    async def get_by_slug(self, db: AsyncSession, slug: str) -> Optional[Dict]:
+    async def _get_by_slug(self, db: AsyncSession, slug: str) -> Optional[Dict]:
         try:
-            query = select(Department).where(Department.slug == slug)
+            query = select(*self.columns).where(Department.slug == slug)
             result = await db.execute(query)
-            department = result.scalar_one_or_none()
-            
-            if department:
-                return {
-                    "department_id": department.department_id,
-                    "name": department.name,
-                    "slug": department.slug,
-                    "description": department.description,
-                    "created_at": department.created_at.isoformat() if department.created_at else None,
-                    "updated_at": department.updated_at.isoformat() if department.updated_at else None
-                }
-            return None
+            department = result.mappings().one_or_none()
+            return dict(department) if department else None
         except Exception as e:
             logger.error(f"Error in get department by slug: {str(e)}")
             raise
@@ -92,15 +100,9 @@ class DepartmentCRUD:
             db.add(department)
             await db.commit()
             await db.refresh(department)
+            await cache.invalidate(self.cache_namespace)
             
-            return {
-                "department_id": department.department_id,
-                "name": department.name,
-                "slug": department.slug,
-                "description": department.description,
-                "created_at": department.created_at.isoformat() if department.created_at else None,
-                "updated_at": department.updated_at.isoformat() if department.updated_at else None
-            }
+            return self._to_dict(department)
         except Exception as e:
             logger.error(f"Error in create department: {str(e)}")
             raise
@@ -120,15 +122,9 @@ class DepartmentCRUD:
             
             await db.commit()
             await db.refresh(department)
+            await cache.invalidate(self.cache_namespace)
             
-            return {
-                "department_id": department.department_id,
-                "name": department.name,
-                "slug": department.slug,
-                "description": department.description,
-                "created_at": department.created_at.isoformat() if department.created_at else None,
-                "updated_at": department.updated_at.isoformat() if department.updated_at else None
-            }
+            return self._to_dict(department)
         except Exception as e:
             logger.error(f"Error in update department: {str(e)}")
             raise
@@ -147,15 +143,9 @@ class DepartmentCRUD:
             delete_query = delete(Department).where(Department.department_id == id)
             await db.execute(delete_query)
             await db.commit()
+            await cache.invalidate(self.cache_namespace)
             
-            return {
-                "department_id": department.department_id,
-                "name": department.name,
-                "slug": department.slug,
-                "description": department.description,
-                "created_at": department.created_at.isoformat() if department.created_at else None,
-                "updated_at": department.updated_at.isoformat() if department.updated_at else None
-            }
+            return self._to_dict(department)
         except Exception as e:
             logger.error(f"Error in delete department: {str(e)}")
             await db.rollback()
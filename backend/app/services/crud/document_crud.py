@@ -0,0 +1,248 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, distinct, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.document import Document
+from app.models.document_tag import DocumentTag
+from app.models.tag import Tag
+from app.schemas.document import DocumentCreate, DocumentFilterRequest, DocumentUpdate
+from app.schemas.user import User
+from app.cache import cache
+from app.services import notifications, ratings, search, storage
+from app.services.crud.base_crud import CRUDBase
+from app.services.loaders import Loaders
+from app.utils.pagination import keyset_page, paginate_keyset
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Các cột được phép sắp xếp trên trang danh sách
+SORTABLE_COLUMNS = {
+    "created_at": Document.created_at,
+    "title": Document.title,
+    "view_count": Document.view_count,
+    "download_count": Document.download_count,
+    "file_size": Document.file_size,
+}
+
+
+class CRUDDocument(CRUDBase[Document, DocumentCreate, DocumentUpdate]):
+    async def create(
+        self, db: AsyncSession, *, obj_in: Union[DocumentCreate, Dict[str, Any]]
+    ) -> Document:
+        obj_in_data = obj_in if isinstance(obj_in, dict) else jsonable_encoder(obj_in)
+        # "tags" thuộc bảng document_tags, không phải cột của documents
+        document = await super().create(
+            db, obj_in={k: v for k, v in obj_in_data.items() if k in self.column_names}
+        )
+        await search.index_document(db, document)
+        return document
+
+    async def create_uploaded(
+        self, db: AsyncSession, *, obj_in: DocumentCreate, user_id: int, upload: storage.HashingFile
+    ) -> Document:
+        """
+        Store an uploaded file and create its document and tags in one transaction.
+
+        Identical content is stored once: the blob's reference count is bumped
+        and the new upload is discarded.
+        """
+        now = utcnow()
+        try:
+            blob = await storage.store_blob(db, upload)
+            document = Document(
+                **obj_in.model_dump(exclude={"tags", "file_path", "file_size"}),
+                file_path=blob.file_path,
+                file_size=blob.size,
+                user_id=user_id,
+                status="pending",
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(document)
+            await db.flush()
+            if obj_in.tags:
+                await self._attach_tags(db, document.document_id, obj_in.tags, now)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        await cache.invalidate(self.cache_namespace)
+        await search.index_document(db, document)
+        return await self.get_with_details(db, document.document_id)
+
+    async def _attach_tags(self, db: AsyncSession, document_id: int, names: List[str], now: datetime) -> None:
+        names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+        result = await db.execute(select(Tag.tag_id, Tag.tag_name).where(Tag.tag_name.in_(names)))
+        tag_ids = {row.tag_name: row.tag_id for row in result}
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            result = await db.execute(
+                insert(Tag)
+                .values([{"tag_name": name, "created_at": now} for name in missing])
+                .returning(Tag.tag_id, Tag.tag_name)
+            )
+            tag_ids.update({row.tag_name: row.tag_id for row in result})
+        await db.execute(insert(DocumentTag).values([
+            {"document_id": document_id, "tag_id": tag_ids[name], "created_at": now} for name in names
+        ]))
+
+    async def update(
+        self, db: AsyncSession, *, id: Any, obj_in: Union[DocumentUpdate, Dict[str, Any]]
+    ) -> Optional[Document]:
+        document = await super().update(db, id=id, obj_in=obj_in)
+        if document is not None:
+            await search.index_document(db, document)
+            if self._sets_status(obj_in, "approved"):
+                try:
+                    await notifications.enqueue_document_approved(document.document_id)
+                except Exception:
+                    # Tài liệu đã được duyệt (đã commit): lỗi hàng đợi không làm hỏng request
+                    logger.exception(f"Could not queue notifications for document {document.document_id}")
+        return document
+
+    @staticmethod
+    def _sets_status(obj_in: Union[DocumentUpdate, Dict[str, Any]], status: str) -> bool:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        return data.get("status") == status
+
+    async def delete(self, db: AsyncSession, *, id: Any) -> Optional[Document]:
+        """
+        Delete the document and release its blob in one transaction; the file
+        is unlinked only after that commit, if no other document uses it.
+        """
+        result = await db.execute(
+            delete(Document).where(Document.document_id == id).returning(Document),
+            execution_options={"synchronize_session": "fetch"},
+        )
+        document = result.scalar_one_or_none()
+        if document is None:
+            return None
+        orphaned = await storage.release_blobs(db, [document.file_path])
+        await db.commit()
+        await cache.invalidate(self.cache_namespace)
+        await search.remove_document(db, document.document_id)
+        await storage.remove_orphans(db, orphaned)
+        return document
+
+    def filter_conditions(self, filters: DocumentFilterRequest) -> List[Any]:
+        conditions = []
+        if filters.subject_id is not None:
+            conditions.append(Document.subject_id == filters.subject_id)
+        if filters.user_id is not None:
+            conditions.append(Document.user_id == filters.user_id)
+        if filters.status is not None:
+            conditions.append(Document.status == filters.status.value)
+        if filters.tags:
+            tag_names = set(filters.tags)
+            # Tài liệu phải có đủ tất cả các tag được chọn
+            tagged = (
+                select(DocumentTag.document_id)
+                .join(Tag, Tag.tag_id == DocumentTag.tag_id)
+                .where(Tag.tag_name.in_(tag_names))
+                .group_by(DocumentTag.document_id)
+                .having(func.count(distinct(Tag.tag_id)) == len(tag_names))
+            )
+            conditions.append(Document.document_id.in_(tagged))
+        if filters.search:
+            pattern = f"%{filters.search}%"
+            conditions.append(or_(Document.title.ilike(pattern), Document.description.ilike(pattern)))
+        if filters.created_after is not None:
+            conditions.append(Document.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            conditions.append(Document.created_at < filters.created_before)
+        return conditions
+
+    @staticmethod
+    def visibility_conditions(filters: DocumentFilterRequest, viewer: Optional[User]) -> List[Any]:
+        """
+        Same rule as the detail page: unapproved documents are listed only to
+        admins and to their uploader filtering on their own ``user_id``.
+        Everyone else gets ``status = 'approved'``, which the
+        ``(status, created_at, document_id)`` index serves in keyset order.
+        """
+        if viewer is not None and (viewer.role == "admin" or filters.user_id == viewer.user_id):
+            return []
+        return [Document.status == "approved"]
+
+    async def get_with_details(
+        self, db: AsyncSession, id: int, *, loaders: Optional[Loaders] = None
+    ) -> Optional[Document]:
+        """Get one document with the same nested objects as the list page"""
+        return await (loaders or Loaders(db)).documents.load(id)
+
+    async def list_documents(
+        self,
+        db: AsyncSession,
+        *,
+        filters: DocumentFilterRequest,
+        viewer: Optional[User] = None,
+        loaders: Optional[Loaders] = None,
+    ) -> Dict:
+        """
+        Resolve a ``DocumentFilterRequest`` as ``viewer`` (``None``: anonymous)
+        with a fixed number of round-trips.
+
+        1. One narrow query applies every filter and the visibility rule, the
+           ordering and keyset pagination, and returns only the page's ids plus
+           the total count (an uncorrelated scalar subquery, computed once).
+           Pages after the first are reached through ``next_cursor`` only:
+           ``page > 1`` without a cursor is rejected instead of falling back
+           to ``OFFSET``, which reads and discards every skipped row.
+        2. ``loaders.documents`` loads those documents with ``average_rating``
+           read from their ``document_rating_stats`` rows, then their subjects,
+           authors and tags with one ``IN`` query per entity type (skipping
+           what the request's loaders already hold).
+        """
+        order_key = filters.order_by or "created_at"
+        if order_key not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot order documents by {order_key}")
+        sort_column = SORTABLE_COLUMNS[order_key]
+        if filters.cursor is None and filters.page != 1:
+            raise ValueError("Only the first page has a number; pass next_cursor as cursor for the next ones")
+
+        conditions = self.filter_conditions(filters) + self.visibility_conditions(filters, viewer)
+        total = (
+            select(func.count()).select_from(Document).where(*conditions).scalar_subquery()
+        )
+        query = select(Document.document_id, sort_column, total.label("total")).where(*conditions)
+
+        query = paginate_keyset(
+            query,
+            sort_column=sort_column,
+            pk_column=Document.document_id,
+            sort_key=order_key,
+            limit=filters.per_page,
+            cursor=filters.cursor,
+            desc=filters.order_desc,
+        )
+        rows, next_cursor = keyset_page(
+            (await db.execute(query)).all(),
+            sort_key=order_key,
+            pk_key="document_id",
+            limit=filters.per_page,
+            desc=filters.order_desc,
+        )
+
+        if rows:
+            total_count = rows[0].total
+            loaded = await (loaders or Loaders(db)).documents.load_many([row.document_id for row in rows])
+            documents = [document for document in loaded if document is not None]
+        else:
+            total_count = (
+                await db.execute(select(func.count()).select_from(Document).where(*conditions))
+            ).scalar_one()
+            documents = []
+
+        return {
+            "documents": documents,
+            "total": total_count,
+            "page": filters.page,
+            "per_page": filters.per_page,
+            "next_cursor": next_cursor,
+        }
+
+
+document_crud = CRUDDocument(Document)
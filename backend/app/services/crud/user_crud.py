@@ -1,43 +1,110 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional, Tuple, Union
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import cache
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
 from app.services.crud.base_crud import CRUDBase
-from app.core.security import get_password_hash, verify_password
+from app.core.security import hash_password, verify_and_update_password
+from app.utils.helpers import utcnow
+
+# Principal (user đã xác thực) được cache theo user_id, TTL ngắn: CACHE_TTLS["principals"]
+PRINCIPAL_NAMESPACE = "principals"
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-    # Remove async from these methods since SQLAlchemy operations are synchronous
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
-    
-    def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
-        return db.query(User).filter(User.username == username).first()
-    
-    def get_by_google_id(self, db: Session, *, google_id: str) -> Optional[User]:
-        return db.query(User).filter(User.google_id == google_id).first()
-    
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    async def get_principal(self, db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Public profile of an authenticated user (no password hash), read through the cache.
+
+        Writes to the user drop the entry; other worker processes may serve
+        their local copy for up to ``CACHE_LOCAL_TTL`` seconds afterwards.
+        """
+        return await cache.get_or_load(
+            PRINCIPAL_NAMESPACE, f"user:{user_id}", lambda: self._get_principal(db, user_id)
+        )
+
+    async def _get_principal(self, db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+        user = await self.get(db, user_id)
+        if user is None:
+            return None
+        return UserSchema.model_validate(user).model_dump(mode="json")
+
+    async def invalidate_principal(self, user_id: int) -> None:
+        await cache.delete(PRINCIPAL_NAMESPACE, f"user:{user_id}")
+
+    async def update(
+        self, db: AsyncSession, *, id: Any, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> Optional[User]:
+        # Ban, đổi role... phải có hiệu lực ngay cho các request tiếp theo
+        user = await super().update(db, id=id, obj_in=obj_in)
+        await self.invalidate_principal(id)
+        return user
+
+    async def delete(self, db: AsyncSession, *, id: Any) -> Optional[User]:
+        user = await super().delete(db, id=id)
+        await self.invalidate_principal(id)
+        return user
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email).limit(1))
+        return result.scalar_one_or_none()
+
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username).limit(1))
+        return result.scalar_one_or_none()
+
+    async def get_by_google_id(self, db: AsyncSession, *, google_id: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.google_id == google_id).limit(1))
+        return result.scalar_one_or_none()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
             username=obj_in.username,
-            password_hash=get_password_hash(obj_in.password),
+            password_hash=await hash_password(obj_in.password),
             full_name=obj_in.full_name,
             role=obj_in.role,
             university_id=obj_in.university_id
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
-    
-    def update_last_login(self, db: Session, *, user_id: int):
-        from datetime import datetime
-        db.query(User).filter(User.user_id == user_id).update(
-            {User.last_login: datetime.utcnow()}
+
+    async def update_last_login(
+        self, db: AsyncSession, *, user_id: int, password_hash: Optional[str] = None
+    ):
+        """Stamp last_login; ``password_hash`` (a rehash at the new cost) is saved in the same UPDATE"""
+        values = {"last_login": utcnow()}
+        if password_hash:
+            values["password_hash"] = password_hash
+        await db.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        await self.invalidate_principal(user_id)
+
+    async def authenticate(
+        self, db: AsyncSession, *, login: str, password: str
+    ) -> Tuple[Optional[User], Optional[str]]:
+        """
+        Find a user by username or email and check the password off the event loop.
+
+        Returns ``(user, new_hash)``: ``user`` is None when the credentials are
+        wrong, ``new_hash`` is set when the stored hash must be upgraded.
+        """
+        user = await self.get_by_username(db, username=login)
+        if not user:
+            user = await self.get_by_email(db, email=login)
+        valid, new_hash = await verify_and_update_password(
+            password, user.password_hash if user else None
         )
-        db.commit()
-    
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return verify_password(plain_password, hashed_password)
+        if not valid:
+            return None, None
+        return user, new_hash
 
-user_crud = CRUDUser(User)
\ No newline at end of file
+user_crud = CRUDUser(User)
@@ -0,0 +1,195 @@
+# app/services/forums.py
+"""
+Read paths of the subject forums, each with a fixed number of queries.
+
+Rows are read as column mappings (no ORM objects for posts and replies);
+reply counts and reply pages come from window functions, and the nested
+subjects and authors come from the request's ``Loaders`` (one ``IN`` query
+per entity type, memoized for the request):
+
+* ``list_forums``: forums with their post counts (grouped subquery), then
+  the subjects with their major and academic year,
+* ``list_posts``: one keyset page of posts; the first ``replies_per_post``
+  replies of every post on the page together with the reply counts, from a
+  ``ROW_NUMBER()`` / ``COUNT(*) OVER (PARTITION BY post_id)`` query; then the
+  authors of posts and replies,
+* ``get_thread``: the post with its reply count, one keyset page of its
+  replies, then the authors.
+
+Only approved posts and replies are listed and counted.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.forum import Forum
+from app.models.forum_post import ForumPost
+from app.models.forum_reply import ForumReply
+from app.services.loaders import Loaders
+from app.utils.pagination import keyset_page, paginate_keyset
+
+APPROVED = "approved"
+
+FORUM_COLUMNS = tuple(Forum.__table__.c)
+POST_COLUMNS = tuple(ForumPost.__table__.c)
+REPLY_COLUMNS = tuple(ForumReply.__table__.c)
+
+
+def _reply_count(post_id_column) -> Any:
+    return (
+        select(func.count())
+        .where(ForumReply.post_id == post_id_column, ForumReply.status == APPROVED)
+        .scalar_subquery()
+    )
+
+
+async def list_forums(
+    db: AsyncSession, *, subject_id: Optional[int] = None, loaders: Optional[Loaders] = None
+) -> List[Dict]:
+    """Every forum (optionally of one subject) with its subject and number of approved posts"""
+    post_counts = (
+        select(ForumPost.forum_id, func.count().label("post_count"))
+        .where(ForumPost.status == APPROVED)
+        .group_by(ForumPost.forum_id)
+        .subquery("post_counts")
+    )
+    query = (
+        select(*FORUM_COLUMNS, func.coalesce(post_counts.c.post_count, 0).label("post_count"))
+        .outerjoin(post_counts, post_counts.c.forum_id == Forum.forum_id)
+        .order_by(Forum.forum_id)
+    )
+    if subject_id is not None:
+        query = query.where(Forum.subject_id == subject_id)
+    forums = [dict(row) for row in (await db.execute(query)).mappings()]
+    await (loaders or Loaders(db)).subjects.attach(forums, "subject_id", "subject")
+    return forums
+
+
+async def first_replies(db: AsyncSession, post_ids: List[int], limit: int) -> Dict[int, Dict]:
+    """
+    ``{post_id: {"reply_count": n, "replies": [...]}}`` with the first ``limit``
+    approved replies (oldest first) of each post, in one windowed query.
+    Posts without replies are absent.
+    """
+    if not post_ids:
+        return {}
+    ranked = (
+        select(
+            *REPLY_COLUMNS,
+            func.row_number().over(
+                partition_by=ForumReply.post_id, order_by=(ForumReply.created_at, ForumReply.reply_id)
+            ).label("position"),
+            func.count().over(partition_by=ForumReply.post_id).label("reply_count"),
+        )
+        .where(ForumReply.post_id.in_(post_ids), ForumReply.status == APPROVED)
+        .subquery("ranked")
+    )
+    # Luôn lấy ít nhất dòng đầu của mỗi bài để có reply_count, kể cả khi limit = 0
+    result = await db.execute(
+        select(ranked)
+        .where(ranked.c.position <= max(limit, 1))
+        .order_by(ranked.c.post_id, ranked.c.position)
+    )
+    threads: Dict[int, Dict] = {}
+    for row in result.mappings():
+        thread = threads.setdefault(row["post_id"], {"reply_count": row["reply_count"], "replies": []})
+        if row["position"] <= limit:
+            thread["replies"].append({column.key: row[column.key] for column in REPLY_COLUMNS})
+    return threads
+
+
+async def list_posts(
+    db: AsyncSession,
+    forum_id: int,
+    *,
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    replies_per_post: int = 3,
+    loaders: Optional[Loaders] = None,
+) -> Optional[Dict]:
+    """
+    Newest approved posts of a forum (keyset page), each with its reply
+    count, first replies and authors. ``None`` when the forum does not exist.
+    """
+    count = select(func.count()).where(ForumPost.forum_id == forum_id, ForumPost.status == APPROVED)
+    query = paginate_keyset(
+        select(*POST_COLUMNS, count.scalar_subquery().label("total"))
+        .where(ForumPost.forum_id == forum_id, ForumPost.status == APPROVED),
+        sort_column=ForumPost.created_at,
+        pk_column=ForumPost.post_id,
+        sort_key="created_at",
+        limit=per_page,
+        cursor=cursor,
+        desc=True,
+    )
+    rows, next_cursor = keyset_page(
+        [dict(row) for row in (await db.execute(query)).mappings()],
+        sort_key="created_at",
+        pk_key="post_id",
+        limit=per_page,
+        desc=True,
+    )
+    if not rows:
+        if await db.get(Forum, forum_id) is None:
+            return None
+        # Cursor đã qua trang cuối: không có dòng nào mang total, đếm riêng
+        return {"posts": [], "total": await db.scalar(count), "next_cursor": None}
+
+    total_count = rows[0]["total"]
+    threads = await first_replies(db, [row["post_id"] for row in rows], replies_per_post)
+    posts = [
+        {
+            **{column.key: row[column.key] for column in POST_COLUMNS},
+            **threads.get(row["post_id"], {"reply_count": 0, "replies": []}),
+        }
+        for row in rows
+    ]
+    replies = [reply for post in posts for reply in post["replies"]]
+    # Tác giả của bài viết và trả lời: một câu IN duy nhất
+    users = (loaders or Loaders(db)).users
+    users.want(row["user_id"] for row in [*posts, *replies])
+    await users.attach(posts, "user_id", "user")
+    await users.attach(replies, "user_id", "user")
+    return {"posts": posts, "total": total_count, "next_cursor": next_cursor}
+
+
+async def get_thread(
+    db: AsyncSession,
+    post_id: int,
+    *,
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    loaders: Optional[Loaders] = None,
+) -> Optional[Dict]:
+    """
+    An approved post with its reply count and one keyset page of its approved
+    replies (oldest first), authors included. ``None`` when there is no such post.
+    """
+    post = (await db.execute(
+        select(*POST_COLUMNS, _reply_count(ForumPost.post_id).label("reply_count"))
+        .where(ForumPost.post_id == post_id, ForumPost.status == APPROVED)
+    )).mappings().first()
+    if post is None:
+        return None
+
+    query = paginate_keyset(
+        select(*REPLY_COLUMNS).where(ForumReply.post_id == post_id, ForumReply.status == APPROVED),
+        sort_column=ForumReply.created_at,
+        pk_column=ForumReply.reply_id,
+        sort_key="created_at",
+        limit=per_page,
+        cursor=cursor,
+    )
+    replies, next_cursor = keyset_page(
+        [dict(row) for row in (await db.execute(query)).mappings()],
+        sort_key="created_at",
+        pk_key="reply_id",
+        limit=per_page,
+    )
+    post = dict(post)
+    users = (loaders or Loaders(db)).users
+    users.want(row["user_id"] for row in [post, *replies])
+    await users.attach([post], "user_id", "user")
+    await users.attach(replies, "user_id", "user")
+    return {"post": post, "replies": replies, "next_cursor": next_cursor}
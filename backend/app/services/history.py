@@ -0,0 +1,204 @@
+# app/services/history.py
+"""
+Maintenance of ``document_history``, the append-only view/download log.
+
+On Postgres the table is range-partitioned by month on ``created_at``
+(``document_history_pYYYYMM``; the rows from before partitioning live in
+``document_history_legacy``, bounded ``MINVALUE .. <first partition>``).
+``maintain_history`` runs every ``HISTORY_MAINTENANCE_INTERVAL`` seconds:
+
+* ``ensure_partitions`` creates the partitions of the current month and the
+  next ``HISTORY_PARTITIONS_AHEAD`` months, so inserts never hit a missing
+  partition,
+* ``rollup`` compacts every finished day into ``document_history_daily``
+  (events and distinct users per document, day and action). Each run
+  recomputes from the last rolled-up day, which also picks up events the
+  write-behind buffer flushed late,
+* ``drop_expired`` removes raw data older than ``HISTORY_RETENTION_DAYS``
+  but never past the rolled-up days. A partition goes away with one
+  ``DROP TABLE`` once all of its month is expired. On a table that is not
+  partitioned (SQLite, schemas made by ``create_all``) it falls back to a
+  ``DELETE``.
+
+Workers of the same deployment serialize on a transaction-level advisory lock.
+"""
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, distinct, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.document_history import DocumentHistory
+from app.models.document_history_daily import DocumentHistoryDaily
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+TABLE = DocumentHistory.__tablename__
+# Khóa pg_advisory_xact_lock của các bước bảo trì
+HISTORY_LOCK_KEY = 7_140_023
+# Số ngày gộp trong một transaction
+ROLLUP_CHUNK_DAYS = 7
+
+PARTITION_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+# (tên, cận dưới hoặc None cho MINVALUE, cận trên)
+Partition = Tuple[str, Optional[datetime], datetime]
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """First instant (UTC) of the month of ``moment``, shifted by ``months``"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time(), tzinfo=timezone.utc)
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def _lock(db: AsyncSession) -> None:
+    if _is_postgres(db):
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": HISTORY_LOCK_KEY})
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if not _is_postgres(db):
+        return False
+    kind = await db.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": TABLE})
+    return kind.scalar() == "p"
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value == "MINVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+async def list_partitions(db: AsyncSession) -> List[Partition]:
+    """Range partitions of ``document_history`` sorted by lower bound (DEFAULT partition excluded)"""
+    # Cận của partition được in theo TimeZone của phiên
+    await db.execute(text("SELECT set_config('TimeZone', 'UTC', true)"))
+    result = await db.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": TABLE})
+    partitions = []
+    for name, bound in result.all():
+        match = PARTITION_BOUND.search(bound or "")
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1] or datetime.min.replace(tzinfo=timezone.utc))
+
+
+async def ensure_partitions(db: AsyncSession, now: datetime, ahead: int) -> List[str]:
+    """Create the missing monthly partitions up to ``ahead`` months after ``now`` (commits)"""
+    await _lock(db)
+    partitions = await list_partitions(db)
+    created = []
+    for months in range(ahead + 1):
+        lower, upper = month_start(now, months), month_start(now, months + 1)
+        if any((low is None or low <= lower) and lower < high for _, low, high in partitions):
+            continue
+        name = partition_name(lower)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        partitions.append((name, lower, upper))
+        created.append(name)
+    await db.commit()
+    return created
+
+
+async def rollup(db: AsyncSession, now: datetime) -> Optional[date]:
+    """
+    Recompute ``document_history_daily`` for every finished day since the
+    last rolled-up one, ``ROLLUP_CHUNK_DAYS`` per transaction (commits).
+    Returns the first day that is not rolled up yet (today), or None when
+    there is nothing to roll up.
+    """
+    today = now.astimezone(timezone.utc).date()
+    last = (await db.execute(select(func.max(DocumentHistoryDaily.day)))).scalar()
+    if last is None:
+        first = (await db.execute(select(func.min(DocumentHistory.created_at)))).scalar()
+        if first is None:
+            return None
+        last = first.astimezone(timezone.utc).date() if first.tzinfo else first.date()
+    await db.rollback()
+
+    if _is_postgres(db):
+        day = cast(func.timezone("UTC", DocumentHistory.created_at), Date)
+    else:
+        day = func.date(DocumentHistory.created_at)
+    columns = ["document_id", "day", "action", "events", "users", "updated_at"]
+    start = last
+    while start < today:
+        end = min(start + timedelta(days=ROLLUP_CHUNK_DAYS), today)
+        await _lock(db)
+        # Xóa rồi ghi lại trong cùng transaction, như rollup của stat_counters
+        await db.execute(delete(DocumentHistoryDaily).where(
+            DocumentHistoryDaily.day >= start, DocumentHistoryDaily.day < end
+        ))
+        await db.execute(insert(DocumentHistoryDaily).from_select(columns, (
+            select(
+                DocumentHistory.document_id,
+                day,
+                DocumentHistory.action,
+                func.count(),
+                func.count(distinct(DocumentHistory.user_id)),
+                literal(utcnow()),
+            )
+            .where(DocumentHistory.created_at >= _day_start(start), DocumentHistory.created_at < _day_start(end))
+            .group_by(DocumentHistory.document_id, day, DocumentHistory.action)
+        )))
+        await db.commit()
+        start = end
+    return today
+
+
+async def drop_expired(db: AsyncSession, cutoff: datetime) -> Dict[str, Any]:
+    """
+    Remove raw history before ``cutoff``: whole partitions on Postgres
+    (never the one ``cutoff`` falls in), a ``DELETE`` otherwise (commits).
+    """
+    if not await is_partitioned(db):
+        result = await db.execute(delete(DocumentHistory).where(DocumentHistory.created_at < cutoff))
+        await db.commit()
+        return {"deleted_rows": result.rowcount}
+
+    await _lock(db)
+    dropped = []
+    for name, _, upper in await list_partitions(db):
+        if upper <= cutoff:
+            await db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    await db.commit()
+    return {"dropped_partitions": dropped}
+
+
+async def maintain_history(session_factory: async_sessionmaker) -> Dict[str, Any]:
+    """Periodic job: create partitions ahead, roll finished days up, apply retention"""
+    now = utcnow()
+    summary: Dict[str, Any] = {}
+    async with session_factory() as db:
+        if await is_partitioned(db):
+            summary["created_partitions"] = await ensure_partitions(db, now, settings.HISTORY_PARTITIONS_AHEAD)
+        rolled_until = await rollup(db, now)
+        if settings.HISTORY_RETENTION_DAYS is not None and rolled_until is not None:
+            # Không bỏ dữ liệu thô của ngày chưa được gộp
+            cutoff = min(now - timedelta(days=settings.HISTORY_RETENTION_DAYS), _day_start(rolled_until))
+            summary.update(await drop_expired(db, cutoff))
+    if summary.get("created_partitions") or summary.get("dropped_partitions") or summary.get("deleted_rows"):
+        logger.info(f"document_history maintenance: {summary}")
+    return summary
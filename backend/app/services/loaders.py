@@ -0,0 +1,171 @@
+# app/services/loaders.py
+"""
+Request-scoped batching of the nested objects of responses.
+
+A ``BatchLoader`` reads one entity type by key: keys are queued while a
+response is built (``want``), every key not seen yet in this request is
+fetched with one ``IN`` query (``dispatch``), and results, misses included,
+are memoized for the rest of the request. ``attach`` does all three for a
+list of rows and sets the nested value on each row, whether the row is an
+ORM object (``set_committed_value``, so nothing is lazy-loaded or flushed)
+or a dict built from column mappings.
+
+``Loaders`` groups the loaders of one request; endpoints get it from
+``app.dependencies.loaders.get_loaders``:
+
+* ``users``: ``User`` by ``user_id`` (``Rating.user``, ``ForumPost.user``, ...),
+* ``subjects``: ``Subject`` by ``subject_id`` with its major and academic year,
+* ``document_tags``: the ``Tag`` list of a document, by ``document_id``,
+* ``documents``: ``Document`` by ``document_id`` (``SharedLink.document``, ...),
+  with rating fields, subject, author and tags; the nested objects go through
+  the loaders above, so authors already loaded in the request are not read again.
+
+The session cannot run statements concurrently, so batches are explicit:
+collect the keys of a whole page, then dispatch once.
+"""
+from typing import (
+    Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Sequence, TypeVar,
+)
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, noload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.document import Document
+from app.models.document_tag import DocumentTag
+from app.models.subject import Subject
+from app.models.tag import Tag
+from app.models.user import User
+from app.services import ratings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def _get(item: Any, key: str) -> Any:
+    return item[key] if isinstance(item, dict) else getattr(item, key)
+
+
+def _set(item: Any, key: str, value: Any) -> None:
+    if isinstance(item, dict):
+        item[key] = value
+    else:
+        set_committed_value(item, key, value)
+
+
+class BatchLoader(Generic[K, V]):
+    """Memoized, batched lookups of one entity type by key"""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        default: Callable[[], Any] = lambda: None,
+    ):
+        self._fetch = fetch
+        self._default = default
+        self._cache: Dict[K, Any] = {}
+        self._pending: Dict[K, None] = {}
+
+    def want(self, keys: Iterable[Optional[K]]) -> None:
+        """Queue keys for the next ``dispatch``; known and ``None`` keys are skipped"""
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._pending[key] = None
+
+    def prime(self, key: K, value: V) -> None:
+        """Remember a value already loaded by other means"""
+        self._cache[key] = value
+        self._pending.pop(key, None)
+
+    async def dispatch(self) -> None:
+        """Fetch every queued key in one query"""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        found = await self._fetch(keys)
+        for key in keys:
+            self._cache[key] = found[key] if key in found else self._default()
+
+    async def load_many(self, keys: Sequence[Optional[K]]) -> List[Any]:
+        self.want(keys)
+        await self.dispatch()
+        return [self._cache[key] if key is not None else self._default() for key in keys]
+
+    async def load(self, key: Optional[K]) -> Any:
+        return (await self.load_many([key]))[0]
+
+    async def attach(self, items: Sequence[Any], key: str, attr: str) -> None:
+        """Set ``item.<attr>`` (or ``item[attr]``) to the value for ``item.<key>`` on every item"""
+        values = await self.load_many([_get(item, key) for item in items])
+        for item, value in zip(items, values):
+            _set(item, attr, value)
+
+
+class Loaders:
+    """The batch loaders of one request, sharing its session"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.users: BatchLoader[int, User] = BatchLoader(self._fetch_users)
+        self.subjects: BatchLoader[int, Subject] = BatchLoader(self._fetch_subjects)
+        self.document_tags: BatchLoader[int, List[Tag]] = BatchLoader(self._fetch_document_tags, default=list)
+        self.documents: BatchLoader[int, Document] = BatchLoader(self._fetch_documents)
+
+    async def _fetch_users(self, ids: List[int]) -> Dict[int, User]:
+        result = await self.db.execute(select(User).where(User.user_id.in_(ids)))
+        return {user.user_id: user for user in result.scalars()}
+
+    async def _fetch_subjects(self, ids: List[int]) -> Dict[int, Subject]:
+        # Ngành và năm học là many-to-one: JOIN ngay trong cùng câu truy vấn
+        result = await self.db.execute(
+            select(Subject)
+            .where(Subject.subject_id.in_(ids))
+            .options(joinedload(Subject.major), joinedload(Subject.academic_year), noload(Subject.departments))
+        )
+        return {subject.subject_id: subject for subject in result.scalars()}
+
+    async def _fetch_document_tags(self, ids: List[int]) -> Dict[int, List[Tag]]:
+        result = await self.db.execute(
+            select(DocumentTag.document_id, Tag)
+            .join(Tag, Tag.tag_id == DocumentTag.tag_id)
+            .where(DocumentTag.document_id.in_(ids))
+            .order_by(DocumentTag.document_id, Tag.tag_id)
+        )
+        tags: Dict[int, List[Tag]] = {}
+        for document_id, tag in result.all():
+            tags.setdefault(document_id, []).append(tag)
+        return tags
+
+    async def _fetch_documents(self, ids: List[int]) -> Dict[int, Document]:
+        result = await self.db.execute(
+            select(Document)
+            .where(Document.document_id.in_(ids))
+            .options(*document_rating_options())
+        )
+        documents = list(result.scalars())
+        await self.attach_document_relations(documents)
+        return {document.document_id: document for document in documents}
+
+    async def attach_document_relations(self, documents: Sequence[Document]) -> None:
+        """Subject, author and tags of every document: one query per entity type at most"""
+        if not documents:
+            return
+        await self.subjects.attach(documents, "subject_id", "subject")
+        await self.users.attach(documents, "user_id", "user")
+        await self.document_tags.attach(documents, "document_id", "tags")
+
+
+def document_rating_options() -> List[Any]:
+    """
+    Options for loading ``Document`` rows for the response: the rating fields
+    are read in the same query, nested objects are left to ``Loaders``.
+    """
+    return [
+        noload(Document.subject),
+        noload(Document.user),
+        noload(Document.tags),
+        with_expression(Document.average_rating, ratings.average_rating_expression()),
+        with_expression(Document.rating_count, ratings.rating_count_expression()),
+    ]
@@ -0,0 +1,272 @@
+# app/services/moderation.py
+"""
+Set-based bulk moderation of documents.
+
+Approve and reject run inside the request. Each chunk of
+``MODERATION_CHUNK_SIZE`` ids costs a fixed number of statements:
+
+* one ``UPDATE documents ... WHERE document_id = ANY(:ids) RETURNING``
+  (``IN (...)`` outside Postgres),
+* one ``SELECT`` to tell unchanged ids from missing ones,
+* one multi-row ``INSERT`` into ``document_history`` (the moderator's action),
+* one multi-row ``INSERT`` into ``notifications`` (one per uploader).
+
+Followers of newly approved documents are notified by one queued task.
+
+Delete can touch many dependent rows, so it runs as a ``moderation.bulk_delete``
+task. The task commits chunk by chunk and records its progress in ``bulk_jobs``.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, any_, bindparam, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.background.queue import enqueue, task
+from app.cache import cache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.bulk_job import BulkJob
+from app.models.comment import Comment
+from app.models.document import Document
+from app.models.document_history import DocumentHistory
+from app.models.document_history_daily import DocumentHistoryDaily
+from app.models.document_rating_stats import DocumentRatingStats
+from app.models.document_tag import DocumentTag
+from app.models.notification import Notification
+from app.models.rating import Rating
+from app.models.shared_link import SharedLink
+from app.schemas.common import BulkOperationType
+from app.services import notifications, search, storage
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+QUEUED = "queued"
+
+TARGET_STATUS = {
+    BulkOperationType.approve: "approved",
+    BulkOperationType.reject: "rejected",
+}
+NOTIFICATION_TITLES = {
+    BulkOperationType.approve: "Tài liệu của bạn đã được duyệt",
+    BulkOperationType.reject: "Tài liệu của bạn bị từ chối",
+    BulkOperationType.delete: "Tài liệu của bạn đã bị xóa",
+}
+MODERATION_NOTIFICATION = "document_moderation"
+
+# Bảng con của documents; Postgres có ON DELETE CASCADE nhưng SQLite thì không
+DEPENDENT_MODELS = (
+    DocumentTag, Rating, DocumentRatingStats, Comment, DocumentHistory, DocumentHistoryDaily, SharedLink,
+)
+
+
+@dataclass
+class BulkOutcome:
+    results: Dict[int, str] = field(default_factory=dict)
+    changed: List[int] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for outcome in self.results.values() if outcome in (UPDATED, QUEUED))
+
+
+def _chunks(ids: Sequence[int]) -> List[List[int]]:
+    size = settings.MODERATION_CHUNK_SIZE
+    return [list(ids[start:start + size]) for start in range(0, len(ids), size)]
+
+
+def id_matches(db: AsyncSession, ids: List[int], column: Any = Document.document_id) -> Any:
+    """``column = ANY(:ids)`` on Postgres (one bind, one cached plan), ``IN`` elsewhere"""
+    if db.get_bind().dialect.name == "postgresql":
+        return column == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    return column.in_(ids)
+
+
+def _notification_rows(
+    operation: BulkOperationType, documents: Sequence[Any], reason: Optional[str], now: datetime
+) -> List[Dict[str, Any]]:
+    rows = []
+    for document in documents:
+        content = f'Tài liệu "{document.title}": {NOTIFICATION_TITLES[operation].lower()}.'
+        if reason:
+            content += f" Lý do: {reason}"
+        rows.append({
+            "user_id": document.user_id,
+            "title": NOTIFICATION_TITLES[operation],
+            "content": content,
+            "is_read": False,
+            "type": MODERATION_NOTIFICATION,
+            "reference_id": document.document_id,
+            "created_at": now,
+        })
+    return rows
+
+
+async def _existing_ids(db: AsyncSession, ids: List[int]) -> List[int]:
+    result = await db.execute(select(Document.document_id).where(id_matches(db, ids)))
+    return list(result.scalars())
+
+
+async def set_status(
+    db: AsyncSession,
+    *,
+    document_ids: Sequence[int],
+    operation: BulkOperationType,
+    moderator_id: int,
+    reason: Optional[str] = None,
+) -> BulkOutcome:
+    """Approve or reject ``document_ids`` chunk by chunk; returns the outcome of every id"""
+    status = TARGET_STATUS[operation]
+    ids = list(dict.fromkeys(document_ids))
+    outcome = BulkOutcome()
+    now = utcnow()
+    for chunk in _chunks(ids):
+        result = await db.execute(
+            update(Document)
+            .where(id_matches(db, chunk), Document.status != status)
+            .values(status=status, updated_at=now)
+            .returning(Document.document_id, Document.user_id, Document.title),
+            execution_options={"synchronize_session": False},
+        )
+        changed = result.all()
+        changed_ids = {row.document_id for row in changed}
+        rest = [document_id for document_id in chunk if document_id not in changed_ids]
+        existing = set(await _existing_ids(db, rest)) if rest else set()
+        for document_id in chunk:
+            if document_id in changed_ids:
+                outcome.results[document_id] = UPDATED
+            else:
+                outcome.results[document_id] = UNCHANGED if document_id in existing else NOT_FOUND
+        if not changed:
+            continue
+        outcome.changed.extend(row.document_id for row in changed)
+        await db.execute(insert(DocumentHistory).values([
+            {"document_id": row.document_id, "user_id": moderator_id, "action": operation.value, "created_at": now}
+            for row in changed
+        ]))
+        await db.execute(insert(Notification).values(_notification_rows(operation, changed, reason, now)))
+    await db.commit()
+
+    if outcome.changed:
+        await cache.invalidate(Document.__tablename__)
+        await search.set_documents_status(db, outcome.changed, status)
+        if operation == BulkOperationType.approve:
+            await notifications.enqueue_documents_approved(outcome.changed)
+    return outcome
+
+
+async def start_bulk_delete(
+    db: AsyncSession,
+    *,
+    document_ids: Sequence[int],
+    moderator_id: int,
+    reason: Optional[str] = None,
+) -> Tuple[BulkOutcome, BulkJob]:
+    """Create a ``bulk_jobs`` row and queue the delete; returns ``(outcome, job)``"""
+    ids = list(dict.fromkeys(document_ids))
+    existing = set()
+    for chunk in _chunks(ids):
+        existing.update(await _existing_ids(db, chunk))
+    outcome = BulkOutcome(results={
+        document_id: QUEUED if document_id in existing else NOT_FOUND for document_id in ids
+    })
+    targets = [document_id for document_id in ids if document_id in existing]
+    now = utcnow()
+    job = BulkJob(
+        operation=BulkOperationType.delete.value,
+        status="queued" if targets else "completed",
+        total=len(targets),
+        created_by=moderator_id,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    await db.commit()
+    if targets:
+        await enqueue(
+            bulk_delete_task, job_id=job.job_id, document_ids=targets, reason=reason,
+            dedup_key=f"bulk_delete:{job.job_id}",
+        )
+    return outcome, job
+
+
+async def delete_documents(
+    db: AsyncSession, job_id: int, document_ids: Sequence[int], reason: Optional[str] = None
+) -> None:
+    """
+    Delete documents chunk by chunk, committing each chunk with the job progress.
+
+    A retried task resumes safely: already deleted ids are simply not found again.
+    """
+    await db.execute(
+        update(BulkJob).where(BulkJob.job_id == job_id)
+        .values(status="running", updated_at=utcnow())
+    )
+    await db.commit()
+    processed = 0
+    for chunk in _chunks(document_ids):
+        for model in DEPENDENT_MODELS:
+            await db.execute(
+                delete(model).where(id_matches(db, chunk, model.document_id)),
+                execution_options={"synchronize_session": False},
+            )
+        result = await db.execute(
+            delete(Document)
+            .where(id_matches(db, chunk))
+            .returning(Document.document_id, Document.user_id, Document.title, Document.file_path),
+            execution_options={"synchronize_session": False},
+        )
+        deleted = result.all()
+        orphaned = await storage.release_blobs(db, [row.file_path for row in deleted])
+        if deleted:
+            await db.execute(insert(Notification).values(
+                _notification_rows(BulkOperationType.delete, deleted, reason, utcnow())
+            ))
+        processed += len(chunk)
+        await db.execute(
+            update(BulkJob).where(BulkJob.job_id == job_id)
+            .values(processed=processed, succeeded=BulkJob.succeeded + len(deleted), updated_at=utcnow())
+        )
+        await db.commit()
+        for row in deleted:
+            await search.remove_document(db, row.document_id)
+        await storage.remove_orphans(db, orphaned)
+        logger.info(f"Bulk delete job {job_id}: {processed}/{len(document_ids)} processed")
+
+    await db.execute(
+        update(BulkJob).where(BulkJob.job_id == job_id)
+        .values(status="completed", updated_at=utcnow())
+    )
+    await db.commit()
+    await cache.invalidate(Document.__tablename__)
+
+
+async def _mark_failed(job_id: int, error: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(BulkJob).where(BulkJob.job_id == job_id)
+            .values(status="failed", error=error, updated_at=utcnow())
+        )
+        await db.commit()
+
+
+@task("moderation.bulk_delete", max_attempts=3)
+async def bulk_delete_task(job_id: int, document_ids: List[int], reason: Optional[str] = None) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await delete_documents(db, job_id, document_ids, reason)
+    except Exception as e:
+        # Lần thử tiếp theo (nếu còn) sẽ đặt lại status "running"
+        await _mark_failed(job_id, str(e))
+        raise
+
+
+async def get_job(db: AsyncSession, job_id: int) -> Optional[BulkJob]:
+    return await db.get(BulkJob, job_id)
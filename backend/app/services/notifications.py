@@ -0,0 +1,149 @@
+# app/services/notifications.py
+"""
+Bulk notification fan-out.
+
+An event such as "a document was approved in subject X" notifies every
+student following the subject: one ``notifications`` row per user. The
+rows are produced by a single ``INSERT ... SELECT`` over the whole set of
+approved documents, joining each document to the followers of its subject,
+so nothing but the statement travels between the database and the worker
+whether one document or a bulk approval of thousands is fanned out.
+
+A task that fails and is retried starts from a clean slate, and users who
+already received the notification for a document are excluded by the same
+statement, so the handler is idempotent.
+
+The service has no follow table. A student follows a subject once they have
+viewed, downloaded, rated or commented on one of its documents; lecturers
+and admins are not followers (moderators view documents of every subject).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import String, and_, insert, literal, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.background.queue import enqueue, task
+from app.db.session import AsyncSessionLocal
+from app.models.comment import Comment
+from app.models.document import Document
+from app.models.document_history import DocumentHistory
+from app.models.notification import Notification
+from app.models.rating import Rating
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_APPROVED = "document_approved"
+FOLLOWER_ROLE = "student"
+
+
+@dataclass
+class FanOutResult:
+    recipients: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.recipients / self.seconds if self.seconds else 0.0
+
+
+def subject_followers(subject_ids: Sequence[int]) -> Select:
+    """``(subject_id, user_id)`` of the active students who engaged with a document of these subjects"""
+    engaged = union(*(
+        select(Document.subject_id, model.user_id)
+        .join(Document, Document.document_id == model.document_id)
+        .where(Document.subject_id.in_(subject_ids))
+        for model in (DocumentHistory, Rating, Comment)
+    )).subquery("engaged")
+    return (
+        select(engaged.c.subject_id, engaged.c.user_id)
+        .join(User, User.user_id == engaged.c.user_id)
+        .where(User.status == "active", User.role == FOLLOWER_ROLE)
+    )
+
+
+async def notify_documents_approved(db: AsyncSession, document_ids: Sequence[int]) -> FanOutResult:
+    """
+    Notify the followers of each approved document's subject, except its
+    uploader, with one ``INSERT ... SELECT`` (commits).
+    """
+    started = time.perf_counter()
+    document_ids = sorted(set(document_ids))
+    if not document_ids:
+        return FanOutResult(recipients=0, seconds=0.0)
+    subject_ids = select(Document.subject_id).where(Document.document_id.in_(document_ids))
+    followers = subject_followers(subject_ids).subquery("followers")
+    already_notified = select(Notification.notification_id).where(
+        Notification.user_id == followers.c.user_id,
+        Notification.type == DOCUMENT_APPROVED,
+        Notification.reference_id == Document.document_id,
+    )
+    in_subject = literal(" trong môn ", String) + Subject.subject_name
+    rows = (
+        select(
+            followers.c.user_id,
+            (literal("Tài liệu mới", String) + in_subject).label("title"),
+            (literal('Tài liệu "', String) + Document.title + literal('" vừa được duyệt', String)
+             + in_subject + literal(".", String)).label("content"),
+            literal(False).label("is_read"),
+            literal(DOCUMENT_APPROVED, String).label("type"),
+            Document.document_id.label("reference_id"),
+            literal(utcnow()).label("created_at"),
+        )
+        .select_from(Document)
+        .join(Subject, Subject.subject_id == Document.subject_id)
+        .join(followers, and_(
+            followers.c.subject_id == Document.subject_id,
+            followers.c.user_id != Document.user_id,
+        ))
+        .where(
+            Document.document_id.in_(document_ids),
+            Document.status == "approved",
+            ~already_notified.exists(),
+        )
+    )
+    result = await db.execute(
+        insert(Notification).from_select(
+            ["user_id", "title", "content", "is_read", "type", "reference_id", "created_at"], rows
+        )
+    )
+    await db.commit()
+    outcome = FanOutResult(recipients=result.rowcount or 0, seconds=time.perf_counter() - started)
+    logger.info(
+        f"{len(document_ids)} documents approved: notified {outcome.recipients} users in "
+        f"{outcome.seconds:.2f}s ({outcome.rows_per_second:,.0f} rows/s)"
+    )
+    return outcome
+
+
+async def notify_document_approved(db: AsyncSession, document_id: int) -> FanOutResult:
+    return await notify_documents_approved(db, [document_id])
+
+
+@task("notifications.document_approved")
+async def document_approved_task(document_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await notify_document_approved(db, document_id)
+
+
+async def enqueue_document_approved(document_id: int) -> bool:
+    return await enqueue(
+        document_approved_task, document_id=document_id, dedup_key=f"{DOCUMENT_APPROVED}:{document_id}"
+    )
+
+
+@task("notifications.documents_approved")
+async def documents_approved_task(document_ids: List[int]) -> None:
+    """Fan-out for a bulk approval: one task and one statement for every document"""
+    async with AsyncSessionLocal() as db:
+        await notify_documents_approved(db, document_ids)
+
+
+async def enqueue_documents_approved(document_ids: List[int]) -> bool:
+    return await enqueue(documents_approved_task, document_ids=list(document_ids))
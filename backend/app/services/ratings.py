@@ -0,0 +1,326 @@
+# app/services/ratings.py
+"""
+Document ratings with incrementally maintained aggregates.
+
+``document_rating_stats`` keeps, per document, the sum and count of its 1-5
+scores and a histogram of every score (0 = like without a rating). List and
+detail pages read ``average_rating`` from it by primary key, so they never
+run ``AVG(score)`` over ``ratings``.
+
+On Postgres a rating write costs two statements in one transaction:
+
+1. an upsert of the document's stats row, which locks it and serializes
+   concurrent ratings of the same document,
+2. one statement doing the rest: ``WITH prev AS (SELECT score ...), up AS
+   (INSERT ... ON CONFLICT (user_id, document_id) DO UPDATE ... RETURNING ...)
+   UPDATE document_rating_stats ...`` by the difference between the previous
+   and the new score (``WITH gone AS (DELETE ... RETURNING score)`` to remove one).
+
+The lock cannot move into the second statement: a statement reads from the
+snapshot taken when it starts, so a previous score read in the statement
+that waited for the lock could already be stale. SQLite has no
+data-modifying CTEs and runs the same steps as separate statements
+(``SELECT`` previous score, rating upsert, stats ``UPDATE``) under its
+database-wide write lock.
+
+``repair_rating_stats`` recomputes the aggregates from ``ratings`` chunk by
+chunk and fixes the rows that drifted (ratings written by raw SQL, rows
+removed without going through this module...). The worker runs it every
+``RATING_REPAIR_INTERVAL`` seconds.
+"""
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Float, case, cast, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import cache
+from app.models.document import Document
+from app.models.document_rating_stats import DocumentRatingStats
+from app.models.rating import Rating
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+SCORES = range(0, 6)
+HISTOGRAM_COLUMNS = [f"score_{score}" for score in SCORES]
+AGGREGATE_COLUMNS = ["rating_sum", "rating_count", *HISTOGRAM_COLUMNS]
+REPAIR_CHUNK_SIZE = 1000
+
+
+@dataclass
+class RatingSummary:
+    document_id: int
+    average_rating: float
+    rating_count: int
+    # Số lượt theo từng điểm 0-5
+    histogram: Dict[int, int]
+
+
+def _insert(db: AsyncSession, model: Any):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+
+def average_rating_expression():
+    """``rating_sum / rating_count`` of the document's stats row (0 without ratings)"""
+    return (
+        select(func.coalesce(
+            cast(DocumentRatingStats.rating_sum, Float) / func.nullif(DocumentRatingStats.rating_count, 0), 0
+        ))
+        .where(DocumentRatingStats.document_id == Document.document_id)
+        .correlate(Document)
+        .scalar_subquery()
+    )
+
+
+def rating_count_expression():
+    return (
+        select(func.coalesce(DocumentRatingStats.rating_count, 0))
+        .where(DocumentRatingStats.document_id == Document.document_id)
+        .correlate(Document)
+        .scalar_subquery()
+    )
+
+
+def aggregate_query(document_ids: Optional[Sequence[int]] = None):
+    """Aggregates computed from ``ratings``, one row per rated document (for repair and backfill)"""
+    rated = Rating.score > 0
+    query = select(
+        Rating.document_id,
+        func.coalesce(func.sum(case((rated, Rating.score), else_=0)), 0).label("rating_sum"),
+        func.coalesce(func.sum(case((rated, 1), else_=0)), 0).label("rating_count"),
+        *(
+            func.coalesce(func.sum(case((Rating.score == score, 1), else_=0)), 0).label(f"score_{score}")
+            for score in SCORES
+        ),
+    ).group_by(Rating.document_id)
+    if document_ids is not None:
+        query = query.where(Rating.document_id.in_(document_ids))
+    return query
+
+
+def _deltas(old_score: Optional[int], new_score: Optional[int]) -> Dict[str, int]:
+    deltas: Dict[str, int] = Counter()
+    for score, sign in ((old_score, -1), (new_score, 1)):
+        if score is None:
+            continue
+        deltas[f"score_{score}"] += sign
+        if score > 0:
+            deltas["rating_sum"] += sign * score
+            deltas["rating_count"] += sign
+    return {column: value for column, value in deltas.items() if value}
+
+
+async def _lock_stats(db: AsyncSession, document_id: int, now: datetime) -> None:
+    stmt = _insert(db, DocumentRatingStats).values(document_id=document_id, updated_at=now)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[DocumentRatingStats.document_id], set_={"updated_at": now}
+    ))
+
+
+async def _apply_deltas(db: AsyncSession, document_id: int, deltas: Dict[str, int]) -> None:
+    if not deltas:
+        return
+    table = DocumentRatingStats.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.document_id == document_id)
+        .values({column: table.c[column] + value for column, value in deltas.items()})
+    )
+
+
+def _delta_values(old_score: Any, new_score: Optional[int], now: datetime) -> Dict[str, Any]:
+    """
+    SET clause of the stats row for a score change, with ``old_score`` an SQL
+    expression (NULL when the user had no rating) and ``new_score`` known
+    (``None`` when the rating is removed).
+    """
+    table = DocumentRatingStats.__table__
+    new_rated = new_score is not None and new_score > 0
+    values: Dict[str, Any] = {
+        f"score_{score}": table.c[f"score_{score}"] + int(new_score == score) - case((old_score == score, 1), else_=0)
+        for score in SCORES
+    }
+    values["rating_sum"] = table.c.rating_sum + (new_score if new_rated else 0) - case((old_score > 0, old_score), else_=0)
+    values["rating_count"] = table.c.rating_count + int(new_rated) - case((old_score > 0, 1), else_=0)
+    values["updated_at"] = now
+    return values
+
+
+async def _previous_score(db: AsyncSession, document_id: int, user_id: int) -> Optional[int]:
+    return await db.scalar(
+        select(Rating.score).where(Rating.document_id == document_id, Rating.user_id == user_id)
+    )
+
+
+async def rate_document(db: AsyncSession, *, document_id: int, user_id: int, score: int) -> Rating:
+    """
+    Create or change the user's rating of a document (commits).
+
+    ``rating.user`` is not loaded: callers that return it attach it with ``Loaders.users``.
+    """
+    now = utcnow()
+    postgres = db.get_bind().dialect.name == "postgresql"
+    try:
+        await _lock_stats(db, document_id, now)
+        old_score = None if postgres else await _previous_score(db, document_id, user_id)
+        rated_at = utcnow()
+        stmt = _insert(db, Rating).values(
+            document_id=document_id, user_id=user_id, score=score, created_at=rated_at, updated_at=rated_at
+        )
+        upsert = stmt.on_conflict_do_update(
+            index_elements=[Rating.user_id, Rating.document_id],
+            set_={"score": stmt.excluded.score, "updated_at": stmt.excluded.updated_at},
+        )
+        if postgres:
+            # prev đọc snapshot đầu câu lệnh: điểm cũ, trước khi "up" ghi đè
+            prev = (
+                select(Rating.score)
+                .where(Rating.document_id == document_id, Rating.user_id == user_id)
+                .cte("prev")
+            )
+            up = upsert.returning(*Rating.__table__.c).cte("up")
+            stats = DocumentRatingStats.__table__
+            statement = select(Rating).from_statement(
+                update(stats)
+                .where(stats.c.document_id == up.c.document_id)
+                .values(_delta_values(select(prev.c.score).scalar_subquery(), score, now))
+                .returning(*up.c)
+                .add_cte(prev, up)
+            )
+        else:
+            statement = upsert.returning(Rating)
+        result = await db.execute(statement, execution_options={"populate_existing": True})
+        rating = result.scalar_one()
+        if not postgres:
+            await _apply_deltas(db, document_id, _deltas(old_score, score))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    await cache.invalidate(Document.__tablename__)
+    return rating
+
+
+async def remove_rating(db: AsyncSession, *, document_id: int, user_id: int) -> bool:
+    """Delete the user's rating of a document; returns False if there was none (commits)"""
+    now = utcnow()
+    postgres = db.get_bind().dialect.name == "postgresql"
+    try:
+        await _lock_stats(db, document_id, now)
+        deletion = delete(Rating).where(Rating.document_id == document_id, Rating.user_id == user_id)
+        removal = deletion.returning(Rating.score)
+        if postgres:
+            # UPDATE ... FROM gone: không có lượt chấm nào bị xóa thì stats giữ nguyên
+            gone = deletion.returning(Rating.document_id, Rating.score).cte("gone")
+            stats = DocumentRatingStats.__table__
+            removal = (
+                update(stats)
+                .where(stats.c.document_id == gone.c.document_id)
+                .values(_delta_values(gone.c.score, None, now))
+                .returning(gone.c.score)
+                .add_cte(gone)
+            )
+        result = await db.execute(removal, execution_options={"synchronize_session": False})
+        old_score = result.scalar_one_or_none()
+        if not postgres:
+            await _apply_deltas(db, document_id, _deltas(old_score, None))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    if old_score is None:
+        return False
+    await cache.invalidate(Document.__tablename__)
+    return True
+
+
+async def get_summary(db: AsyncSession, document_id: int) -> RatingSummary:
+    stats = await db.get(DocumentRatingStats, document_id, populate_existing=True)
+    histogram = {score: getattr(stats, f"score_{score}") if stats else 0 for score in SCORES}
+    count = stats.rating_count if stats else 0
+    return RatingSummary(
+        document_id=document_id,
+        average_rating=stats.rating_sum / count if count else 0.0,
+        rating_count=count,
+        histogram=histogram,
+    )
+
+
+def _stats_values(row: Any) -> Dict[str, int]:
+    return {column: getattr(row, column) for column in AGGREGATE_COLUMNS}
+
+
+async def _repair_chunk(db: AsyncSession, document_ids: List[int], now: datetime) -> int:
+    if db.get_bind().dialect.name == "postgresql":
+        # Khóa các dòng stats trước khi đọc ratings: không ghi đè lượt chấm điểm đang diễn ra
+        await db.execute(
+            select(DocumentRatingStats.document_id)
+            .where(DocumentRatingStats.document_id.in_(document_ids))
+            .with_for_update()
+        )
+    stored = {
+        row.document_id: _stats_values(row)
+        for row in (await db.execute(
+            select(DocumentRatingStats).where(DocumentRatingStats.document_id.in_(document_ids))
+        )).scalars()
+    }
+    actual = {row.document_id: _stats_values(row) for row in await db.execute(aggregate_query(document_ids))}
+    empty = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+    drifted = [
+        {"document_id": document_id, **actual.get(document_id, empty), "updated_at": now}
+        for document_id in sorted(set(stored) | set(actual))
+        if stored.get(document_id, empty) != actual.get(document_id, empty)
+    ]
+    if drifted:
+        stmt = _insert(db, DocumentRatingStats).values(drifted)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[DocumentRatingStats.document_id],
+            set_={column: stmt.excluded[column] for column in [*AGGREGATE_COLUMNS, "updated_at"]},
+        ))
+    await db.commit()
+    return len(drifted)
+
+
+async def repair_rating_stats(db: AsyncSession, chunk_size: int = REPAIR_CHUNK_SIZE) -> int:
+    """Recompute the aggregates of every document; returns the number of rows fixed"""
+    now = utcnow()
+    repaired = 0
+    last_id = 0
+    while True:
+        document_ids = list((await db.execute(
+            select(Document.document_id)
+            .where(Document.document_id > last_id)
+            .order_by(Document.document_id)
+            .limit(chunk_size)
+        )).scalars())
+        if not document_ids:
+            break
+        repaired += await _repair_chunk(db, document_ids, now)
+        last_id = document_ids[-1]
+    # Dòng stats của tài liệu đã bị xóa (SQLite không có ON DELETE CASCADE)
+    result = await db.execute(
+        delete(DocumentRatingStats)
+        .where(~select(Document.document_id).where(
+            Document.document_id == DocumentRatingStats.document_id
+        ).exists()),
+        execution_options={"synchronize_session": False},
+    )
+    await db.commit()
+    repaired += result.rowcount or 0
+    if repaired:
+        logger.warning(f"Repaired rating aggregates of {repaired} documents")
+        await cache.invalidate(Document.__tablename__)
+    return repaired
+
+
+async def repair_rating_stats_job(session_factory: async_sessionmaker) -> None:
+    async with session_factory() as db:
+        await repair_rating_stats(db)
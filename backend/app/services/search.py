@@ -0,0 +1,298 @@
+# app/services/search.py
+"""
+Full-text search over documents.
+
+On Postgres, ``documents.search_vector`` is a generated ``tsvector`` column
+(title weighted ``A``, description weighted ``B``) with a GIN index (see the
+``documents_search_vector`` migration). Postgres keeps it up to date on every
+INSERT/UPDATE; queries rank with ``ts_rank_cd`` and build snippets with
+``ts_headline`` for the returned rows only.
+
+SQLite has no such column, so ``InvertedIndex`` keeps an in-process inverted
+index instead. It is built lazily from the ``documents`` table on the first
+search, then kept current by ``CRUDDocument`` through ``index_document`` and
+``remove_document``. Each worker process holds its own copy.
+"""
+import asyncio
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, literal_column, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import Document
+
+# Cấu hình 'simple': Postgres không có từ điển tiếng Việt, chỉ tách từ và chữ thường
+TS_CONFIG = "simple"
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+# Trường tìm kiếm -> trọng số tsvector. "content" chưa có cột trích xuất nên bị bỏ qua
+FIELD_WEIGHTS = {"title": "A", "description": "B"}
+# Trọng số mặc định của ts_rank cho {D, C, B, A}
+RANK_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+SEARCHABLE_STATUS = "approved"
+SNIPPET_WORDS = 35
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+search_vector = literal_column("documents.search_vector", TSVECTOR)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text the way ``to_tsvector('simple', ...)`` does: lower-cased word tokens"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    """
+    Split a web-style query into required and excluded terms.
+
+    Mirrors ``websearch_to_tsquery``: every word is required, ``-word`` excludes
+    and quotes only group words (phrases are matched as plain AND here).
+    """
+    required: List[str] = []
+    excluded: List[str] = []
+    for raw in query.replace('"', " ").split():
+        target = excluded if raw.startswith("-") and len(raw) > 1 else required
+        target.extend(tokenize(raw))
+    return list(dict.fromkeys(required)), list(dict.fromkeys(excluded))
+
+
+def resolve_weights(search_in: Iterable[str]) -> str:
+    weights = "".join(sorted({FIELD_WEIGHTS[f] for f in search_in if f in FIELD_WEIGHTS}))
+    if not weights:
+        raise ValueError(f"search_in must include one of: {', '.join(FIELD_WEIGHTS)}")
+    return weights
+
+
+def make_snippet(text: Optional[str], terms: Set[str], max_words: int = SNIPPET_WORDS) -> str:
+    """Python counterpart of ``ts_headline``: a window around the first match, matches in <b></b>"""
+    if not text:
+        return ""
+    words = text.split()
+    start = 0
+    for i, word in enumerate(words):
+        if any(token in terms for token in tokenize(word)):
+            start = max(0, i - max_words // 3)
+            break
+    window = words[start:start + max_words]
+    highlighted = [
+        f"<b>{word}</b>" if any(token in terms for token in tokenize(word)) else word
+        for word in window
+    ]
+    snippet = " ".join(highlighted)
+    if start > 0:
+        snippet = "... " + snippet
+    if start + max_words < len(words):
+        snippet += " ..."
+    return snippet
+
+
+class InvertedIndex:
+    """
+    In-process inverted index: term -> {document_id: {weight: term frequency}}.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, Dict[str, int]]] = defaultdict(dict)
+        self._terms: Dict[int, Set[str]] = {}
+        self._status: Dict[int, Optional[str]] = {}
+        self._lock = asyncio.Lock()
+        self.built = False
+
+    @property
+    def accepting_updates(self) -> bool:
+        # Cả lúc đang build: bản ghi mới hơn ảnh chụp ban đầu vẫn được thêm vào
+        return self.built or self._lock.locked()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, document_id: int, title: Optional[str], description: Optional[str], status: Optional[str]) -> None:
+        self.remove(document_id)
+        terms: Set[str] = set()
+        for weight, text in (("A", title), ("B", description)):
+            for token in tokenize(text):
+                counts = self._postings[token].setdefault(document_id, {})
+                counts[weight] = counts.get(weight, 0) + 1
+                terms.add(token)
+        self._terms[document_id] = terms
+        self._status[document_id] = status
+
+    def remove(self, document_id: int) -> None:
+        for token in self._terms.pop(document_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(document_id, None)
+                if not postings:
+                    del self._postings[token]
+        self._status.pop(document_id, None)
+
+    def set_status(self, document_id: int, status: Optional[str]) -> None:
+        if document_id in self._terms:
+            self._status[document_id] = status
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._terms.clear()
+        self._status.clear()
+        self.built = False
+
+    async def ensure_built(self, db: AsyncSession, batch_size: int = 1000) -> None:
+        """Load every document once; later changes arrive through ``add``/``remove``"""
+        if self.built:
+            return
+        async with self._lock:
+            if self.built:
+                return
+            result = await db.stream(
+                select(Document.document_id, Document.title, Document.description, Document.status)
+                .execution_options(yield_per=batch_size)
+            )
+            async for row in result:
+                self.add(row.document_id, row.title, row.description, row.status)
+            self.built = True
+
+    def search(
+        self,
+        required: List[str],
+        excluded: List[str],
+        weights: str,
+        limit: int,
+        status: Optional[str] = SEARCHABLE_STATUS,
+    ) -> List[Tuple[int, float]]:
+        """Return ``(document_id, score)`` of the best ``limit`` matches, best first"""
+        if not required:
+            return []
+        postings = [self._postings.get(term, {}) for term in required]
+        candidates = set(min(postings, key=len))
+        for term_postings in postings:
+            candidates &= term_postings.keys()
+        for term in excluded:
+            candidates -= self._postings.get(term, {}).keys()
+
+        total = max(len(self._terms), 1)
+        scored = []
+        for document_id in candidates:
+            if status is not None and self._status.get(document_id) != status:
+                continue
+            score = 0.0
+            matched_all = True
+            for term_postings in postings:
+                counts = term_postings[document_id]
+                tf = sum(RANK_WEIGHTS[w] * n for w, n in counts.items() if w in weights)
+                if tf == 0:
+                    matched_all = False
+                    break
+                idf = math.log(1 + total / len(term_postings))
+                score += tf / (tf + 1.2) * idf
+            if matched_all:
+                scored.append((document_id, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+inverted_index = InvertedIndex()
+
+
+def uses_tsvector(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def search_documents(
+    db: AsyncSession, *, query: str, search_in: Iterable[str], limit: int
+) -> List[Dict]:
+    """
+    Rank approved documents against ``query``.
+
+    Returns dicts shaped like ``SearchResult``.
+    """
+    weights = resolve_weights(search_in)
+    if not query.strip():
+        return []
+    if uses_tsvector(db):
+        return await _search_postgres(db, query, weights, limit)
+    return await _search_inverted_index(db, query, weights, limit)
+
+
+async def _search_postgres(db: AsyncSession, query: str, weights: str, limit: int) -> List[Dict]:
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, query)
+    vector = search_vector
+    if weights != "AB":
+        # ts_filter giữ lại các lexeme của trường được chọn; điều kiện trên
+        # search_vector vẫn dùng được GIN index để lọc trước
+        vector = func.ts_filter(search_vector, literal_column(f"'{{{weights.lower()}}}'"))
+    conditions = [search_vector.op("@@")(tsquery), Document.status == SEARCHABLE_STATUS]
+    if vector is not search_vector:
+        conditions.append(vector.op("@@")(tsquery))
+
+    rank = func.ts_rank_cd(vector, tsquery).label("relevance_score")
+    top = (
+        select(Document.document_id, Document.title, Document.description, rank)
+        .where(and_(*conditions))
+        .order_by(rank.desc(), Document.document_id)
+        .limit(limit)
+        .subquery()
+    )
+    # ts_headline chỉ chạy trên các dòng đã được xếp hạng và cắt theo limit
+    headline_source = func.coalesce(func.nullif(top.c.description, ""), top.c.title)
+    snippet = func.ts_headline(TS_CONFIG, headline_source, tsquery, HEADLINE_OPTIONS).label("snippet")
+    result = await db.execute(
+        select(top.c.document_id, top.c.title, top.c.description, top.c.relevance_score, snippet)
+        .order_by(top.c.relevance_score.desc(), top.c.document_id)
+    )
+    return [dict(row._mapping) for row in result]
+
+
+async def _search_inverted_index(db: AsyncSession, query: str, weights: str, limit: int) -> List[Dict]:
+    await inverted_index.ensure_built(db)
+    required, excluded = parse_query(query)
+    hits = inverted_index.search(required, excluded, weights, limit)
+    if not hits:
+        return []
+    result = await db.execute(
+        select(Document.document_id, Document.title, Document.description)
+        .where(Document.document_id.in_([document_id for document_id, _ in hits]))
+    )
+    rows = {row.document_id: row for row in result}
+    terms = set(required)
+    results = []
+    for document_id, score in hits:
+        row = rows.get(document_id)
+        if row is None:
+            continue
+        results.append({
+            "document_id": row.document_id,
+            "title": row.title,
+            "description": row.description,
+            "relevance_score": round(score, 6),
+            "snippet": make_snippet(row.description or row.title, terms),
+        })
+    return results
+
+
+async def index_document(db: AsyncSession, document: Document) -> None:
+    """Reflect a created/updated document in the fallback index (Postgres maintains its own)"""
+    if uses_tsvector(db) or not inverted_index.accepting_updates:
+        return
+    inverted_index.add(document.document_id, document.title, document.description, document.status)
+
+
+async def remove_document(db: AsyncSession, document_id: int) -> None:
+    if uses_tsvector(db) or not inverted_index.accepting_updates:
+        return
+    inverted_index.remove(document_id)
+
+
+async def set_documents_status(db: AsyncSession, document_ids: Iterable[int], status: str) -> None:
+    """Bulk status change (moderation) without re-tokenizing the documents"""
+    if uses_tsvector(db) or not inverted_index.accepting_updates:
+        return
+    for document_id in document_ids:
+        inverted_index.set_status(document_id, status)
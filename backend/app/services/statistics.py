@@ -0,0 +1,233 @@
+# app/services/statistics.py
+"""
+Site statistics served from the ``stat_counters`` table.
+
+Each counter is one ``(scope, scope_id, metric)`` row, so totals are read
+by primary key instead of ``COUNT(*)`` / ``SUM(view_count)`` scans:
+
+* ``views`` / ``downloads`` are incremented by ``add_events``. It runs in the
+  write-behind flush of ``app/background/tasks.py``, in the same transaction
+  that adds the events to ``documents.view_count`` / ``download_count``,
+* ``documents`` (approved documents) and ``users`` are recomputed by
+  ``rollup`` every ``STATS_ROLLUP_INTERVAL`` seconds. The rollup also resets
+  ``views`` / ``downloads`` from the documents table, which drops the counts
+  of deleted documents and repairs any drift.
+
+Counters exist globally (``scope_id`` 0) and per subject. A department's
+figures are the sum over its subjects, one indexed join over
+``subject_departments``.
+
+On Postgres both writers take the same transaction-level advisory lock, so a
+flush can never be overwritten by a concurrent rollup.
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.department import Department
+from app.models.document import Document
+from app.models.stat_counter import StatCounter
+from app.models.subject import Subject
+from app.models.subject_department import SubjectDepartment
+from app.models.user import User
+from app.utils.helpers import utcnow
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = "global"
+SUBJECT = "subject"
+
+DOCUMENTS = "documents"
+USERS = "users"
+VIEWS = "views"
+DOWNLOADS = "downloads"
+
+# Khóa pg_advisory_xact_lock dùng chung giữa add_events và rollup
+STATS_LOCK_KEY = 7_140_016
+
+CounterKey = Tuple[str, int, str]
+
+
+async def _lock(db: AsyncSession) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": STATS_LOCK_KEY})
+
+
+def _insert(db: AsyncSession):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(StatCounter)
+
+
+async def increment(db: AsyncSession, deltas: Mapping[CounterKey, int]) -> None:
+    """Add ``deltas`` to their counters with one multi-row upsert (caller commits)"""
+    now = utcnow()
+    rows = [
+        {"scope": scope, "scope_id": scope_id, "metric": metric, "value": value, "updated_at": now}
+        # Thứ tự khóa cố định để hai transaction không deadlock
+        for (scope, scope_id, metric), value in sorted(deltas.items()) if value
+    ]
+    if not rows:
+        return
+    stmt = _insert(db).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[StatCounter.scope, StatCounter.scope_id, StatCounter.metric],
+        set_={"value": StatCounter.value + stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+    ))
+
+
+async def add_events(db: AsyncSession, counter_rows: Sequence[Dict[str, int]]) -> None:
+    """
+    Count a flushed batch of views/downloads globally and per subject.
+
+    ``counter_rows`` are ``EventBatch.counter_rows()``: ``document_id``,
+    ``views`` and ``downloads``. Documents that no longer exist are skipped,
+    like the ``UPDATE documents`` of the same flush.
+    """
+    if not counter_rows:
+        return
+    result = await db.execute(
+        select(Document.document_id, Document.subject_id)
+        .where(Document.document_id.in_([row["document_id"] for row in counter_rows]))
+    )
+    subjects = dict(result.all())
+    deltas: Dict[CounterKey, int] = Counter()
+    for row in counter_rows:
+        subject_id = subjects.get(row["document_id"])
+        if subject_id is None:
+            continue
+        for metric, value in ((VIEWS, row["views"]), (DOWNLOADS, row["downloads"])):
+            deltas[(GLOBAL, 0, metric)] += value
+            deltas[(SUBJECT, subject_id, metric)] += value
+    await _lock(db)
+    await increment(db, deltas)
+
+
+def _rollup_queries(now: datetime) -> List[Any]:
+    approved = case((Document.status == "approved", 1), else_=0)
+    views = func.coalesce(func.sum(Document.view_count), 0)
+    downloads = func.coalesce(func.sum(Document.download_count), 0)
+    queries = [
+        select(literal(GLOBAL), literal(0), literal(USERS), func.count(), literal(now)).select_from(User),
+    ]
+    for metric, value in ((DOCUMENTS, func.coalesce(func.sum(approved), 0)), (VIEWS, views), (DOWNLOADS, downloads)):
+        queries.append(select(literal(GLOBAL), literal(0), literal(metric), value, literal(now)).select_from(Document))
+        queries.append(
+            select(literal(SUBJECT), Document.subject_id, literal(metric), value, literal(now))
+            .group_by(Document.subject_id)
+        )
+    return queries
+
+
+async def rollup(db: AsyncSession) -> None:
+    """Recompute every counter from the source tables in one transaction (commits)"""
+    now = utcnow()
+    columns = ["scope", "scope_id", "metric", "value", "updated_at"]
+    await _lock(db)
+    # Xóa rồi ghi lại trong cùng transaction: người đọc thấy bản cũ cho tới khi commit
+    await db.execute(delete(StatCounter))
+    for query in _rollup_queries(now):
+        await db.execute(insert(StatCounter).from_select(columns, query))
+    await db.commit()
+
+
+async def rollup_statistics(session_factory: async_sessionmaker) -> None:
+    async with session_factory() as db:
+        await rollup(db)
+
+
+async def get_overview(db: AsyncSession) -> Dict[str, Any]:
+    """Site totals: four primary key lookups, rolled up first on an empty table"""
+    result = await db.execute(
+        select(StatCounter.metric, StatCounter.value, StatCounter.updated_at)
+        .where(StatCounter.scope == GLOBAL, StatCounter.scope_id == 0)
+    )
+    rows = {row.metric: row for row in result}
+    if USERS not in rows:
+        # Database mới (chưa có migration backfill hay rollup nào)
+        await rollup(db)
+        return await get_overview(db)
+
+    def value(metric: str) -> int:
+        return rows[metric].value if metric in rows else 0
+
+    return {
+        "total_documents": value(DOCUMENTS),
+        "total_users": value(USERS),
+        "total_downloads": value(DOWNLOADS),
+        "total_views": value(VIEWS),
+        "updated_at": rows[USERS].updated_at,
+    }
+
+
+def _pivot(metric: str):
+    return func.coalesce(func.sum(case((StatCounter.metric == metric, StatCounter.value), else_=0)), 0)
+
+
+def _subject_counters():
+    return (
+        select(
+            StatCounter.scope_id.label("subject_id"),
+            _pivot(DOCUMENTS).label("total_documents"),
+            _pivot(DOWNLOADS).label("total_downloads"),
+            _pivot(VIEWS).label("total_views"),
+        )
+        .where(StatCounter.scope == SUBJECT)
+        .group_by(StatCounter.scope_id)
+        .subquery("counters")
+    )
+
+
+async def get_subject_statistics(
+    db: AsyncSession, *, department_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Counters of every subject (optionally of one department), subjects without documents included"""
+    counters = _subject_counters()
+    query = (
+        select(
+            Subject.subject_id,
+            Subject.subject_name,
+            func.coalesce(counters.c.total_documents, 0).label("total_documents"),
+            func.coalesce(counters.c.total_downloads, 0).label("total_downloads"),
+            func.coalesce(counters.c.total_views, 0).label("total_views"),
+        )
+        .outerjoin(counters, counters.c.subject_id == Subject.subject_id)
+        .order_by(Subject.subject_id)
+    )
+    if department_id is not None:
+        query = query.join(SubjectDepartment, SubjectDepartment.subject_id == Subject.subject_id).where(
+            SubjectDepartment.department_id == department_id
+        )
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result]
+
+
+async def get_department_statistics(db: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Counters of every department, summed over its subjects.
+
+    A subject taught in several departments counts towards each of them.
+    """
+    counters = _subject_counters()
+    result = await db.execute(
+        select(
+            Department.department_id,
+            Department.name,
+            Department.slug,
+            func.count(SubjectDepartment.subject_id).label("total_subjects"),
+            func.coalesce(func.sum(counters.c.total_documents), 0).label("total_documents"),
+            func.coalesce(func.sum(counters.c.total_downloads), 0).label("total_downloads"),
+            func.coalesce(func.sum(counters.c.total_views), 0).label("total_views"),
+        )
+        .outerjoin(SubjectDepartment, SubjectDepartment.department_id == Department.department_id)
+        .outerjoin(counters, counters.c.subject_id == SubjectDepartment.subject_id)
+        .group_by(Department.department_id, Department.name, Department.slug)
+        .order_by(Department.department_id)
+    )
+    return [dict(row._mapping) for row in result]
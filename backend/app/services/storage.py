@@ -0,0 +1,232 @@
+# app/services/storage.py
+"""
+Content-addressed storage of uploaded document files.
+
+``documents.file_path`` is relative to ``UPLOAD_DIR``. Paths are resolved
+here only, so a crafted ``file_path`` can never point outside that directory.
+
+Uploads are written to ``UPLOAD_DIR/.tmp`` by ``HashingFile`` while their
+SHA-256 is computed, then stored once under ``blobs/ab/cd/<sha256>``. The
+``file_blobs`` table counts the ``documents`` rows using each blob:
+
+* ``store_blob`` increments the count (inserting the row for new content) and
+  moves the upload into place, or drops it if the blob already exists,
+* ``release_blobs`` decrements it when documents are deleted and deletes
+  the rows nobody references any more, in the same transaction as the
+  documents; after that transaction commits, ``remove_orphans`` unlinks
+  their files.
+
+A file is therefore never removed while a committed row still counts it,
+and a rollback leaves nothing to repair. On Postgres ``store_blob`` and
+``remove_orphans`` take the same per-blob advisory lock, and
+``remove_orphans`` skips blobs uploaded again in the meantime.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import anyio
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.file_blob import FileBlob
+from app.utils.helpers import utcnow
+
+# Khóa pg_advisory_xact_lock(BLOB_LOCK_KEY, hashtext(sha256)) giữa upload và xóa file
+BLOB_LOCK_KEY = 7_140_015
+BLOB_DIR = "blobs"
+TMP_DIR = ".tmp"
+_BLOB_PATH_RE = re.compile(rf"^{BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})$")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def upload_root() -> str:
+    return os.path.realpath(settings.UPLOAD_DIR)
+
+
+def resolve_path(file_path: str) -> Optional[str]:
+    """Absolute path of a stored file, or None if it would escape ``UPLOAD_DIR``"""
+    root = upload_root()
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+
+def media_type_for(file_type: Optional[str], file_path: str) -> str:
+    guessed, _ = mimetypes.guess_type(f"file.{file_type}" if file_type else file_path)
+    return guessed or "application/octet-stream"
+
+
+def download_filename(title: str, file_type: Optional[str]) -> str:
+    extension = f".{file_type.lower()}" if file_type else ""
+    return title if title.lower().endswith(extension) else f"{title}{extension}"
+
+
+def file_type_for(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    return extension or "bin"
+
+
+def blob_path(sha256: str) -> str:
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_hash(file_path: Optional[str]) -> Optional[str]:
+    """SHA-256 of a content-addressed ``file_path``, None for files stored before CAS"""
+    match = _BLOB_PATH_RE.match(file_path or "")
+    return match.group(1) if match else None
+
+
+class HashingFile:
+    """
+    Write-only file sink: data goes to a temporary file in ``UPLOAD_DIR/.tmp``
+    while its SHA-256 and size are computed. Used from the thread pool.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        directory = os.path.join(upload_root(), TMP_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix="upload-", delete=False)
+        self.path = self._file.name
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise UploadTooLarge(f"File exceeds the maximum upload size of {self.max_size} bytes")
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int) -> None:
+        # Gọi khi part kết thúc: file chỉ ghi, không đọc lại
+        self._file.flush()
+
+    def finish(self) -> None:
+        """Flush and close the temporary file once the upload is complete"""
+        self._file.close()
+
+    def close(self) -> None:
+        """Close and delete the temporary file unless ``store_blob`` moved it"""
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    file_path: str
+    # True khi nội dung đã có sẵn: upload không tốn thêm dung lượng
+    deduplicated: bool
+
+
+def _upsert(db: AsyncSession, sha256: str, size: int):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(FileBlob).values(sha256=sha256, size=size, ref_count=1, created_at=utcnow())
+    return stmt.on_conflict_do_update(
+        index_elements=[FileBlob.sha256], set_={"ref_count": FileBlob.ref_count + 1}
+    )
+
+
+async def _lock_blob(db: AsyncSession, sha256: str) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(:key, hashtext(:sha256))"),
+            {"key": BLOB_LOCK_KEY, "sha256": sha256},
+        )
+
+
+def _place(upload_path: str, target: str) -> bool:
+    """Move the upload to ``target``; returns True if the blob was already there"""
+    if os.path.exists(target):
+        os.unlink(upload_path)
+        return True
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(upload_path, target)
+    return False
+
+
+async def store_blob(db: AsyncSession, upload: HashingFile) -> StoredBlob:
+    """Reference the uploaded content from one more document (caller commits)"""
+    await anyio.to_thread.run_sync(upload.finish)
+    sha256 = upload.sha256
+    await _lock_blob(db, sha256)
+    await db.execute(_upsert(db, sha256, upload.size))
+    file_path = blob_path(sha256)
+    deduplicated = await anyio.to_thread.run_sync(_place, upload.path, resolve_path(file_path))
+    return StoredBlob(sha256=sha256, size=upload.size, file_path=file_path, deduplicated=deduplicated)
+
+
+def _unlink(paths: Iterable[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+async def release_blobs(db: AsyncSession, file_paths: Iterable[str]) -> List[str]:
+    """
+    Drop one reference per path (deleted documents) in the caller's
+    transaction; returns the hashes of the blobs no longer referenced, whose
+    files the caller passes to ``remove_orphans`` once it has committed.
+    """
+    counts = Counter(sha256 for sha256 in map(blob_hash, file_paths) if sha256)
+    if not counts:
+        return []
+    for sha256, count in counts.items():
+        await db.execute(
+            update(FileBlob).where(FileBlob.sha256 == sha256)
+            .values(ref_count=FileBlob.ref_count - count),
+            execution_options={"synchronize_session": False},
+        )
+    result = await db.execute(
+        delete(FileBlob)
+        .where(FileBlob.sha256.in_(list(counts)), FileBlob.ref_count <= 0)
+        .returning(FileBlob.sha256),
+        execution_options={"synchronize_session": False},
+    )
+    return list(result.scalars())
+
+
+async def remove_orphans(db: AsyncSession, sha256s: Iterable[str]) -> int:
+    """
+    Unlink the files of blobs released by a committed ``release_blobs``
+    (commits); returns the number of files removed.
+    """
+    sha256s = sorted(set(sha256s))
+    if not sha256s:
+        return 0
+    # Thứ tự khóa cố định; blob vừa được upload lại (đã có dòng mới) thì giữ file
+    for sha256 in sha256s:
+        await _lock_blob(db, sha256)
+    uploaded_again = set((await db.execute(
+        select(FileBlob.sha256).where(FileBlob.sha256.in_(sha256s))
+    )).scalars())
+    orphaned = [resolve_path(blob_path(sha256)) for sha256 in sha256s if sha256 not in uploaded_again]
+    await anyio.to_thread.run_sync(_unlink, orphaned)
+    await db.commit()
+    return len(orphaned)
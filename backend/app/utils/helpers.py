@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """Timezone-aware current time in UTC, for ``DateTime(timezone=True)`` columns"""
+    return datetime.now(timezone.utc)
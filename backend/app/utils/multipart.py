@@ -0,0 +1,56 @@
+# app/utils/multipart.py
+"""
+Multipart parsing that streams file parts into ``HashingFile`` sinks.
+
+Starlette's parser spools every file into a ``SpooledTemporaryFile`` that the
+handler then has to copy again. This subclass only changes where file parts
+go: straight into the upload directory, hashed on the way (writes run on the
+thread pool), so the request body is read once and never held in memory.
+"""
+from typing import List, Optional
+
+from starlette.datastructures import FormData, Headers, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser, _user_safe_decode
+from multipart.multipart import parse_options_header
+
+from app.services.storage import HashingFile
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    def __init__(self, headers: Headers, stream, *, max_file_size: Optional[int] = None, max_files: int = 1, max_fields: int = 100):
+        super().__init__(headers, stream, max_files=max_files, max_fields=max_fields)
+        self.max_upload_size = max_file_size
+        self.sinks: List[HashingFile] = []
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._current_part.content_disposition)
+        if b"filename" not in options:
+            super().on_headers_finished()
+            return
+        try:
+            self._current_part.field_name = _user_safe_decode(options[b"name"], self._charset)
+        except KeyError:
+            raise MultiPartException('The Content-Disposition header field "name" must be provided.')
+        self._current_files += 1
+        if self._current_files > self.max_files:
+            raise MultiPartException(f"Too many files. Maximum number of files is {self.max_files}.")
+        sink = HashingFile(max_size=self.max_upload_size)
+        self.sinks.append(sink)
+        self._current_part.file = UploadFile(
+            file=sink,
+            size=0,
+            filename=_user_safe_decode(options[b"filename"], self._charset),
+            headers=Headers(raw=self._current_part.item_headers),
+        )
+
+    async def parse(self) -> FormData:
+        try:
+            return await super().parse()
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Delete the temporary files of every sink not yet stored"""
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,138 @@
+# app/utils/pagination.py
+import base64
+import json
+from collections.abc import Mapping
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.types import TypeEngine
+
+
+class InvalidCursorError(ValueError):
+    """Cursor không hợp lệ hoặc không khớp với kiểu sắp xếp hiện tại"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+    return value
+
+
+def _matches_type(value: Any, column_type: TypeEngine) -> bool:
+    """Whether a decoded cursor value has the Python type of the key column"""
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return False
+    # bool là lớp con của int, date là lớp cha của datetime: so khớp chặt
+    if isinstance(value, bool) or python_type is bool:
+        return isinstance(value, bool) and python_type is bool
+    if python_type is date:
+        return isinstance(value, date) and not isinstance(value, datetime)
+    if python_type in (float, Decimal):
+        return isinstance(value, (int, float))
+    return isinstance(value, python_type)
+
+
+def encode_cursor(sort_key: str, sort_value: Any, pk_value: Any, desc: bool) -> str:
+    """
+    Encode the position ``(sort value, primary key)`` of the last row of a page
+    into an opaque, URL-safe cursor.
+    """
+    payload = {"k": sort_key, "v": _encode_value(sort_value), "id": pk_value, "d": desc}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    sort_key: str,
+    desc: bool,
+    sort_type: Optional[TypeEngine] = None,
+    pk_type: Optional[TypeEngine] = None,
+) -> Tuple[Any, Any]:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the same sort key and direction.
+    When the key column types are given, values of any other type are rejected
+    so a forged cursor never reaches the database.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key, value, pk_value, cursor_desc = payload["k"], payload["v"], payload["id"], payload["d"]
+        value = _decode_value(value)
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Invalid cursor")
+    if key != sort_key or cursor_desc != desc:
+        raise InvalidCursorError("Cursor does not match the requested ordering")
+    if (sort_type is not None and not _matches_type(value, sort_type)) or (
+        pk_type is not None and not _matches_type(pk_value, pk_type)
+    ):
+        raise InvalidCursorError("Invalid cursor")
+    return value, pk_value
+
+
+def paginate_keyset(
+    query: Select,
+    *,
+    sort_column: Any,
+    pk_column: Any,
+    sort_key: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    desc: bool = False,
+) -> Select:
+    """
+    Apply keyset pagination to ``query``.
+
+    Rows are ordered by ``(sort_column, pk_column)`` so ties on the sort key are
+    broken by the primary key and paging is stable. Instead of ``OFFSET`` the
+    query seeks past the last seen ``(sort value, pk)``, which an index on
+    ``(sort_column, pk_column)`` answers without scanning skipped rows.
+    One extra row is fetched to know whether a next page exists.
+    The sort column must be NOT NULL: rows with a NULL sort key are never
+    matched by the seek predicate.
+    """
+    if cursor:
+        value, last_pk = decode_cursor(cursor, sort_key, desc, sort_column.type, pk_column.type)
+        position = tuple_(sort_column, pk_column)
+        query = query.where(position < tuple_(value, last_pk) if desc else position > tuple_(value, last_pk))
+    if desc:
+        query = query.order_by(sort_column.desc(), pk_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), pk_column.asc())
+    return query.limit(limit + 1)
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    *,
+    sort_key: str,
+    pk_key: str,
+    limit: int,
+    desc: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Split the ``limit + 1`` rows fetched by ``paginate_keyset`` into the page
+    and the cursor of the next page (``None`` on the last page).
+    Rows may be ORM objects or mappings.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    last = items[-1]
+    get = last.get if isinstance(last, Mapping) else lambda name: getattr(last, name)
+    return items, encode_cursor(sort_key, get(sort_key), get(pk_key), desc)
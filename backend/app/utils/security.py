@@ -3,18 +3,15 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Union
 
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.security import pwd_context
 
 # Các hằng số để export
 JWT_SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Password context cho việc hash và verify password
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
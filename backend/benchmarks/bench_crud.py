@@ -0,0 +1,82 @@
+# benchmarks/bench_crud.py
+"""
+Requests/sec of the generic CRUD layer under concurrent load.
+
+"before" replays what the old ``CRUDBase`` did: a sync ``Session.query(...)``
+per id executed inline inside the coroutine, which blocks the event loop.
+"after" goes through ``user_crud`` on an ``AsyncSession``: one ``get`` plus
+one batched ``get_many`` per simulated request.
+
+    python -m benchmarks.bench_crud --users 2000 --concurrency 50 --requests 2000
+"""
+import asyncio
+import random
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services.crud.user_crud import user_crud
+from benchmarks.common import base_parser, make_engine, reset_schema, run_concurrent
+
+SYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql+psycopg2"}
+
+
+async def seed(engine, users: int) -> None:
+    await reset_schema(engine)
+    rows = [
+        {
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "full_name": f"User {i}",
+            "role": "student",
+            "status": "active",
+        }
+        for i in range(users)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), rows)
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=20, help="ids fetched per request")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed(engine, args.users)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    url = make_url(args.url)
+    sync_engine = create_engine(url.set(drivername=SYNC_DRIVERS.get(url.drivername, url.drivername)))
+
+    def pick_ids(i: int):
+        rnd = random.Random(i)
+        return [rnd.randint(1, args.users) for _ in range(args.batch)]
+
+    async def before(i: int) -> None:
+        with Session(sync_engine) as session:
+            for user_id in pick_ids(i):
+                session.query(User).filter(User.user_id == user_id).first()
+
+    async def after(i: int) -> None:
+        ids = pick_ids(i)
+        async with SessionFactory() as session:
+            await user_crud.get(session, ids[0])
+            await user_crud.get_many(session, ids)
+
+    for name, request in (("before (sync query inline)", before), ("after (async CRUDBase)", after)):
+        result = await run_concurrent(
+            name, request, concurrency=args.concurrency, total=args.requests
+        )
+        print(result.report())
+
+    sync_engine.dispose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+# benchmarks/bench_document_list.py
+"""
+Latency of GET /documents, the hottest page of the site, on a seeded catalog.
+
+Requests go through the real ASGI app (filters, eager loading, average
+rating, response validation) with ``get_db`` bound to the benchmark engine.
+The script exits with status 1 when p95 latency exceeds ``--target-p95-ms``
+or a request issues more than ``--max-queries`` SQL statements (page ids +
+total, documents, then one IN query each for subjects, majors, academic
+years, users and tags).  The default SQLite target serializes queries, so
+raise ``--concurrency`` only against Postgres.
+
+    python -m benchmarks.bench_document_list --documents 20000 --target-p95-ms 80
+"""
+import asyncio
+import random
+import sys
+
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.main import app
+from app.models.base import get_db
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_catalog
+
+SCENARIOS = [
+    {},
+    {"status": "approved"},
+    {"status": "approved", "order_by": "title", "order_desc": "false"},
+    {"subject_id": "{subject}"},
+    {"tags": "tag{tag}"},
+    {"search": "subject {subject}"},
+    {"order_by": "view_count"},
+]
+
+
+async def main() -> int:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=4, requests=1000)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--target-p95-ms", type=float, default=100.0)
+    parser.add_argument("--max-queries", type=int, default=7)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=args.documents)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with SessionFactory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    max_queries = 0
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        # One sequential pass to measure round-trips per scenario
+        for scenario in SCENARIOS:
+            params = {k: v.format(subject=3, tag=5) for k, v in scenario.items()}
+            before = statements["count"]
+            response = await client.get("/api/v1/documents/", params={**params, "per_page": args.per_page})
+            response.raise_for_status()
+            used = statements["count"] - before
+            max_queries = max(max_queries, used)
+            print(f"{str(params):<60} {used} queries, {len(response.json()['documents'])} rows")
+
+        async def request(i: int) -> None:
+            rnd = random.Random(i)
+            scenario = SCENARIOS[i % len(SCENARIOS)]
+            params = {
+                k: v.format(subject=rnd.randint(1, 50), tag=rnd.randint(1, 30))
+                for k, v in scenario.items()
+            }
+            response = await client.get("/api/v1/documents/", params={**params, "per_page": args.per_page})
+            response.raise_for_status()
+
+        result = await run_concurrent(
+            "GET /documents", request, concurrency=args.concurrency, total=args.requests
+        )
+        print(result.report())
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    failed = False
+    if result.percentile(95) > args.target_p95_ms:
+        print(f"FAIL: p95 {result.percentile(95):.2f}ms > target {args.target_p95_ms}ms")
+        failed = True
+    if max_queries > args.max_queries:
+        print(f"FAIL: {max_queries} queries per request > {args.max_queries}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
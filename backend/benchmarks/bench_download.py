@@ -0,0 +1,163 @@
+# benchmarks/bench_download.py
+"""
+Concurrent large-file downloads: throughput and server memory.
+
+Starts the app under a real uvicorn server on localhost. The in-process
+ASGI client would buffer whole responses and hide the memory profile. Then
+``--concurrency`` clients download the same ``--size-mb`` file:
+
+* "before": a handler that reads the file into memory and returns it
+  (``Response(content=f.read())``), the naive download path,
+* "after": ``GET /documents/{id}/download``, streamed in
+  ``DOWNLOAD_CHUNK_SIZE`` chunks by ``FileRangeResponse``.
+
+RSS is sampled every 10ms from /proc while the downloads run. A final run
+fetches the file in 4 ranges and checks the bytes.
+
+    python -m benchmarks.bench_download --size-mb 200 --concurrency 8
+"""
+import asyncio
+import os
+import socket
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from fastapi.responses import Response
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.main import app
+from app.models import Document
+from app.models.base import get_db
+from benchmarks.common import base_parser, make_engine, seed_catalog
+
+DOCUMENT_ID = 1_000_000
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 1024 / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def naive_download(document_id: int):
+    with open(os.path.join(settings.UPLOAD_DIR, "bench/large.pdf"), "rb") as f:
+        return Response(content=f.read(), media_type="application/pdf")
+
+
+async def measure(name: str, base_url: str, path: str, args) -> None:
+    peak = rss_mb()
+    baseline = peak
+    done = asyncio.Event()
+
+    async def sampler() -> None:
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, rss_mb())
+            await asyncio.sleep(0.01)
+
+    async def download(client: httpx.AsyncClient) -> int:
+        received = 0
+        async with client.stream("GET", path) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+        return received
+
+    sample = asyncio.create_task(sampler())
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        received = sum(await asyncio.gather(*(download(client) for _ in range(args.concurrency))))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sample
+    print(
+        f"{name:<24} {received / 1024 / 1024:8.0f} MB in {elapsed:6.2f}s  "
+        f"{received / 1024 / 1024 / elapsed:8.1f} MB/s   RSS peak +{peak - baseline:7.1f} MB"
+    )
+
+
+async def check_ranges(base_url: str, path: str, file_path: str) -> None:
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        head = f.read(1024)
+        f.seek(-1024, os.SEEK_END)
+        tail = f.read()
+    part = size // 4
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        pieces = []
+        for start in range(0, size, part):
+            end = min(start + part, size) - 1
+            response = await client.get(path, headers={"Range": f"bytes={start}-{end}"})
+            assert response.status_code == 206, response.status_code
+            pieces.append(response.content)
+        first = await client.get(path, headers={"Range": "bytes=0-0"})
+        cached = await client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    data = b"".join(pieces)
+    ok = len(data) == size and data[:1024] == head and data[-1024:] == tail
+    print(f"ranged download: {len(pieces)} x 206, bytes match={ok}; If-None-Match -> {cached.status_code}")
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=8)
+    parser.add_argument("--size-mb", type=int, default=200)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp(prefix="bench-uploads-")
+    settings.UPLOAD_DIR = upload_dir
+    size = args.size_mb * 1024 * 1024
+    os.makedirs(os.path.join(upload_dir, "bench"))
+    block = os.urandom(1024 * 1024)
+    with open(os.path.join(upload_dir, "bench/large.pdf"), "wb") as f:
+        for _ in range(args.size_mb):
+            f.write(block)
+
+    engine = make_engine(args.url)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed_catalog(engine, documents=10, users=10, subjects=2, ratings_per_document=0)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Document).values(
+            document_id=DOCUMENT_ID, title="Large file", file_path="bench/large.pdf", file_size=size,
+            file_type="pdf", subject_id=1, user_id=1, status="approved",
+        ))
+
+    async def override_get_db():
+        async with SessionFactory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.add_api_route("/bench/naive/{document_id}", naive_download)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"{args.concurrency} concurrent downloads of {args.size_mb} MB, chunk={settings.DOWNLOAD_CHUNK_SIZE // 1024} KB")
+    try:
+        await measure("before (read whole file)", base_url, f"/bench/naive/{DOCUMENT_ID}", args)
+        await measure("after (streamed)", base_url, f"{settings.API_V1_STR}/documents/{DOCUMENT_ID}/download", args)
+        await check_ranges(
+            base_url, f"{settings.API_V1_STR}/documents/{DOCUMENT_ID}/download",
+            os.path.join(upload_dir, "bench/large.pdf"),
+        )
+    finally:
+        server.should_exit = True
+        await serving
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# benchmarks/bench_forum_thread.py
+"""
+Forum pages: query count and latency, naive loading vs ``app/services/forums.py``.
+
+"naive" builds the same pages the way lazy relationships would: per post a
+``COUNT`` of its replies and a query for its first replies, then one lookup
+per author (``session.get``, so repeated authors hit the identity map).
+"after" is ``forums.list_posts`` / ``forums.get_thread``: windowed reply
+pages and counts, authors in one ``IN`` query. The number of statements per
+page is counted with a ``before_cursor_execute`` listener.
+
+    python -m benchmarks.bench_forum_thread --per-page 20 --replies 3 --requests 300
+"""
+import asyncio
+from typing import Dict
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import ForumPost, ForumReply, User
+from app.services import forums
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_activity, seed_catalog
+
+
+async def naive_posts(db: AsyncSession, forum_id: int, per_page: int, replies: int) -> Dict:
+    result = await db.execute(
+        select(ForumPost).where(ForumPost.forum_id == forum_id, ForumPost.status == "approved")
+        .order_by(ForumPost.created_at.desc(), ForumPost.post_id.desc()).limit(per_page)
+    )
+    posts = []
+    for post in result.scalars():
+        reply_count = (await db.execute(
+            select(func.count()).where(ForumReply.post_id == post.post_id, ForumReply.status == "approved")
+        )).scalar()
+        first = (await db.execute(
+            select(ForumReply).where(ForumReply.post_id == post.post_id, ForumReply.status == "approved")
+            .order_by(ForumReply.created_at, ForumReply.reply_id).limit(replies)
+        )).scalars().all()
+        posts.append({
+            "post": post,
+            "user": await db.get(User, post.user_id),
+            "reply_count": reply_count,
+            "replies": [(reply, await db.get(User, reply.user_id)) for reply in first],
+        })
+    return {"posts": posts}
+
+
+async def naive_thread(db: AsyncSession, post_id: int, per_page: int) -> Dict:
+    post = await db.get(ForumPost, post_id)
+    replies = (await db.execute(
+        select(ForumReply).where(ForumReply.post_id == post_id, ForumReply.status == "approved")
+        .order_by(ForumReply.created_at, ForumReply.reply_id).limit(per_page)
+    )).scalars().all()
+    return {
+        "post": post,
+        "user": await db.get(User, post.user_id),
+        "replies": [(reply, await db.get(User, reply.user_id)) for reply in replies],
+    }
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=10, requests=300)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--replies", type=int, default=3)
+    parser.add_argument("--replies-per-post", type=int, default=30, help="seeded replies per post")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=2000, users=1000)
+    await seed_activity(engine, documents=2000, users=1000, replies_per_post=args.replies_per_post)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    statements = 0
+
+    def count_statement(*_) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    pages = {
+        "posts page": (
+            lambda db, i: naive_posts(db, i % 50 + 1, args.per_page, args.replies),
+            lambda db, i: forums.list_posts(db, i % 50 + 1, per_page=args.per_page, replies_per_post=args.replies),
+        ),
+        "thread page": (
+            lambda db, i: naive_thread(db, i % 2000 + 1, args.per_page),
+            lambda db, i: forums.get_thread(db, i % 2000 + 1, per_page=args.per_page),
+        ),
+    }
+    for label, (naive, service) in pages.items():
+        print(f"-- {label}")
+        for name, load in (("naive (per-row queries)", naive), ("after (windowed, batched)", service)):
+            async def request(i: int, load=load) -> None:
+                async with SessionFactory() as session:
+                    await load(session, i)
+
+            statements = 0
+            result = await run_concurrent(name, request, concurrency=args.concurrency, total=args.requests)
+            print(f"{result.report()}   {statements / args.requests:6.1f} queries/page")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+# benchmarks/bench_json_response.py
+"""
+Cost of producing a department list response body, per list size.
+
+"before" replays the old path: ORM rows turned into dicts with
+``.isoformat()`` by hand, re-validated by FastAPI against
+``response_model=List[DepartmentResponse]`` (``serialize_response``), then
+encoded again by the stdlib-backed ``JSONResponse``. "after" reads row
+mappings (``DepartmentCRUD.columns``) and serializes them once with the
+precompiled ``ResponseSerializer`` of the endpoint.
+
+    python -m benchmarks.bench_json_response --sizes 100 1000 --requests 500
+"""
+import asyncio
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.endpoints.departments import department_list_serializer
+from app.models import Department
+from app.schemas.department import DepartmentResponse
+from app.services.crud.department_crud import department_crud
+from benchmarks.common import base_parser, make_engine, reset_schema, run_concurrent
+
+
+def legacy_to_dict(department: Department) -> dict:
+    return {
+        "department_id": department.department_id,
+        "name": department.name,
+        "slug": department.slug,
+        "description": department.description,
+        "created_at": department.created_at.isoformat() if department.created_at else None,
+        "updated_at": department.updated_at.isoformat() if department.updated_at else None,
+    }
+
+
+async def seed(engine, count: int) -> None:
+    await reset_schema(engine)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "department_id": i,
+            "name": f"Khoa {i}",
+            "slug": f"khoa-{i}",
+            "description": f"Mô tả khoa số {i} " * 4,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, count + 1)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(Department), rows)
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=1, requests=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed(engine, max(args.sizes))
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    response_field = create_response_field(name="Response_get_departments", type_=List[DepartmentResponse])
+
+    for size in args.sizes:
+        async def before(i: int) -> None:
+            async with SessionFactory() as session:
+                result = await session.execute(select(Department).limit(size))
+                items = [legacy_to_dict(dept) for dept in result.scalars().all()]
+            content = await serialize_response(field=response_field, response_content=items)
+            JSONResponse(content)
+
+        async def after(i: int) -> None:
+            async with SessionFactory() as session:
+                result = await session.execute(select(*department_crud.columns).limit(size))
+                items = [dict(row) for row in result.mappings()]
+            department_list_serializer.response(items)
+
+        async def before_encode(i: int) -> None:
+            content = await serialize_response(field=response_field, response_content=legacy_items)
+            JSONResponse(content)
+
+        async def after_encode(i: int) -> None:
+            department_list_serializer.response(mapping_items)
+
+        async with SessionFactory() as session:
+            result = await session.execute(select(Department).limit(size))
+            legacy_items = [legacy_to_dict(dept) for dept in result.scalars().all()]
+            result = await session.execute(select(*department_crud.columns).limit(size))
+            mapping_items = [dict(row) for row in result.mappings()]
+
+        print(f"-- {size} items")
+        for name, request in (
+            ("before (query + encode)", before),
+            ("after (query + encode)", after),
+            ("before (encode only)", before_encode),
+            ("after (encode only)", after_encode),
+        ):
+            result = await run_concurrent(
+                name, request, concurrency=args.concurrency, total=args.requests
+            )
+            print(result.report())
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
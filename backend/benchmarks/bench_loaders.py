@@ -0,0 +1,121 @@
+# benchmarks/bench_loaders.py
+"""
+Nested response objects: query count and latency, per-row loading vs the
+request-scoped batch loaders of ``app/services/loaders.py``.
+
+The page is "latest ratings": ``--per-page`` ratings, each serialized with
+its author and its document (subject with major and academic year, author,
+tags, rating fields), i.e. ``Rating.user`` and ``SharedLink.document``-style
+nesting. "naive" resolves every nested object per row, as lazy loading
+would (``session.get`` for authors and documents, so repeats hit the
+identity map). "loaders" attaches authors and documents with
+``Loaders.users`` / ``Loaders.documents``: one ``IN`` query per entity type,
+and document authors already loaded as rating authors are not read again.
+
+The document list page (``document_crud.list_documents``) is counted too.
+Every page is validated with the response schema, which fails on any lazy
+load left behind. Statements are counted with a ``before_cursor_execute``
+listener.
+
+    python -m benchmarks.bench_loaders --per-page 50 --requests 300
+"""
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import joinedload, noload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Document, DocumentTag, Rating, Subject, Tag, User
+from app.schemas.document import Document as DocumentSchema, DocumentFilterRequest, DocumentListResponse
+from app.schemas.rating import Rating as RatingSchema
+from app.services.crud.document_crud import document_crud
+from app.services.loaders import Loaders, document_rating_options
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_catalog
+
+
+class RatingWithDocument(RatingSchema):
+    document: Optional[DocumentSchema] = None
+
+
+async def latest_ratings(db: AsyncSession, offset: int, per_page: int) -> List[Rating]:
+    result = await db.execute(
+        select(Rating).options(noload(Rating.user), noload(Rating.document))
+        .order_by(Rating.rating_id.desc()).offset(offset).limit(per_page)
+    )
+    return list(result.scalars())
+
+
+async def naive_page(db: AsyncSession, offset: int, per_page: int) -> List[RatingWithDocument]:
+    rows = await latest_ratings(db, offset, per_page)
+    for rating in rows:
+        set_committed_value(rating, "user", await db.get(User, rating.user_id))
+        document = await db.get(Document, rating.document_id, options=document_rating_options())
+        set_committed_value(document, "subject", await db.get(
+            Subject, document.subject_id,
+            options=[joinedload(Subject.major), joinedload(Subject.academic_year), noload(Subject.departments)],
+        ))
+        set_committed_value(document, "user", await db.get(User, document.user_id))
+        set_committed_value(document, "tags", list((await db.execute(
+            select(Tag).join(DocumentTag, DocumentTag.tag_id == Tag.tag_id)
+            .where(DocumentTag.document_id == document.document_id)
+        )).scalars()))
+        set_committed_value(rating, "document", document)
+    return [RatingWithDocument.model_validate(rating) for rating in rows]
+
+
+async def loaders_page(db: AsyncSession, offset: int, per_page: int) -> List[RatingWithDocument]:
+    rows = await latest_ratings(db, offset, per_page)
+    loaders = Loaders(db)
+    await loaders.users.attach(rows, "user_id", "user")
+    await loaders.documents.attach(rows, "document_id", "document")
+    return [RatingWithDocument.model_validate(rating) for rating in rows]
+
+
+async def document_list_page(db: AsyncSession, subject_id: int, per_page: int) -> DocumentListResponse:
+    result = await document_crud.list_documents(
+        db, filters=DocumentFilterRequest(subject_id=subject_id, per_page=per_page)
+    )
+    return DocumentListResponse.model_validate(result)
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=10, requests=300)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200, help="fewer users, more repeated authors per page")
+    parser.add_argument("--per-page", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=args.documents, users=args.users)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    statements = 0
+
+    def count_statement(*_) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    pages = (
+        ("ratings page, naive (per row)", lambda db, i: naive_page(db, i % 20 * args.per_page, args.per_page)),
+        ("ratings page, loaders", lambda db, i: loaders_page(db, i % 20 * args.per_page, args.per_page)),
+        ("document list, loaders", lambda db, i: document_list_page(db, i % 50 + 1, args.per_page)),
+    )
+    for name, load in pages:
+        async def request(i: int, load=load) -> None:
+            async with SessionFactory() as session:
+                await load(session, i)
+
+        statements = 0
+        result = await run_concurrent(name, request, concurrency=args.concurrency, total=args.requests)
+        print(f"{result.report()}   {statements / args.requests:6.1f} queries/page")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+# benchmarks/bench_login.py
+"""
+Logins/sec one worker sustains, and how long the event loop stalls meanwhile.
+
+"before" verifies the password inline in the coroutine, as the old login
+handler did, so each bcrypt call blocks the event loop. "after" is the
+current ``/auth/login``: bcrypt runs on the bounded hash pool
+(``PASSWORD_HASH_WORKERS``). A ticker coroutine measures event loop lag
+during each run: that is the delay every other request on the worker sees.
+
+The second "after" run seeds hashes at ``--old-rounds`` to show the
+transparent rehash: only the first login of each user pays the upgrade.
+
+    python -m benchmarks.bench_login --rounds 12 --concurrency 20 --requests 200
+"""
+import asyncio
+import time
+from typing import List
+
+from httpx import AsyncClient
+from passlib.context import CryptContext
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import security
+from app.main import app
+from app.models.base import get_db
+from app.models.user import User
+from app.services.crud import user_crud as user_crud_module
+from benchmarks.common import base_parser, make_engine, reset_schema, run_concurrent
+
+PASSWORD = "benchmark-password"
+
+
+async def seed(engine, users: int, rounds: int) -> None:
+    await reset_schema(engine)
+    password_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password_hash": password_hash,
+                "role": "student",
+                "status": "active",
+            }
+            for i in range(users)
+        ])
+
+
+async def inline_verify(plain_password, hashed_password):
+    """The old code path: bcrypt on the event loop thread"""
+    return security.pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def measure(name: str, client: AsyncClient, args) -> None:
+    lags: List[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        interval = 0.005
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    async def request(i: int) -> None:
+        response = await client.post(
+            "/api/v1/auth/login", params={"username": f"user{i % args.users}", "password": PASSWORD}
+        )
+        response.raise_for_status()
+
+    tick = asyncio.create_task(ticker())
+    result = await run_concurrent(name, request, concurrency=args.concurrency, total=args.requests)
+    done.set()
+    await tick
+    lags.sort()
+    print(result.report())
+    print(
+        f"{'':<28} event loop lag p50={lags[len(lags) // 2] * 1000:7.2f}ms   "
+        f"max={lags[-1] * 1000:7.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=20, requests=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=security.settings.BCRYPT_ROUNDS,
+                        help="bcrypt cost the app is configured with")
+    parser.add_argument("--old-rounds", type=int, default=10,
+                        help="cost of the stored hashes in the rehash run")
+    args = parser.parse_args()
+
+    # Cấu hình lại context theo --rounds (tương đương đặt BCRYPT_ROUNDS)
+    security.pwd_context.update(
+        bcrypt__rounds=args.rounds, bcrypt__min_rounds=args.rounds, bcrypt__max_rounds=args.rounds
+    )
+
+    engine = make_engine(args.url)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with SessionFactory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    print(f"bcrypt rounds={args.rounds}, hash workers={security.settings.PASSWORD_HASH_WORKERS}")
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        await seed(engine, args.users, args.rounds)
+        offloaded = user_crud_module.verify_and_update_password
+        user_crud_module.verify_and_update_password = inline_verify
+        try:
+            await measure("before (inline bcrypt)", client, args)
+        finally:
+            user_crud_module.verify_and_update_password = offloaded
+        await measure("after (hash pool)", client, args)
+
+        await seed(engine, args.users, args.old_rounds)
+        await measure(f"after, rehash from {args.old_rounds}", client, args)
+        async with SessionFactory() as db:
+            upgraded = (await db.execute(
+                select(func.count()).select_from(User)
+                .where(User.password_hash.like(f"$2b${args.rounds:02d}$%"))
+            )).scalar_one()
+        print(f"{upgraded}/{args.users} hashes upgraded to cost {args.rounds}")
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+# benchmarks/bench_notification_fanout.py
+"""
+Time to notify every follower of a subject when a document is approved.
+
+"before" creates one ``Notification`` per recipient with ``db.add()`` and
+flushes through the ORM unit of work. "after" is
+``notify_document_approved``: recipients are resolved and rows written by
+one ``INSERT ... SELECT``, so no row leaves the database. Only students
+follow a subject; the seeded lecturers are not notified by either side.
+
+    python -m benchmarks.bench_notification_fanout --followers 50000
+    python -m benchmarks.bench_notification_fanout --url postgresql+asyncpg://... --followers 50000
+"""
+import asyncio
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Document, DocumentHistory, Notification
+from app.services.notifications import notify_document_approved, subject_followers
+from app.utils.helpers import utcnow
+from benchmarks.common import _insert_chunked, base_parser, make_engine, seed_catalog
+
+SUBJECT_ID = 1
+
+
+async def seed_followers(engine, followers: int) -> int:
+    """Give subject 1 ``followers`` viewers; returns the document to approve"""
+    await seed_catalog(engine, documents=200, users=followers + 1, subjects=5, ratings_per_document=0)
+    async with engine.begin() as conn:
+        document_id = (await conn.execute(
+            select(func.min(Document.document_id)).where(Document.subject_id == SUBJECT_ID)
+        )).scalar_one()
+        await conn.execute(
+            Document.__table__.update()
+            .where(Document.document_id == document_id)
+            .values(status="approved", user_id=followers + 1)
+        )
+        now = utcnow()
+        await _insert_chunked(conn, DocumentHistory, [
+            {"document_id": document_id, "user_id": user_id, "action": "view", "created_at": now}
+            for user_id in range(1, followers + 1)
+        ])
+    return document_id
+
+
+async def orm_fan_out(db: AsyncSession, document_id: int) -> int:
+    """The per-row approach: one ORM object per recipient"""
+    user_ids = (await db.execute(select(subject_followers([SUBJECT_ID]).subquery().c.user_id))).scalars().all()
+    now = utcnow()
+    for user_id in user_ids:
+        db.add(Notification(
+            user_id=user_id, title="New document", content="A document was approved",
+            type="document_approved", reference_id=document_id, created_at=now,
+        ))
+    await db.commit()
+    return len(user_ids)
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--followers", type=int, default=50000)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    document_id = await seed_followers(engine, args.followers)
+
+    async with SessionFactory() as db:
+        started = time.perf_counter()
+        created = await orm_fan_out(db, document_id)
+        elapsed = time.perf_counter() - started
+        print(f"{'before (ORM add)':<28} {created:>7} rows  {elapsed:7.2f}s  {created / elapsed:>10,.0f} rows/s")
+        await db.execute(delete(Notification))
+        await db.commit()
+
+    async with SessionFactory() as db:
+        started = time.perf_counter()
+        result = await notify_document_approved(db, document_id)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{'after (INSERT ... SELECT)':<28} {result.recipients:>7} rows  {elapsed:7.2f}s  "
+            f"{result.recipients / elapsed:>10,.0f} rows/s"
+        )
+        # Chạy lại: mọi người đã nhận thông báo, không tạo thêm dòng nào
+        again = await notify_document_approved(db, document_id)
+        print(f"{'rerun (idempotent)':<28} {again.recipients:>7} rows")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
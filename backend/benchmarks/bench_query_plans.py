@@ -0,0 +1,115 @@
+# benchmarks/bench_query_plans.py
+"""
+Plan-regression check: EXPLAIN every hot lookup on a seeded database and
+fail when one of them reads its table with a sequential scan.
+
+Each entry of ``HOT_LOOKUPS`` names the table that must be reached through
+an index. On Postgres the plan comes from ``EXPLAIN (FORMAT JSON)`` after
+``ANALYZE`` (any "Seq Scan" node on that table fails); on SQLite from
+``EXPLAIN QUERY PLAN`` (a plain ``SCAN <table>`` fails). Run it after a
+migration or a query change, against Postgres for the plans production
+gets:
+
+    python -m benchmarks.bench_query_plans --url postgresql+asyncpg://... --documents 20000
+
+The script exits with status 1 when any lookup falls back to a sequential scan.
+"""
+import asyncio
+import json
+import re
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import false, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models import (
+    Comment, Document, DocumentHistory, ForumPost, ForumReply, Notification, Rating, User,
+)
+from benchmarks.common import base_parser, make_engine, seed_activity, seed_catalog
+
+# (tên, bảng phải đi qua index, câu truy vấn) - cùng dạng với các truy vấn trong app
+HOT_LOOKUPS = [
+    ("login by username", "users",
+     select(User).where(User.username == "user42").limit(1)),
+    ("documents of a subject", "documents",
+     select(Document.document_id).where(Document.subject_id == 7, Document.status == "approved")),
+    ("documents of an uploader", "documents",
+     select(Document.document_id).where(Document.user_id == 42)
+     .order_by(Document.created_at.desc()).limit(20)),
+    ("comments of a document", "comments",
+     select(Comment).where(Comment.document_id == 42).order_by(Comment.created_at).limit(20)),
+    ("ratings of a document", "ratings",
+     select(func.avg(Rating.score), func.count()).where(Rating.document_id == 42)),
+    ("posts of a forum", "forum_posts",
+     select(ForumPost.post_id).where(ForumPost.forum_id == 3)
+     .order_by(ForumPost.created_at.desc(), ForumPost.post_id.desc()).limit(20)),
+    ("replies of a post", "forum_replies",
+     select(ForumReply).where(ForumReply.post_id == 42)
+     .order_by(ForumReply.created_at, ForumReply.reply_id).limit(20)),
+    ("unread notifications", "notifications",
+     select(func.count()).select_from(Notification)
+     .where(Notification.user_id == 42, Notification.is_read == false())),
+    ("history of a document", "document_history",
+     select(DocumentHistory).where(DocumentHistory.document_id == 42)
+     .order_by(DocumentHistory.created_at.desc()).limit(20)),
+]
+
+SQLITE_SEQ_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def _postgres_nodes(plan: dict) -> List[Tuple[str, str]]:
+    nodes = [(plan["Node Type"], plan.get("Relation Name", ""))]
+    for child in plan.get("Plans", []):
+        nodes.extend(_postgres_nodes(child))
+    return nodes
+
+
+async def explain(engine: AsyncEngine, statement) -> Tuple[List[str], List[str]]:
+    """Return (plan lines, tables read with a sequential scan)"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    async with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            raw = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            nodes = _postgres_nodes(plan)
+            lines = [f"{node} on {relation}" if relation else node for node, relation in nodes]
+            return lines, [relation for node, relation in nodes if node == "Seq Scan"]
+        rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+        lines = [row[-1] for row in rows]
+        return lines, [match.group(1) for match in map(SQLITE_SEQ_SCAN.match, lines) if match]
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=args.documents, users=args.users)
+    await seed_activity(engine, documents=args.documents, users=args.users)
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+    failures = []
+    for name, table, statement in HOT_LOOKUPS:
+        lines, seq_scans = await explain(engine, statement)
+        ok = table not in seq_scans
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {lines[0] if ok else f'Seq Scan on {table}'}")
+        if args.verbose or not ok:
+            for line in lines:
+                print(f"       {line}")
+        if not ok:
+            failures.append(name)
+    await engine.dispose()
+
+    if failures:
+        print(f"\n{len(failures)}/{len(HOT_LOOKUPS)} hot lookups fall back to a sequential scan")
+        sys.exit(1)
+    print(f"\nall {len(HOT_LOOKUPS)} hot lookups use an index")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
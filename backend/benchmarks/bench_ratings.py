@@ -0,0 +1,131 @@
+# benchmarks/bench_ratings.py
+"""
+Document list latency with rating aggregates, plus the cost of rating writes.
+
+"before" loads list pages with ``average_rating`` / ``rating_count``
+computed by correlated ``AVG(score)`` / ``COUNT(*)`` subqueries over
+``ratings``. "after" reads them from ``document_rating_stats`` by primary
+key. The two rating columns are timed alone for a page of ``--per-page``
+documents, then with the whole ``document_crud.list_documents`` call,
+cycling through the list pages by their ``next_cursor``.
+
+Then ``--writes`` ratings are written through ``ratings.rate_document`` (new
+ratings and changed scores), and ``repair_rating_stats`` checks that no
+aggregate drifted.
+
+    python -m benchmarks.bench_ratings --documents 5000 --ratings-per-document 100
+"""
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Document, Rating
+from app.schemas.document import DocumentFilterRequest
+from app.services import ratings
+from app.services.crud.document_crud import document_crud
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_catalog
+
+
+def scan_average():
+    return (
+        select(func.coalesce(func.avg(Rating.score), 0))
+        .where(Rating.document_id == Document.document_id, Rating.score > 0)
+        .correlate(Document)
+        .scalar_subquery()
+    )
+
+
+def scan_count():
+    return (
+        select(func.count())
+        .where(Rating.document_id == Document.document_id, Rating.score > 0)
+        .correlate(Document)
+        .scalar_subquery()
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=4, requests=300)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ratings-per-document", type=int, default=100)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(
+        engine, documents=args.documents, users=args.users, subjects=20,
+        ratings_per_document=args.ratings_per_document,
+    )
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    pages = max(1, args.documents // args.per_page)
+
+    def list_filters(cursor=None) -> DocumentFilterRequest:
+        return DocumentFilterRequest(cursor=cursor, per_page=args.per_page, order_by="view_count")
+
+    # Trang sau trang đầu chỉ tới được qua next_cursor: duyệt một lượt để lấy cursor của từng trang
+    cursors = [None]
+    async with SessionFactory() as db:
+        while len(cursors) < pages:
+            result = await document_crud.list_documents(db, filters=list_filters(cursors[-1]))
+            if result["next_cursor"] is None:
+                break
+            cursors.append(result["next_cursor"])
+
+    async def list_page(i: int) -> None:
+        async with SessionFactory() as db:
+            await document_crud.list_documents(db, filters=list_filters(cursors[i % len(cursors)]))
+
+    def rating_columns(average, count):
+        async def request(i: int) -> None:
+            first = (i % pages) * args.per_page + 1
+            async with SessionFactory() as db:
+                await db.execute(
+                    select(Document.document_id, average(), count())
+                    .where(Document.document_id.between(first, first + args.per_page - 1))
+                )
+        return request
+
+    print(f"{args.documents} documents x {args.ratings_per_document} ratings, {args.per_page} per page")
+    after_average, after_count = ratings.average_rating_expression, ratings.rating_count_expression
+    for name, call in (
+        ("ratings before (AVG scan)", rating_columns(scan_average, scan_count)),
+        ("ratings after (aggregates)", rating_columns(after_average, after_count)),
+    ):
+        print((await run_concurrent(name, call, concurrency=args.concurrency, total=args.requests)).report())
+    ratings.average_rating_expression, ratings.rating_count_expression = scan_average, scan_count
+    try:
+        print((await run_concurrent(
+            "list before (AVG scan)", list_page, concurrency=args.concurrency, total=args.requests
+        )).report())
+    finally:
+        ratings.average_rating_expression, ratings.rating_count_expression = after_average, after_count
+    print((await run_concurrent(
+        "list after (aggregates)", list_page, concurrency=args.concurrency, total=args.requests
+    )).report())
+
+    async def write(i: int) -> None:
+        rnd = random.Random(i)
+        async with SessionFactory() as db:
+            await ratings.rate_document(
+                db,
+                document_id=rnd.randint(1, args.documents),
+                user_id=rnd.randint(1, args.users),
+                score=rnd.randint(0, 5),
+            )
+
+    print((await run_concurrent("rating upsert", write, concurrency=args.concurrency, total=args.writes)).report())
+    async with SessionFactory() as db:
+        started = time.perf_counter()
+        repaired = await ratings.repair_rating_stats(db)
+        print(f"repair: {repaired} drifted rows, {time.perf_counter() - started:.2f}s for the whole catalog")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start budget of one worker: importing ``app.main`` plus the lifespan warm-up.
+
+Each run imports the application in a fresh interpreter under
+``python -X importtime``. The import time is the median over ``--runs``, and
+the slowest modules by cumulative import time are listed from the last run.
+The warm-up (``app.db.warmup.warm_up``: mapper configuration, pool warm-up,
+hot queries) is then timed against ``--url`` on a seeded catalog.
+
+The script exits with status 1 when import + warm-up exceeds ``--budget-ms``,
+so CI catches cold-start regressions before they slow down autoscaling.
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 2500
+"""
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.warmup import warm_up
+from benchmarks.common import base_parser, make_engine, seed_catalog
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+CHILD = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def import_once() -> Tuple[float, List[Tuple[int, int, str]]]:
+    """Import ``app.main`` in a fresh interpreter; returns (seconds, [(self_us, cumulative_us, module)])"""
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "CACHE_BACKEND": "memory"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = [
+        (int(match.group(1)), int(match.group(2)), match.group(4))
+        for match in map(IMPORTTIME_LINE.match, proc.stderr.splitlines()) if match
+    ]
+    return float(proc.stdout.strip().splitlines()[-1]), modules
+
+
+async def time_warm_up(url: str, documents: int) -> dict:
+    engine = make_engine(url)
+    await seed_catalog(engine, documents=documents, users=200)
+    await engine.dispose()
+    engine = make_engine(url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        return await warm_up(engine, session_factory)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=2500.0)
+    parser.add_argument("--documents", type=int, default=2000)
+    args = parser.parse_args()
+
+    durations = []
+    modules: List[Tuple[int, int, str]] = []
+    for _ in range(args.runs):
+        seconds, modules = import_once()
+        durations.append(seconds)
+    import_ms = statistics.median(durations) * 1000
+
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for self_us, cumulative_us, name in sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {name}")
+
+    started = time.perf_counter()
+    timings = asyncio.run(time_warm_up(args.url, args.documents))
+    warm_up_ms = sum(timings.values()) * 1000
+    print(f"\nimport app.main      p50={import_ms:8.1f}ms  (min {min(durations) * 1000:.1f}ms, {args.runs} runs)")
+    for step, seconds in timings.items():
+        print(f"warm-up {step:<22} {seconds * 1000:8.1f}ms")
+    print(f"seed + warm-up wall  {(time.perf_counter() - started) * 1000:8.1f}ms")
+
+    total_ms = import_ms + warm_up_ms
+    verdict = "OK" if total_ms <= args.budget_ms else "OVER BUDGET"
+    print(f"\ncold start           {total_ms:8.1f}ms / budget {args.budget_ms:.0f}ms  {verdict}")
+    if total_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_statistics.py
+"""
+Latency of the site statistics under concurrent dashboard loads.
+
+"before" computes ``StatisticsResponse`` from the source tables on every
+request: ``COUNT(*)`` of approved documents and users plus
+``SUM(view_count)`` / ``SUM(download_count)`` over ``documents``. "after"
+reads the ``stat_counters`` rows (``statistics.get_overview``), which the
+rollup and the event flush keep up to date. The per-department breakdown is
+timed the same way.
+
+    python -m benchmarks.bench_statistics --documents 200000 --concurrency 20 --requests 500
+"""
+import asyncio
+import time
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Department, Document, SubjectDepartment, User
+from app.services import statistics
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_catalog
+
+
+async def naive_overview(db: AsyncSession) -> dict:
+    documents = await db.execute(select(
+        func.count().filter(Document.status == "approved"),
+        func.coalesce(func.sum(Document.view_count), 0),
+        func.coalesce(func.sum(Document.download_count), 0),
+    ))
+    total_documents, total_views, total_downloads = documents.one()
+    total_users = await db.scalar(select(func.count()).select_from(User))
+    return {
+        "total_documents": total_documents,
+        "total_users": total_users,
+        "total_downloads": total_downloads,
+        "total_views": total_views,
+    }
+
+
+async def naive_departments(db: AsyncSession) -> list:
+    approved = case((Document.status == "approved", 1), else_=0)
+    result = await db.execute(
+        select(
+            Department.department_id,
+            func.coalesce(func.sum(approved), 0),
+            func.coalesce(func.sum(Document.view_count), 0),
+            func.coalesce(func.sum(Document.download_count), 0),
+        )
+        .join(SubjectDepartment, SubjectDepartment.department_id == Department.department_id)
+        .join(Document, Document.subject_id == SubjectDepartment.subject_id)
+        .group_by(Department.department_id)
+    )
+    return result.all()
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=20, requests=500)
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--subjects", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=args.documents, users=1000, subjects=args.subjects, ratings_per_document=0)
+    async with engine.begin() as conn:
+        await conn.execute(Department.__table__.insert(), [
+            {"department_id": d, "name": f"Department {d}", "slug": f"department-{d}"} for d in range(1, 6)
+        ])
+        await conn.execute(SubjectDepartment.__table__.insert(), [
+            {"subject_id": s, "department_id": s % 5 + 1} for s in range(1, args.subjects + 1)
+        ])
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with SessionFactory() as db:
+        await statistics.rollup(db)
+        naive = await naive_overview(db)
+        counters = await statistics.get_overview(db)
+    counters.pop("updated_at")
+    print(f"{args.documents} documents; counters match naive totals: {counters == naive}")
+
+    def timed(call):
+        async def request(i: int) -> None:
+            async with SessionFactory() as db:
+                await call(db)
+        return request
+
+    for name, call in (
+        ("overview before (scan)", naive_overview),
+        ("overview after (counters)", statistics.get_overview),
+        ("departments before (scan)", naive_departments),
+        ("departments after (counters)", statistics.get_department_statistics),
+    ):
+        result = await run_concurrent(name, timed(call), concurrency=args.concurrency, total=args.requests)
+        print(result.report())
+
+    async with SessionFactory() as db:
+        started = time.perf_counter()
+        await statistics.rollup(db)
+        print(f"rollup: {(time.perf_counter() - started) * 1000:.0f}ms every STATS_ROLLUP_INTERVAL")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# benchmarks/bench_time_window.py
+"""
+Time-windowed document queries before and after the timestamptz conversion.
+
+"before" copies ``documents`` into ``legacy_documents`` with ``created_at``
+stored as text and no index on it, as the old String models created it. A
+"last N days" filter there is a string comparison on a sequential scan.
+"after" runs the same queries on ``documents``: ``created_at`` is
+``DateTime(timezone=True)`` and covered by ``idx_documents_created_at`` /
+``idx_documents_status_created_at``.
+
+Queries: newest page of approved documents, the same page restricted to the
+window, and a count of documents created in the window.
+
+    python -m benchmarks.bench_time_window --documents 50000 --days 7
+"""
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Document
+from app.utils.helpers import utcnow
+from benchmarks.common import base_parser, make_engine, run_concurrent, seed_catalog
+
+legacy_documents = Table(
+    "legacy_documents", MetaData(),
+    Column("document_id", Integer, primary_key=True),
+    Column("status", String),
+    Column("created_at", String),
+)
+
+
+async def copy_legacy(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(legacy_documents.metadata.drop_all)
+        await conn.run_sync(legacy_documents.metadata.create_all)
+        await conn.execute(legacy_documents.insert().from_select(
+            ["document_id", "status", "created_at"],
+            select(Document.document_id, Document.status, func.cast(Document.created_at, String)),
+        ))
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("ANALYZE legacy_documents"))
+            await conn.execute(text("ANALYZE documents"))
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=10, requests=500)
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    await seed_catalog(engine, documents=args.documents, users=1000)
+    await copy_legacy(engine)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    since = utcnow() - timedelta(days=args.days)
+    legacy = legacy_documents.c
+    queries = {
+        "newest page": (
+            select(legacy.document_id).where(legacy.status == "approved")
+            .order_by(legacy.created_at.desc(), legacy.document_id.desc()).limit(args.page_size),
+            select(Document.document_id).where(Document.status == "approved")
+            .order_by(Document.created_at.desc(), Document.document_id.desc()).limit(args.page_size),
+        ),
+        f"page in last {args.days} days": (
+            select(legacy.document_id)
+            .where(legacy.status == "approved", legacy.created_at >= since.isoformat(sep=" "))
+            .order_by(legacy.created_at.desc(), legacy.document_id.desc()).limit(args.page_size),
+            select(Document.document_id)
+            .where(Document.status == "approved", Document.created_at >= since)
+            .order_by(Document.created_at.desc(), Document.document_id.desc()).limit(args.page_size),
+        ),
+        f"count last {args.days} days": (
+            select(func.count()).select_from(legacy_documents)
+            .where(legacy.created_at >= since.isoformat(sep=" ")),
+            select(func.count()).select_from(Document).where(Document.created_at >= since),
+        ),
+    }
+
+    for label, (before_query, after_query) in queries.items():
+        print(f"-- {label}")
+        for name, query in (("before (text, no index)", before_query), ("after (timestamptz, index)", after_query)):
+            async def request(i: int, query=query) -> None:
+                async with SessionFactory() as session:
+                    (await session.execute(query)).all()
+
+            result = await run_concurrent(name, request, concurrency=args.concurrency, total=args.requests)
+            print(result.report())
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+# benchmarks/bench_upload.py
+"""
+Concurrent large-file uploads: throughput, server memory and disk usage.
+
+Starts the app under a real uvicorn server on localhost, then
+``--concurrency`` clients upload the same ``--size-mb`` file as multipart:
+
+* "before": a handler that reads the whole part (``await file.read()``),
+  hashes it and writes it out, the naive upload path,
+* "after": ``POST /documents/``, where the part is streamed to a temporary
+  file and hashed as it arrives, then stored once by content
+  (``blobs/ab/cd/<sha256>``).
+
+RSS is sampled every 10ms from /proc while the uploads run. Every "after"
+upload has the same content, so the documents share one blob on disk.
+
+    python -m benchmarks.bench_upload --size-mb 100 --concurrency 4
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from fastapi import File, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Document, FileBlob
+from app.models.base import get_db
+from benchmarks.bench_download import free_port, rss_mb
+from benchmarks.common import base_parser, make_engine, seed_catalog
+
+
+async def naive_upload(file: UploadFile = File(...)):
+    content = await file.read()
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = os.path.join(settings.UPLOAD_DIR, "naive", sha256 + "-" + os.urandom(4).hex())
+    with open(path, "wb") as f:
+        f.write(content)
+    return {"sha256": sha256, "size": len(content)}
+
+
+def disk_usage_mb(directory: str) -> float:
+    total = 0
+    for root, _, files in os.walk(directory):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1024 / 1024
+
+
+async def measure(name: str, base_url: str, path: str, source: str, args, headers=None) -> None:
+    peak = rss_mb()
+    baseline = peak
+    done = asyncio.Event()
+
+    async def sampler() -> None:
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, rss_mb())
+            await asyncio.sleep(0.01)
+
+    async def upload(client: httpx.AsyncClient, index: int) -> None:
+        with open(source, "rb") as f:
+            response = await client.post(
+                path, headers=headers,
+                data={"title": f"Upload {index}", "subject_id": "1"},
+                files={"file": ("large.pdf", f, "application/pdf")},
+            )
+        assert response.status_code in (200, 201), (response.status_code, response.text)
+
+    sample = asyncio.create_task(sampler())
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        await asyncio.gather(*(upload(client, index) for index in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sample
+    sent = args.size_mb * args.concurrency
+    print(
+        f"{name:<24} {sent:8.0f} MB in {elapsed:6.2f}s  "
+        f"{sent / elapsed:8.1f} MB/s   RSS peak +{peak - baseline:7.1f} MB"
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.set_defaults(concurrency=4)
+    parser.add_argument("--size-mb", type=int, default=100)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp(prefix="bench-uploads-")
+    settings.UPLOAD_DIR = upload_dir
+    settings.MAX_UPLOAD_SIZE = (args.size_mb + 1) * 1024 * 1024
+    os.makedirs(os.path.join(upload_dir, "naive"))
+    source = os.path.join(tempfile.mkdtemp(prefix="bench-source-"), "large.pdf")
+    block = os.urandom(1024 * 1024)
+    with open(source, "wb") as f:
+        for _ in range(args.size_mb):
+            f.write(block)
+
+    engine = make_engine(args.url)
+    SessionFactory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed_catalog(engine, documents=10, users=10, subjects=2, ratings_per_document=0)
+
+    async def override_get_db():
+        async with SessionFactory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.add_api_route("/bench/naive-upload", naive_upload, methods=["POST"])
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"{args.concurrency} concurrent uploads of {args.size_mb} MB")
+    try:
+        await measure("before (read whole part)", base_url, "/bench/naive-upload", source, args)
+        await measure("after (streamed + CAS)", base_url, f"{settings.API_V1_STR}/documents/", source, args, headers)
+        async with SessionFactory() as db:
+            documents = await db.scalar(select(func.count()).select_from(Document).where(Document.file_path.like("blobs/%")))
+            blobs = (await db.execute(select(FileBlob))).scalars().all()
+        print(
+            f"before: {disk_usage_mb(os.path.join(upload_dir, 'naive')):.0f} MB on disk; "
+            f"after: {documents} documents -> {len(blobs)} blob(s), "
+            f"ref_count={[blob.ref_count for blob in blobs]}, "
+            f"{disk_usage_mb(os.path.join(upload_dir, 'blobs')):.0f} MB on disk"
+        )
+    finally:
+        server.should_exit = True
+        await serving
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
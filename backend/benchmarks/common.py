@@ -0,0 +1,274 @@
+# benchmarks/common.py
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks run against ``--url`` (default: a throwaway SQLite file) so they
+can be executed without the docker stack; point them at Postgres with
+``--url postgresql+asyncpg://...`` for numbers that match production.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import app.models  # noqa: F401  (registers every model and relationship)
+from app.models import (
+    AcademicYear, Comment, Document, DocumentHistory, DocumentRatingStats, DocumentTag, Forum,
+    ForumPost, ForumReply, Major, Notification, Rating, Subject, Tag, User,
+)
+from app.models.base import Base
+from app.services import ratings
+from app.utils.helpers import utcnow
+
+DEFAULT_URL = "sqlite+aiosqlite:///./benchmark.db"
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", default=DEFAULT_URL, help="Async database URL")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    return parser
+
+
+def make_engine(url: str) -> AsyncEngine:
+    if "postgresql" in url:
+        return create_async_engine(url, pool_size=20, max_overflow=20)
+    # SQLite serializes writers: wait for the lock instead of failing after 5s
+    return create_async_engine(url, connect_args={"timeout": 60})
+
+
+async def reset_schema(engine: AsyncEngine) -> None:
+    """Drop and recreate every table of the ORM metadata"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def _insert_chunked(conn, model, rows: List[Dict], chunk: int = 5000) -> None:
+    for start in range(0, len(rows), chunk):
+        await conn.execute(insert(model), rows[start:start + chunk])
+
+
+async def seed_catalog(
+    engine: AsyncEngine,
+    *,
+    documents: int = 10000,
+    users: int = 1000,
+    subjects: int = 50,
+    tags: int = 30,
+    ratings_per_document: int = 3,
+    seed: int = 42,
+) -> None:
+    """
+    Recreate the schema and fill it with a deterministic catalog:
+    majors/years/subjects, users, documents with tags and ratings.
+    """
+    rnd = random.Random(seed)
+    now = utcnow()
+    await reset_schema(engine)
+
+    def stamp(days_back: int) -> datetime:
+        return now - timedelta(days=days_back, seconds=rnd.randint(0, 86399))
+
+    async with engine.begin() as conn:
+        await _insert_chunked(conn, Major, [
+            {"major_id": i, "major_name": f"Major {i}", "major_code": f"M{i}"} for i in range(1, 6)
+        ])
+        await _insert_chunked(conn, AcademicYear, [
+            {"year_id": i, "year_name": f"Year {i}", "year_order": i} for i in range(1, 5)
+        ])
+        await _insert_chunked(conn, Subject, [
+            {
+                "subject_id": i,
+                "subject_name": f"Subject {i}",
+                "subject_code": f"S{i:03d}",
+                "major_id": i % 5 + 1,
+                "year_id": i % 4 + 1,
+            }
+            for i in range(1, subjects + 1)
+        ])
+        await _insert_chunked(conn, User, [
+            {
+                "user_id": i,
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "full_name": f"User {i}",
+                "role": "student" if i % 10 else "lecturer",
+                "status": "active",
+                "created_at": stamp(365),
+            }
+            for i in range(1, users + 1)
+        ])
+        await _insert_chunked(conn, Tag, [
+            {"tag_id": i, "tag_name": f"tag{i}"} for i in range(1, tags + 1)
+        ])
+        await _insert_chunked(conn, Document, [
+            {
+                "document_id": i,
+                "title": f"Document {rnd.randint(0, documents)} about subject {i % subjects}",
+                "description": f"Lecture notes number {i}",
+                "file_path": f"seed/{i}.pdf",
+                "file_size": rnd.randint(10_000, 5_000_000),
+                "file_type": "pdf",
+                "subject_id": rnd.randint(1, subjects),
+                "user_id": rnd.randint(1, users),
+                "status": rnd.choice(("approved", "approved", "approved", "pending", "rejected")),
+                "view_count": rnd.randint(0, 5000),
+                "download_count": rnd.randint(0, 500),
+                "created_at": stamp(rnd.randint(0, 720)),
+            }
+            for i in range(1, documents + 1)
+        ])
+        await _insert_chunked(conn, DocumentTag, [
+            {"document_id": i, "tag_id": tag_id}
+            for i in range(1, documents + 1)
+            for tag_id in rnd.sample(range(1, tags + 1), 2)
+        ])
+        await _insert_chunked(conn, Rating, [
+            {"document_id": i, "user_id": user_id, "score": rnd.randint(0, 5)}
+            for i in range(1, documents + 1)
+            for user_id in rnd.sample(range(1, users + 1), ratings_per_document)
+        ])
+        aggregates = ratings.aggregate_query()
+        await conn.execute(DocumentRatingStats.__table__.insert().from_select(
+            [column.name for column in aggregates.selected_columns], aggregates
+        ))
+
+
+async def seed_activity(
+    engine: AsyncEngine,
+    *,
+    documents: int,
+    users: int,
+    subjects: int = 50,
+    posts_per_forum: int = 40,
+    replies_per_post: int = 10,
+    comments_per_document: int = 2,
+    history_per_document: int = 5,
+    notifications_per_user: int = 50,
+    seed: int = 7,
+) -> None:
+    """
+    Add forums (one per subject) with posts and replies, comments, document
+    history and notifications on top of ``seed_catalog`` with the same sizes.
+    """
+    rnd = random.Random(seed)
+    now = utcnow()
+
+    def stamp(days_back: int) -> datetime:
+        return now - timedelta(days=days_back, seconds=rnd.randint(0, 86399))
+
+    posts = subjects * posts_per_forum
+    async with engine.begin() as conn:
+        await _insert_chunked(conn, Forum, [
+            {"forum_id": i, "subject_id": i, "created_at": stamp(720)} for i in range(1, subjects + 1)
+        ])
+        await _insert_chunked(conn, ForumPost, [
+            {
+                "post_id": i,
+                "forum_id": (i - 1) // posts_per_forum + 1,
+                "user_id": rnd.randint(1, users),
+                "title": f"Question {i}",
+                "content": f"Post body number {i}",
+                "status": "approved",
+                "created_at": stamp(rnd.randint(0, 365)),
+            }
+            for i in range(1, posts + 1)
+        ])
+        await _insert_chunked(conn, ForumReply, [
+            {
+                "post_id": post_id,
+                "user_id": rnd.randint(1, users),
+                "content": f"Reply to post {post_id}",
+                "status": rnd.choice(("approved", "approved", "approved", "pending")),
+                "created_at": stamp(rnd.randint(0, 365)),
+            }
+            for post_id in range(1, posts + 1)
+            for _ in range(replies_per_post)
+        ])
+        await _insert_chunked(conn, Comment, [
+            {
+                "document_id": document_id,
+                "user_id": rnd.randint(1, users),
+                "content": f"Comment on document {document_id}",
+                "status": "approved",
+                "created_at": stamp(rnd.randint(0, 365)),
+            }
+            for document_id in range(1, documents + 1)
+            for _ in range(comments_per_document)
+        ])
+        await _insert_chunked(conn, DocumentHistory, [
+            {
+                "document_id": rnd.randint(1, documents),
+                "user_id": rnd.randint(1, users),
+                "action": rnd.choice(("view", "view", "view", "download")),
+                "created_at": stamp(rnd.randint(0, 365)),
+            }
+            for _ in range(documents * history_per_document)
+        ])
+        await _insert_chunked(conn, Notification, [
+            {
+                "user_id": user_id,
+                "title": "New document",
+                "content": f"Notification for user {user_id}",
+                "is_read": rnd.random() < 0.9,
+                "type": "new_document",
+                "reference_id": rnd.randint(1, documents),
+                "created_at": stamp(rnd.randint(0, 365)),
+            }
+            for user_id in range(1, users + 1)
+            for _ in range(notifications_per_user)
+        ])
+
+
+@dataclass
+class RunResult:
+    name: str
+    elapsed: float
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def rps(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+    def report(self) -> str:
+        return (
+            f"{self.name:<28} {self.rps:10.1f} req/s   "
+            f"p50={statistics.median(self.latencies) * 1000:7.2f}ms   "
+            f"p95={self.percentile(95):7.2f}ms   p99={self.percentile(99):7.2f}ms"
+        )
+
+
+async def run_concurrent(
+    name: str,
+    request: Callable[[int], Awaitable[None]],
+    *,
+    concurrency: int,
+    total: int,
+) -> RunResult:
+    """Run ``total`` calls of ``request`` with at most ``concurrency`` in flight"""
+    result = RunResult(name=name, elapsed=0.0)
+    counter = iter(range(total))
+
+    async def client() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            await request(i)
+            result.latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -9,15 +9,15 @@ CREATE TYPE user_role AS ENUM ('student', 'lecturer', 'admin');
 CREATE TYPE user_status AS ENUM ('active', 'banned', 'pending');
 CREATE TYPE document_status AS ENUM ('approved', 'pending', 'rejected');
 CREATE TYPE forum_status AS ENUM ('approved', 'pending', 'rejected');
-CREATE TYPE history_action AS ENUM ('view', 'download');
+CREATE TYPE history_action AS ENUM ('view', 'download', 'approve', 'reject');
 
 -- 1. Create academic_years table
 CREATE TABLE academic_years (
     year_id SERIAL PRIMARY KEY,
     year_name VARCHAR(50) NOT NULL,
     year_order INTEGER NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 2. Create majors table
@@ -26,8 +26,8 @@ CREATE TABLE majors (
     major_name VARCHAR(100) NOT NULL,
     major_code VARCHAR(20) NOT NULL UNIQUE,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for major_code
@@ -39,8 +39,8 @@ CREATE TABLE departments (
     name VARCHAR(100) NOT NULL,
     slug VARCHAR(50) NOT NULL UNIQUE,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create indexes for departments
@@ -51,7 +51,7 @@ CREATE TABLE subject_departments (
     id SERIAL PRIMARY KEY,
     subject_id INTEGER NOT NULL REFERENCES subjects(subject_id) ON DELETE CASCADE,
     department_id INTEGER NOT NULL REFERENCES departments(department_id) ON DELETE CASCADE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT uix_subject_department UNIQUE (subject_id, department_id)
 );
 
@@ -70,9 +70,9 @@ CREATE TABLE users (
     status user_status DEFAULT 'active' NOT NULL,
     google_id VARCHAR(100),
     university_id VARCHAR(50),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    last_login TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMPTZ
 );
 
 -- Create index for email
@@ -86,8 +86,8 @@ CREATE TABLE subjects (
     description TEXT,
     major_id INTEGER NOT NULL REFERENCES majors(major_id),
     year_id INTEGER NOT NULL REFERENCES academic_years(year_id),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT uix_major_subject_code UNIQUE (major_id, subject_code)
 );
 
@@ -107,8 +107,13 @@ CREATE TABLE documents (
     status document_status DEFAULT 'pending',
     view_count INTEGER DEFAULT 0,
     download_count INTEGER DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    -- Full-text search: title weighted A, description weighted B
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
 );
 
 -- Create indexes for documents
@@ -117,12 +122,13 @@ CREATE INDEX idx_document_file_type ON documents(file_type);
 CREATE INDEX idx_document_subject_id ON documents(subject_id);
 CREATE INDEX idx_document_user_id ON documents(user_id);
 CREATE INDEX idx_document_status ON documents(status);
+CREATE INDEX idx_documents_search_vector ON documents USING GIN (search_vector);
 
 -- 6. Create tags table
 CREATE TABLE tags (
     tag_id SERIAL PRIMARY KEY,
     tag_name VARCHAR(50) NOT NULL UNIQUE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create index for tag_name
@@ -133,7 +139,7 @@ CREATE TABLE document_tags (
     id SERIAL PRIMARY KEY,
     document_id INTEGER NOT NULL REFERENCES documents(document_id),
     tag_id INTEGER NOT NULL REFERENCES tags(tag_id),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT uix_document_tag UNIQUE (document_id, tag_id)
 );
 
@@ -144,8 +150,8 @@ CREATE TABLE comments (
     user_id INTEGER NOT NULL REFERENCES users(user_id),
     content TEXT NOT NULL,
     status forum_status DEFAULT 'approved',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 9. Create ratings table
@@ -154,18 +160,49 @@ CREATE TABLE ratings (
     document_id INTEGER NOT NULL REFERENCES documents(document_id),
     user_id INTEGER NOT NULL REFERENCES users(user_id),
     score INTEGER NOT NULL CHECK (score >= 0 AND score <= 5),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT uix_user_document_rating UNIQUE (user_id, document_id)
 );
 
 -- 10. Create document_history table
+-- Range-partitioned by month; partitions are created ahead and dropped after
+-- retention by the maintain_history job (app/services/history.py)
 CREATE TABLE document_history (
-    history_id SERIAL PRIMARY KEY,
+    history_id SERIAL,
     document_id INTEGER NOT NULL REFERENCES documents(document_id),
     user_id INTEGER NOT NULL REFERENCES users(user_id),
     action history_action NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (history_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+DO $$
+DECLARE
+    month_start TIMESTAMPTZ;
+BEGIN
+    -- Partitions theo tháng UTC
+    PERFORM set_config('TimeZone', 'UTC', true);
+    month_start := date_trunc('month', now());
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE document_history_p%s PARTITION OF document_history FOR VALUES FROM (%L) TO (%L)',
+            to_char(month_start + make_interval(months => i), 'YYYYMM'),
+            month_start + make_interval(months => i),
+            month_start + make_interval(months => i + 1)
+        );
+    END LOOP;
+END $$;
+
+-- Per-document daily aggregates of document_history (kept after raw partitions are dropped)
+CREATE TABLE document_history_daily (
+    document_id INTEGER NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    action history_action NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    users INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT pk_document_history_daily PRIMARY KEY (document_id, day, action)
 );
 
 -- 11. Create shared_links table
@@ -174,15 +211,15 @@ CREATE TABLE shared_links (
     document_id INTEGER NOT NULL REFERENCES documents(document_id),
     user_id INTEGER NOT NULL REFERENCES users(user_id),
     share_token VARCHAR(100) NOT NULL UNIQUE,
-    expiration_date TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    expiration_date TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 12. Create forums table
 CREATE TABLE forums (
     forum_id SERIAL PRIMARY KEY,
     subject_id INTEGER NOT NULL UNIQUE REFERENCES subjects(subject_id),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 13. Create forum_posts table
@@ -193,8 +230,8 @@ CREATE TABLE forum_posts (
     title VARCHAR(255) NOT NULL,
     content TEXT NOT NULL,
     status forum_status DEFAULT 'approved',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 14. Create forum_replies table
@@ -204,8 +241,8 @@ CREATE TABLE forum_replies (
     user_id INTEGER NOT NULL REFERENCES users(user_id),
     content TEXT NOT NULL,
     status forum_status DEFAULT 'approved',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 15. Create notifications table
@@ -217,7 +254,7 @@ CREATE TABLE notifications (
     is_read BOOLEAN DEFAULT FALSE,
     type VARCHAR(50) NOT NULL,
     reference_id INTEGER,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 16. Create system_config table
@@ -226,7 +263,71 @@ CREATE TABLE system_config (
     config_key VARCHAR(50) NOT NULL UNIQUE,
     config_value TEXT NOT NULL,
     description VARCHAR(255),
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 17. Create background_tasks table (durable task queue, see app/background/queue.py)
+CREATE TABLE background_tasks (
+    task_id BIGSERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    dedup_key VARCHAR(255),
+    run_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_until TIMESTAMPTZ,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_background_tasks_status_run_at ON background_tasks(status, run_at);
+CREATE UNIQUE INDEX uix_background_tasks_dedup_key ON background_tasks(dedup_key)
+    WHERE status IN ('queued', 'running');
+
+-- 18. Create bulk_jobs table (progress of background bulk operations)
+CREATE TABLE bulk_jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    operation VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_by INTEGER REFERENCES users(user_id),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 19. Create file_blobs table (content-addressed file storage, see app/services/storage.py)
+CREATE TABLE file_blobs (
+    sha256 CHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 20. Create stat_counters table (site statistics, see app/services/statistics.py)
+CREATE TABLE stat_counters (
+    scope VARCHAR(20) NOT NULL,
+    scope_id INTEGER NOT NULL DEFAULT 0,
+    metric VARCHAR(20) NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT pk_stat_counters PRIMARY KEY (scope, scope_id, metric)
+);
+
+-- 21. Create document_rating_stats table (rating aggregates, see app/services/ratings.py)
+CREATE TABLE document_rating_stats (
+    document_id INTEGER PRIMARY KEY REFERENCES documents(document_id) ON DELETE CASCADE,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    score_0 INTEGER NOT NULL DEFAULT 0,
+    score_1 INTEGER NOT NULL DEFAULT 0,
+    score_2 INTEGER NOT NULL DEFAULT 0,
+    score_3 INTEGER NOT NULL DEFAULT 0,
+    score_4 INTEGER NOT NULL DEFAULT 0,
+    score_5 INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create additional indexes for performance
@@ -234,12 +335,25 @@ CREATE INDEX idx_document_history_document_user ON document_history(document_id,
 CREATE INDEX idx_forum_posts_forum_id ON forum_posts(forum_id);
 CREATE INDEX idx_forum_replies_post_id ON forum_replies(post_id);
 CREATE INDEX idx_notifications_user_id ON notifications(user_id);
+CREATE INDEX idx_notifications_type_reference ON notifications(type, reference_id);
 CREATE INDEX idx_shared_links_document_id ON shared_links(document_id);
 
 -- Create composite indexes for frequently queried combinations
 CREATE INDEX idx_documents_subject_status ON documents(subject_id, status);
 CREATE INDEX idx_documents_user_created ON documents(user_id, created_at);
 CREATE INDEX idx_ratings_document_score ON ratings(document_id, score);
+CREATE INDEX idx_notifications_user_is_read ON notifications(user_id, is_read);
+CREATE INDEX idx_document_history_document_created_at ON document_history(document_id, created_at);
+CREATE INDEX ix_users_username ON users(username);
+
+-- Indexes for lists sorted / windowed by time
+CREATE INDEX idx_documents_created_at ON documents(created_at, document_id);
+CREATE INDEX idx_documents_status_created_at ON documents(status, created_at, document_id);
+CREATE INDEX idx_document_history_created_at ON document_history(created_at);
+CREATE INDEX idx_comments_document_created_at ON comments(document_id, created_at);
+CREATE INDEX idx_forum_posts_forum_created_at ON forum_posts(forum_id, created_at, post_id);
+CREATE INDEX idx_forum_replies_post_created_at ON forum_replies(post_id, created_at, reply_id);
+CREATE INDEX idx_notifications_user_created_at ON notifications(user_id, created_at);
 
 -- Add triggers for updating 'updated_at' timestamps
 CREATE OR REPLACE FUNCTION update_updated_at_column()